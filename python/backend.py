@@ -52,17 +52,17 @@ class PromptRequest(BaseModel):
 def home():
     return {"message": "Backend running successfully"}
 
+# Response cache counters
+@app.get("/cache/stats")
+def response_cache_stats_route():
+    return get_response_cache_stats()
+
 # Generate route
 @app.post("/generate")
 async def generate_text(request: PromptRequest):
     try:
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=request.prompt
-        )
-
         return {
-            "response": response.text
+            "response": cached_generate(request.prompt)
         }
 
     except Exception as e:
@@ -188,12 +188,16 @@ SEARCH FOLDERS:
   "max_results": 10
 }
 
-SEARCH INSIDE FILES:
+SEARCH INSIDE FILES ("a OR b" / "a AND b" combine terms; "rank": true puts the most relevant files first):
 {
   "action": "search_in_files",
   "keyword": "<term>",
   "file_pattern": "*.py",
-  "max_results": 10
+  "max_results": 10,
+  "regex": false,
+  "whole_word": false,
+  "case_sensitive": false,
+  "rank": false
 }
 
 GET FILE INFO:
@@ -201,6 +205,28 @@ GET FILE INFO:
   "action": "get_file_info",
   "path": "<relative_path/file.py>"
 }
+
+SEMANTIC SEARCH (find code related to a question, e.g. "where do we handle auth tokens"):
+{
+  "action": "semantic_search",
+  "query": "<question or description>",
+  "max_results": 10
+}
+
+FIND SYMBOL (where a Python function, class, method or variable is defined):
+{
+  "action": "find_symbol",
+  "name": "<name or Class.method>",
+  "kind": "function | class | method | variable (optional)",
+  "max_results": 20
+}
+
+IMPORT GRAPH (which Python files a file imports, and which files import it):
+{
+  "action": "import_graph",
+  "path": "<relative_path/file.py>",
+  "transitive": true
+}
 OPERATION MODE RULES:
 
 1. If performing file system actions (create, update, delete, run, search):
@@ -246,9 +272,20 @@ Return exactly one valid JSON object per response.
 """
 
 
-def send_response(text):
-    """Send response to VS Code: extension (stdout)"""
-    sys.stdout.write(json.dumps({"type": "response", "text": text}) + "\n")
+def send_response(text, streamed=False):
+    """
+    Send response to VS Code: extension (stdout). streamed marks the final
+    message of a reply whose text already went out as delta messages.
+    """
+    message = {"type": "response", "text": text}
+    if streamed:
+        message["streamed"] = True
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+def send_delta(text):
+    """Send a piece of a reply to VS Code: extension while the model is still generating."""
+    sys.stdout.write(json.dumps({"type": "delta", "text": text}) + "\n")
     sys.stdout.flush()
 
 def send_error(error):
@@ -273,6 +310,12 @@ def send_confirmation_request(text, action_data):
 # Global variable to store pending confirmation
 pending_confirmation = None
 
+# Stream search matches as search_hit messages (set from the config message)
+STREAM_SEARCH_RESULTS = False
+
+# Stream chat replies as delta messages while they generate (set from the config message)
+STREAM_CHAT_RESPONSES = False
+
 
 def create_folder(folder):
     try:
@@ -281,18 +324,155 @@ def create_folder(folder):
         if os.path.exists(full_path):
             return f"[INFO] Folder '{full_path}' already exists."
         os.makedirs(full_path, exist_ok=True)
+        index_refresh_path(full_path)
         return f"[OK] Folder '{full_path}' created."
     except OSError as e:
         return f"[ERROR] {e}"
 
-def create_project(folder, files):
+def start_project(folder):
+    """
+    Create the folder of a create_project action. Returns the project state
+    that write_project_file adds to, or an error string.
+    """
+    # Sanitize folder name (remove any path traversal attempts)
+    folder = os.path.basename(folder.strip())
+    
+    # Create main project folder
+    project_path = os.path.join(WORKSPACE_PATH, folder)
+    project = {
+        'folder': folder,
+        'path': project_path,
+        'results': [],
+        'debug_info': [f"Project path: {project_path}"],
+        'created': 0,
+        'updated': 0,
+        'errors': 0,
+        # File entries already written, in order
+        'written': []
+    }
+    
+    if not os.path.exists(project_path):
+        os.makedirs(project_path, exist_ok=True)
+        project['results'].append(f"[OK] Created project folder: {folder}")
+    else:
+        project['results'].append(f"[INFO] Project folder '{folder}' already exists.")
+    return project
+
+
+def write_project_file(project, idx, file_info):
+    """Write a single entry of a create_project files list, recording the outcome on the project."""
+    folder = project['folder']
+    results = project['results']
+    debug_info = project['debug_info']
+    file_path = ""
+    project['written'].append(file_info)
+    try:
+        # Validate file info structure
+        if not isinstance(file_info, dict):
+            results.append(f"[ERROR] File #{idx+1}: Invalid format (expected dict, got {type(file_info)})")
+            project['errors'] += 1
+            return
+        
+        file_path = file_info.get("path", "").strip()
+        content = file_info.get("content", "")
+        
+        if not file_path:
+            results.append(f"[ERROR] File #{idx+1}: Missing path")
+            project['errors'] += 1
+            return
+        
+        # Sanitize file path (prevent path traversal)
+        file_path = file_path.replace('\\', '/').strip('/')
+        if '..' in file_path or file_path.startswith('/'):
+            results.append(f"[ERROR] File #{idx+1}: Invalid path '{file_path}' (path traversal detected)")
+            project['errors'] += 1
+            return
+        
+        debug_info.append(f"Processing file {idx+1}: {file_path}")
+        
+        # Handle content encoding issues
+        if content and isinstance(content, str):
+            # Fix common JSON escaping issues
+            content = content.replace('\\n', '\n')
+            content = content.replace('\\t', '\t')
+            content = content.replace('\\"', '"')
+            content = content.replace('\\\\', '\\')
+        
+        # Determine full file path
+        if file_path.startswith(folder):
+            # Path already includes project folder
+            relative_path = file_path[len(folder):].lstrip('/')
+            full_file_path = os.path.join(WORKSPACE_PATH, file_path)
+        else:
+            # Path is relative to project folder
+            relative_path = file_path
+            full_file_path = os.path.join(project['path'], file_path)
+        
+        debug_info.append(f"Full path: {full_file_path}")
+        
+        # Create parent directories if needed
+        parent_dir = os.path.dirname(full_file_path)
+        if parent_dir and not os.path.exists(parent_dir):
+            os.makedirs(parent_dir, exist_ok=True)
+            rel_parent = os.path.relpath(parent_dir, WORKSPACE_PATH)
+            results.append(f"[OK] Created directory: {rel_parent}")
+        
+        # Check if file already exists
+        file_exists = os.path.exists(full_file_path)
+        
+        # Write the file with proper encoding
+        try:
+            with open(full_file_path, "w", encoding='utf-8') as f:
+                f.write(content)
+        except UnicodeEncodeError:
+            # Fallback to latin-1 if utf-8 fails
+            with open(full_file_path, "w", encoding='latin-1', errors='replace') as f:
+                f.write(content)
+            results.append(f"  [WARNING] Used latin-1 encoding due to Unicode issues")
+        
+        # Keep the workspace index in sync with our own writes
+        index_refresh_path(full_file_path)
+        
+        rel_path = os.path.relpath(full_file_path, WORKSPACE_PATH)
+        
+        # Report file operation
+        if file_exists:
+            results.append(f"[UPDATED] {rel_path} ({len(content)} chars)")
+            project['updated'] += 1
+        else:
+            results.append(f"[CREATED] {rel_path} ({len(content)} chars)")
+            project['created'] += 1
+        
+        # Validate Python files
+        if full_file_path.endswith('.py'):
+            try:
+                import ast
+                ast.parse(content)
+                results.append(f"  [OK] Syntax validation passed")
+            except SyntaxError as e:
+                results.append(f"  [WARNING] Syntax issues detected: {str(e)}")
+                # Optionally create a .syntax_error file for debugging
+                error_file = full_file_path + '.syntax_error'
+                with open(error_file, 'w', encoding='utf-8') as f:
+                    f.write(f"Error at line {e.lineno}: {e.msg}\n\n")
+                    f.write(content)
+                index_refresh_path(error_file)
+            except Exception as e:
+                results.append(f"  [WARNING] Validation error: {str(e)}")
+        
+    except Exception as e:
+        results.append(f"[ERROR] Failed to create file {file_path}: {str(e)}")
+        project['errors'] += 1
+        debug_info.append(f"Error details: {str(e)}")
+
+
+def create_project(folder, files, project=None):
     """
     Create a project with multiple files and folders.
     Enhanced with better error handling and logging.
+    project is the state of a create_project whose first files were already
+    written while the reply streamed; those entries are not written again.
     """
-    results = []
-    debug_info = []
-    
     try:
         # Validate inputs
         if not folder:
@@ -300,138 +480,40 @@ def create_project(folder, files):
         if not files or not isinstance(files, list):
             return "[ERROR] Files must be a non-empty list"
         
-        # Sanitize folder name (remove any path traversal attempts)
-        folder = os.path.basename(folder.strip())
-        
-        # Create main project folder
-        project_path = os.path.join(WORKSPACE_PATH, folder)
-        debug_info.append(f"Project path: {project_path}")
-        
-        if not os.path.exists(project_path):
-            os.makedirs(project_path, exist_ok=True)
-            results.append(f"[OK] Created project folder: {folder}")
-        else:
-            results.append(f"[INFO] Project folder '{folder}' already exists.")
+        if project is None:
+            project = start_project(folder)
         
         # Create each file
-        created_count = 0
-        updated_count = 0
-        error_count = 0
-        
+        written = project['written'][:]
         for idx, file_info in enumerate(files):
-            try:
-                # Validate file info structure
-                if not isinstance(file_info, dict):
-                    results.append(f"[ERROR] File #{idx+1}: Invalid format (expected dict, got {type(file_info)})")
-                    error_count += 1
-                    continue
-                
-                file_path = file_info.get("path", "").strip()
-                content = file_info.get("content", "")
-                
-                if not file_path:
-                    results.append(f"[ERROR] File #{idx+1}: Missing path")
-                    error_count += 1
-                    continue
-                
-                # Sanitize file path (prevent path traversal)
-                file_path = file_path.replace('\\', '/').strip('/')
-                if '..' in file_path or file_path.startswith('/'):
-                    results.append(f"[ERROR] File #{idx+1}: Invalid path '{file_path}' (path traversal detected)")
-                    error_count += 1
-                    continue
-                
-                debug_info.append(f"Processing file {idx+1}: {file_path}")
-                
-                # Handle content encoding issues
-                if content and isinstance(content, str):
-                    # Fix common JSON escaping issues
-                    content = content.replace('\\n', '\n')
-                    content = content.replace('\\t', '\t')
-                    content = content.replace('\\"', '"')
-                    content = content.replace('\\\\', '\\')
-                
-                # Determine full file path
-                if file_path.startswith(folder):
-                    # Path already includes project folder
-                    relative_path = file_path[len(folder):].lstrip('/')
-                    full_file_path = os.path.join(WORKSPACE_PATH, file_path)
-                else:
-                    # Path is relative to project folder
-                    relative_path = file_path
-                    full_file_path = os.path.join(project_path, file_path)
-                
-                debug_info.append(f"Full path: {full_file_path}")
-                
-                # Create parent directories if needed
-                parent_dir = os.path.dirname(full_file_path)
-                if parent_dir and not os.path.exists(parent_dir):
-                    os.makedirs(parent_dir, exist_ok=True)
-                    rel_parent = os.path.relpath(parent_dir, WORKSPACE_PATH)
-                    results.append(f"[OK] Created directory: {rel_parent}")
-                
-                # Check if file already exists
-                file_exists = os.path.exists(full_file_path)
-                
-                # Write the file with proper encoding
-                try:
-                    with open(full_file_path, "w", encoding='utf-8') as f:
-                        f.write(content)
-                except UnicodeEncodeError:
-                    # Fallback to latin-1 if utf-8 fails
-                    with open(full_file_path, "w", encoding='latin-1', errors='replace') as f:
-                        f.write(content)
-                    results.append(f"  [WARNING] Used latin-1 encoding due to Unicode issues")
-                
-                rel_path = os.path.relpath(full_file_path, WORKSPACE_PATH)
-                
-                # Report file operation
-                if file_exists:
-                    results.append(f"[UPDATED] {rel_path} ({len(content)} chars)")
-                    updated_count += 1
-                else:
-                    results.append(f"[CREATED] {rel_path} ({len(content)} chars)")
-                    created_count += 1
-                
-                # Validate Python files
-                if full_file_path.endswith('.py'):
-                    try:
-                        import ast
-                        ast.parse(content)
-                        results.append(f"  [OK] Syntax validation passed")
-                    except SyntaxError as e:
-                        results.append(f"  [WARNING] Syntax issues detected: {str(e)}")
-                        # Optionally create a .syntax_error file for debugging
-                        error_file = full_file_path + '.syntax_error'
-                        with open(error_file, 'w', encoding='utf-8') as f:
-                            f.write(f"Error at line {e.lineno}: {e.msg}\n\n")
-                            f.write(content)
-                    except Exception as e:
-                        results.append(f"  [WARNING] Validation error: {str(e)}")
-                
-            except Exception as e:
-                results.append(f"[ERROR] Failed to create file {file_path}: {str(e)}")
-                error_count += 1
-                debug_info.append(f"Error details: {str(e)}")
-        
-        # Summary
-        results.append("-" * 50)
-        results.append(f"[SUMMARY] Project '{folder}':")
-        results.append(f"  Created: {created_count} files")
-        results.append(f"  Updated: {updated_count} files")
-        if error_count > 0:
-            results.append(f"  Errors: {error_count} files")
-        results.append(f"[OK] Project setup complete!")
-        
-        # Add debug info if there were errors
-        if error_count > 0:
-            results.append("\n[DEBUG INFO]")
-            results.extend(debug_info[-5:])  # Last 5 debug messages
-        
-        return "\n".join(results)
+            if written and file_info == written[0]:
+                written.pop(0)
+                continue
+            write_project_file(project, idx, file_info)
+        
+        return summarize_project(project, "[OK] Project setup complete!")
         
     except Exception as e:
         return f"[ERROR] Failed to create project: {str(e)}"
+
+
+def summarize_project(project, outcome):
+    """The report of a create_project: every step taken, the counts and an outcome line."""
+    results = project['results'][:]
+    results.append("-" * 50)
+    results.append(f"[SUMMARY] Project '{project['folder']}':")
+    results.append(f"  Created: {project['created']} files")
+    results.append(f"  Updated: {project['updated']} files")
+    if project['errors'] > 0:
+        results.append(f"  Errors: {project['errors']} files")
+    results.append(outcome)
+    
+    # Add debug info if there were errors
+    if project['errors'] > 0:
+        results.append("\n[DEBUG INFO]")
+        results.extend(project['debug_info'][-5:])  # Last 5 debug messages
+    
+    return "\n".join(results)
 def preprocess_ai_response(response_text):
     """Clean up AI response before JSON parsing"""
     # Remove markdown code blocks
@@ -486,180 +568,3828 @@ def validate_create_project_action(data):
     return True, "Valid"
 
 
-def find_file_recursive(filename, search_path=None):
-    """Search for a file recursively in all subdirectories."""
-    if search_path is None:
-        search_path = WORKSPACE_PATH
+# Shared workspace walker - every traversal goes through scan_workspace_dir so
+# skipped folders and .gitignore/.ignore matches are pruned before descent.
+WALK_SKIP_DIRS = {'node_modules', '__pycache__', 'venv', 'env', '.git', '.vscode'}
+IGNORE_FILE_NAMES = ('.gitignore', '.ignore')
+
+# Compiled rules per ignore file, keyed by full path and reused while the mtime is unchanged
+ignore_rules_cache = {}
+
+
+def compile_ignore_pattern(line):
+    """
+    Compile one .gitignore line into (regex, negate, dir_only), or None for blanks and comments.
+    The regex matches paths relative to the ignore file's folder, using '/' separators.
+    """
+    line = line.rstrip('\r\n')
+    if not line.endswith('\\ '):
+        line = line.rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
     
-    # First check if file exists at the given path directly
-    if os.path.exists(filename):
-        return filename
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    if line.startswith('\\'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
     
-    # Check if it's an absolute path
-    if os.path.isabs(filename):
-        if os.path.exists(filename):
-            return filename
+    # Patterns with a slash are relative to the ignore file; others match at any depth
+    anchored = '/' in line
+    line = line.lstrip('/')
+    
+    regex = ''
+    i = 0
+    while i < len(line):
+        char = line[i]
+        # Only a ** that is a whole path segment crosses folders; elsewhere it is a plain *
+        whole_segment = i == 0 or line[i - 1] == '/'
+        if whole_segment and line.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+            continue
+        if whole_segment and line.startswith('**', i) and i + 2 == len(line):
+            regex += '.*'
+            i += 2
+            continue
+        if char == '*':
+            regex += '[^/]*'
+            while i + 1 < len(line) and line[i + 1] == '*':
+                i += 1
+        elif char == '?':
+            regex += '[^/]'
+        elif char == '[':
+            end = line.find(']', i + 2)
+            if end == -1:
+                regex += '\\['
+            else:
+                body = line[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex += '[' + body.replace('\\', '\\\\') + ']'
+                i = end + 1
+                continue
+        elif char == '\\' and i + 1 < len(line):
+            regex += re.escape(line[i + 1])
+            i += 2
+            continue
+        else:
+            regex += re.escape(char)
+        i += 1
+    
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    try:
+        # A match on a folder also covers everything inside it
+        return re.compile(regex + '(?P<inside>/.*)?'), negate, dir_only
+    except re.error:
+        return None
+
+
+def load_ignore_rules(full_dir, names):
+    """Return the compiled ignore rules of a folder given its entry names (empty list if none)."""
+    rules = []
+    for ignore_name in IGNORE_FILE_NAMES:
+        if ignore_name not in names:
+            continue
+        ignore_path = os.path.join(full_dir, ignore_name)
+        try:
+            mtime = os.stat(ignore_path).st_mtime
+            cached = ignore_rules_cache.get(ignore_path)
+            if cached is None or cached[0] != mtime:
+                with open(ignore_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    compiled = [rule for rule in map(compile_ignore_pattern, f) if rule]
+                cached = ignore_rules_cache[ignore_path] = (mtime, compiled)
+            rules.extend(cached[1])
+        except OSError:
+            continue
+    return rules
+
+
+def is_path_ignored(chain, rel_path, is_dir):
+    """
+    Check a path against a chain of (base, prefix, rules), outermost folder first.
+    Rules see the path relative to base, with prefix prepended (for ignore files above the walk root).
+    As in git, the last matching rule wins and deeper ignore files override outer ones.
+    """
+    if os.sep != '/':
+        rel_path = rel_path.replace(os.sep, '/')
+    
+    ignored = False
+    for base, prefix, rules in chain:
+        if base:
+            if not rel_path.startswith(base + '/'):
+                continue
+            path = prefix + rel_path[len(base) + 1:]
+        else:
+            path = prefix + rel_path
+        
+        for regex, negate, dir_only in reversed(rules):
+            match = regex.fullmatch(path)
+            if match is None:
+                continue
+            if dir_only and not is_dir and match.group('inside') is None:
+                continue
+            ignored = not negate
+            break
+    return ignored
+
+
+def is_skipped_path(rel_path, is_dir):
+    """Check whether a relative path is (or lives in) a folder the walker never enters."""
+    parts = rel_path.split(os.sep)
+    if not is_dir:
+        parts = parts[:-1]
+    return any(part.startswith('.') or part in WALK_SKIP_DIRS for part in parts if part)
+
+
+def scan_workspace_dir(top, rel_dir, chain):
+    """
+    List one folder under top, dropping skipped and ignored entries.
+    Returns (dir_entries, file_entries, chain), sorted by name; the returned chain
+    includes this folder's own ignore rules for use by its subfolders.
+    Raises OSError if the folder can't be read.
+    """
+    with os.scandir(os.path.join(top, rel_dir)) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    
+    rules = load_ignore_rules(os.path.join(top, rel_dir), {e.name for e in entries})
+    if rules:
+        chain = chain + [(rel_dir.replace(os.sep, '/'), '', rules)]
+    
+    dir_entries = []
+    file_entries = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            continue
+        if is_dir and (entry.name.startswith('.') or entry.name in WALK_SKIP_DIRS):
+            continue
+        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+        if chain and is_path_ignored(chain, rel_path, is_dir):
+            continue
+        (dir_entries if is_dir else file_entries).append(entry)
+    
+    return dir_entries, file_entries, chain
+
+
+def ancestor_ignore_chain(top):
+    """Ignore rules from the workspace folders above top, rebased so they apply to paths under top."""
+    rel_top = os.path.relpath(os.path.abspath(top), os.path.abspath(WORKSPACE_PATH))
+    if rel_top == '.' or rel_top.startswith('..'):
+        return []
+    
+    chain = []
+    parts = rel_top.split(os.sep)
+    for depth in range(len(parts)):
+        full_dir = os.path.join(WORKSPACE_PATH, *parts[:depth])
+        try:
+            names = set(os.listdir(full_dir))
+        except OSError:
+            continue
+        rules = load_ignore_rules(full_dir, names)
+        if rules:
+            # Paths under top are seen by these rules as '<rest of rel_top>/<path>'
+            chain.append(('', '/'.join(parts[depth:]) + '/', rules))
+    return chain
+
+
+def walk_workspace(top):
+    """
+    Walk top like os.walk, yielding (rel_dir, dir_entries, file_entries) top-down.
+    Entries are os.DirEntry objects (with cached stat results) in name order.
+    Skipped and ignored folders are never entered; callers can prune further by
+    removing entries from dir_entries.
+    """
+    pending = [('', ancestor_ignore_chain(top))]
+    while pending:
+        rel_dir, chain = pending.pop()
+        try:
+            dir_entries, file_entries, chain = scan_workspace_dir(top, rel_dir, chain)
+        except OSError:
+            continue
+        
+        yield rel_dir, dir_entries, file_entries
+        
+        # Like os.walk, don't descend into symlinked folders
+        for entry in reversed(dir_entries):
+            if not entry.is_symlink():
+                pending.append((os.path.join(rel_dir, entry.name) if rel_dir else entry.name, chain))
+
+
+# Workspace file index - built once per workspace so path lookups are hash lookups
+# instead of a full walk of the tree.
+
+# Seconds between polls when inotify is not available
+WATCHER_POLL_INTERVAL = 2.0
+# Folders re-stat'ed per poll so edits that don't touch folder mtimes are still picked up
+WATCHER_SWEEP_BATCH = 200
+WORKSPACE_INDEX_VERSION = 2
+# Minimum seconds between writes of the workspace index to disk
+INDEX_SAVE_INTERVAL = 30.0
+
+workspace_index = None
+workspace_index_lock = threading.RLock()
+workspace_watcher = None
+
+# Workspaces switched away from: root -> parked indexes, least recently used first
+workspace_registry = {}
+# Estimated memory all workspace indexes together may use before cold ones are evicted
+WORKSPACE_MEMORY_BUDGET = int(os.getenv("VIBECODING_WORKSPACE_MEMORY_MB", "512")) * 1024 * 1024
+# Rough per-item costs behind the memory estimate
+TRIGRAM_FILE_BYTES = 350
+POSTING_LIST_BYTES = 80
+SYMBOL_ENTRY_BYTES = 200
+
+
+class IndexEntry:
+    """A snapshot of one workspace index entry, taken under the index lock."""
+    __slots__ = ('store', 'id', 'epoch', 'path', 'name', 'is_dir', 'size', 'mtime', 'kind')
+    
+    def __init__(self, store, entry_id, path, name, is_dir, size, mtime, kind):
+        self.store = store
+        self.id = entry_id
+        self.epoch = store.epoch
+        self.path = path
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.kind = kind
+
+
+class PathStore:
+    """
+    Every indexed file and folder as parallel arrays indexed by entry id.
+    Folder paths are interned once and entries point at their parent folder
+    by id; names live UTF-8 encoded in one shared buffer. Lookups go through
+    a dict from relative path to id and a dict from name to the newest entry
+    with that name. Ids stay valid until compact() returns a renumbered copy.
+    Like the index dicts before it, the store is only read or changed with
+    workspace_index_lock held.
+    """
+    __slots__ = ('dirs', 'dir_ids', 'dir_entries', 'first_child',
+                 'parents', 'name_starts', 'name_lengths', 'names', 'sizes', 'mtimes', 'flags',
+                 'next_sibling', 'prev_sibling', 'next_same_name',
+                 'path_ids', 'name_heads', 'live', 'dead', 'epoch')
+    
+    def __init__(self):
+        from array import array
+        # Folders by folder id: interned relative path, own entry id (-1 for the root,
+        # -2 once removed) and the head of the linked list of children
+        self.dirs = ['']
+        self.dir_ids = {'': 0}
+        self.dir_entries = array('i', [-1])
+        self.first_child = array('i', [-1])
+        # Entries by entry id; a removed entry has parent -1
+        self.parents = array('i')
+        self.name_starts = array('I')
+        self.name_lengths = array('H')
+        self.names = bytearray()
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        # Folder bit, plus the sniffed kind code shifted left by one (0 when unknown)
+        self.flags = array('B')
+        self.next_sibling = array('i')
+        self.prev_sibling = array('i')
+        # Entries sharing a name are chained from name_heads through next_same_name
+        self.next_same_name = array('i')
+        self.path_ids = {}
+        self.name_heads = {}
+        self.live = 0
+        self.dead = 0
+        self.epoch = 0
+    
+    def __len__(self):
+        return self.live
+    
+    def __contains__(self, rel_path):
+        return rel_path in self.path_ids
+    
+    def name_key(self, entry_id):
+        start = self.name_starts[entry_id]
+        return self.names[start:start + self.name_lengths[entry_id]]
+    
+    def name(self, entry_id):
+        return self.name_key(entry_id).decode('utf-8', errors='surrogateescape')
+    
+    def path(self, entry_id):
+        folder = self.dirs[self.parents[entry_id]]
+        return folder + os.sep + self.name(entry_id) if folder else self.name(entry_id)
+    
+    def is_dir(self, entry_id):
+        return bool(self.flags[entry_id] & 1)
+    
+    def entry(self, entry_id, path=None):
+        """Snapshot an entry as an IndexEntry."""
+        flags = self.flags[entry_id]
+        name = self.name(entry_id)
+        if path is None:
+            folder = self.dirs[self.parents[entry_id]]
+            path = folder + os.sep + name if folder else name
+        return IndexEntry(self, entry_id, path, name, bool(flags & 1), self.sizes[entry_id],
+                          self.mtimes[entry_id], FILE_KINDS.get(flags >> 1))
+    
+    def find(self, rel_path):
+        """Entry id of a relative path, or -1 if it isn't indexed."""
+        return self.path_ids.get(rel_path, -1)
+    
+    def get(self, rel_path):
+        """Snapshot of the entry for a relative path, or None."""
+        entry_id = self.path_ids.get(rel_path, -1)
+        return self.entry(entry_id, rel_path) if entry_id >= 0 else None
+    
+    def intern_dir(self, rel_dir, entry_id=-1):
+        """Folder id for a relative folder path, registering it if needed."""
+        folder_id = self.dir_ids.get(rel_dir)
+        if folder_id is None:
+            folder_id = len(self.dirs)
+            self.dirs.append(rel_dir)
+            self.dir_ids[rel_dir] = folder_id
+            self.dir_entries.append(entry_id)
+            self.first_child.append(-1)
+        elif entry_id >= 0:
+            self.dir_entries[folder_id] = entry_id
+        return folder_id
+    
+    def add(self, rel_path, is_dir):
+        """Add an entry that isn't indexed yet and return its id."""
+        cut = rel_path.rfind(os.sep)
+        folder_id = self.intern_dir(rel_path[:cut] if cut >= 0 else '')
+        name = rel_path[cut + 1:]
+        key = name.encode('utf-8', errors='surrogateescape')
+        entry_id = len(self.parents)
+        
+        self.parents.append(folder_id)
+        self.name_starts.append(len(self.names))
+        self.name_lengths.append(len(key))
+        self.names += key
+        self.sizes.append(0)
+        self.mtimes.append(0.0)
+        self.flags.append(1 if is_dir else 0)
+        
+        head = self.first_child[folder_id]
+        self.next_sibling.append(head)
+        self.prev_sibling.append(-1)
+        if head >= 0:
+            self.prev_sibling[head] = entry_id
+        self.first_child[folder_id] = entry_id
+        
+        self.path_ids[rel_path] = entry_id
+        self.next_same_name.append(self.name_heads.get(name, -1))
+        self.name_heads[name] = entry_id
+        
+        if is_dir:
+            self.intern_dir(rel_path, entry_id)
+        self.live += 1
+        return entry_id
+    
+    def reindex(self):
+        """Rebuild the children lists and both lookup dicts from the arrays (after loading)."""
+        from array import array
+        count = len(self.parents)
+        self.first_child = array('i', [-1]) * len(self.dirs)
+        self.next_sibling = array('i', [-1]) * count
+        self.prev_sibling = array('i', [-1]) * count
+        self.next_same_name = array('i', [-1]) * count
+        self.path_ids = {}
+        self.name_heads = {}
+        first_child, next_sibling, prev_sibling = self.first_child, self.next_sibling, self.prev_sibling
+        next_same_name, name_heads, path_ids, dirs = self.next_same_name, self.name_heads, self.path_ids, self.dirs
+        for entry_id, folder_id in enumerate(self.parents):
+            if folder_id < 0:
+                continue
+            head = first_child[folder_id]
+            next_sibling[entry_id] = head
+            if head >= 0:
+                prev_sibling[head] = entry_id
+            first_child[folder_id] = entry_id
+            
+            name = self.name(entry_id)
+            folder = dirs[folder_id]
+            path_ids[folder + os.sep + name if folder else name] = entry_id
+            next_same_name[entry_id] = name_heads.get(name, -1)
+            name_heads[name] = entry_id
+    
+    def remove(self, entry_id):
+        """Remove one entry. A folder's children must have been removed first."""
+        folder_id = self.parents[entry_id]
+        name = self.name(entry_id)
+        rel_path = self.path(entry_id)
+        
+        previous, following = self.prev_sibling[entry_id], self.next_sibling[entry_id]
+        if previous >= 0:
+            self.next_sibling[previous] = following
+        else:
+            self.first_child[folder_id] = following
+        if following >= 0:
+            self.prev_sibling[following] = previous
+        
+        del self.path_ids[rel_path]
+        head = self.name_heads[name]
+        if head == entry_id:
+            following = self.next_same_name[entry_id]
+            if following >= 0:
+                self.name_heads[name] = following
+            else:
+                del self.name_heads[name]
+        else:
+            while self.next_same_name[head] != entry_id:
+                head = self.next_same_name[head]
+            self.next_same_name[head] = self.next_same_name[entry_id]
+        
+        if self.flags[entry_id] & 1:
+            own_id = self.dir_ids.pop(rel_path, None)
+            if own_id is not None:
+                self.dir_entries[own_id] = -2
+        self.parents[entry_id] = -1
+        self.live -= 1
+        self.dead += 1
+    
+    def update(self, entry_id, size, mtime):
+        """Store fresh stat data. Returns True if it changed, which forgets the sniffed kind."""
+        if self.sizes[entry_id] == size and self.mtimes[entry_id] == mtime:
+            return False
+        self.sizes[entry_id] = size
+        self.mtimes[entry_id] = mtime
+        self.flags[entry_id] &= 1
+        return True
+    
+    def set_kind(self, entry, kind):
+        """Remember the sniffed kind of a file, unless it changed since entry was taken."""
+        entry_id = entry.id
+        if (entry.epoch == self.epoch and self.parents[entry_id] >= 0
+                and self.sizes[entry_id] == entry.size and self.mtimes[entry_id] == entry.mtime):
+            self.flags[entry_id] = (self.flags[entry_id] & 1) | (FILE_KIND_CODES[kind] << 1)
+    
+    def children(self, rel_dir):
+        """Entry ids of the direct children of a folder."""
+        folder_id = self.dir_ids.get(rel_dir)
+        child_ids = []
+        entry_id = self.first_child[folder_id] if folder_id is not None else -1
+        while entry_id >= 0:
+            child_ids.append(entry_id)
+            entry_id = self.next_sibling[entry_id]
+        return child_ids
+    
+    def named(self, name):
+        """Entry ids of every entry with the given basename."""
+        entry_id = self.name_heads.get(name, -1)
+        named_ids = []
+        while entry_id >= 0:
+            named_ids.append(entry_id)
+            entry_id = self.next_same_name[entry_id]
+        return named_ids
+    
+    def files(self):
+        """Snapshots of every file entry."""
+        return [self.entry(entry_id) for entry_id, folder_id in enumerate(self.parents)
+                if folder_id >= 0 and not self.flags[entry_id] & 1]
+    
+    def file_paths(self):
+        """Relative paths of every file entry."""
+        return [self.path(entry_id) for entry_id, folder_id in enumerate(self.parents)
+                if folder_id >= 0 and not self.flags[entry_id] & 1]
+    
+    def folder_paths(self):
+        """Relative paths of every folder entry (the root isn't an entry)."""
+        return [rel_dir for folder_id, rel_dir in enumerate(self.dirs) if self.dir_entries[folder_id] >= 0]
+    
+    def compact(self):
+        """
+        Return a copy without removed entries and folders, with ids renumbered
+        parent-first. The copy is built aside and left to the caller to publish
+        with a single assignment, so this store is never seen half-rewritten.
+        """
+        store = PathStore()
+        pending = ['']
+        while pending:
+            rel_dir = pending.pop()
+            for entry_id in reversed(self.children(rel_dir)):
+                rel_path = os.path.join(rel_dir, self.name(entry_id)) if rel_dir else self.name(entry_id)
+                new_id = store.add(rel_path, self.is_dir(entry_id))
+                store.sizes[new_id] = self.sizes[entry_id]
+                store.mtimes[new_id] = self.mtimes[entry_id]
+                store.flags[new_id] = self.flags[entry_id]
+                if self.flags[entry_id] & 1:
+                    pending.append(rel_path)
+        store.epoch = self.epoch + 1
+        return store
+    
+    def nbytes(self):
+        """Approximate memory held by the store."""
+        arrays = (self.dir_entries, self.first_child, self.parents, self.name_starts, self.name_lengths,
+                  self.sizes, self.mtimes, self.flags, self.next_sibling, self.prev_sibling, self.next_same_name)
+        folders = sum(len(rel_dir) + 120 for rel_dir in self.dirs)
+        # A dict slot plus the key string: about 100 bytes per path and 80 per distinct name
+        lookups = sum(len(rel_path) + 100 for rel_path in self.path_ids) + len(self.name_heads) * 80
+        return sum(a.itemsize * len(a) for a in arrays) + len(self.names) + folders + lookups
+
+
+def index_add_to_totals(index, rel_dir, files, size):
+    """Add to the recursive file count and byte total of a folder and all its parents."""
+    while True:
+        totals = index['dir_stats'].get(rel_dir)
+        if totals is not None:
+            totals['total_files'] += files
+            totals['total_size'] += size
+        if not rel_dir:
+            break
+        rel_dir = os.path.dirname(rel_dir)
+
+
+def index_put(index, rel_path, is_dir, stat_result=None, entry_id=None):
+    """
+    Insert or update a single index entry, keeping folder aggregates current.
+    entry_id can be passed when the caller already looked the path up (-1 if
+    it isn't indexed). Returns the entry's id.
+    """
+    store = index['entries']
+    if entry_id is None:
+        entry_id = store.find(rel_path)
+    if entry_id < 0:
+        entry_id = store.add(rel_path, is_dir)
+        index['generation'] += 1
+        
+        parent = os.path.dirname(rel_path)
+        index['outline'].pop(parent, None)
+        parent_stats = index['dir_stats'].get(parent)
+        if is_dir:
+            index['dir_stats'][rel_path] = new_dir_stats()
+            if parent_stats:
+                parent_stats['folders'] += 1
+        else:
+            if parent_stats:
+                parent_stats['files'] += 1
+            index_add_to_totals(index, parent, 1, 0)
+    
+    if stat_result is not None:
+        old_size = store.sizes[entry_id]
+        if store.update(entry_id, stat_result.st_size, stat_result.st_mtime):
+            index['generation'] += 1
+            index['outline'].pop(os.path.dirname(rel_path), None)
+            if not is_dir:
+                index_add_to_totals(index, os.path.dirname(rel_path), 0, stat_result.st_size - old_size)
+            if stat_cache:
+                invalidate_stat_cache(os.path.join(index['root'], rel_path))
+    return entry_id
+
+
+def index_drop(index, rel_path):
+    """Remove an entry, and everything below it if it is a folder."""
+    store = index['entries']
+    entry_id = store.find(rel_path)
+    if entry_id < 0:
+        return
+    if stat_cache:
+        invalidate_stat_cache(os.path.join(index['root'], rel_path))
+    
+    is_dir = store.is_dir(entry_id)
+    if is_dir:
+        for child_id in store.children(rel_path):
+            index_drop(index, store.path(child_id))
+        index['dir_mtimes'].pop(rel_path, None)
+        index['ignore_chains'].pop(rel_path, None)
+        index['dir_stats'].pop(rel_path, None)
+        index['outline'].pop(rel_path, None)
+    
+    size = store.sizes[entry_id]
+    store.remove(entry_id)
+    index['generation'] += 1
+    
+    parent = os.path.dirname(rel_path)
+    index['outline'].pop(parent, None)
+    parent_stats = index['dir_stats'].get(parent)
+    if is_dir:
+        if parent_stats:
+            parent_stats['folders'] -= 1
+    else:
+        if parent_stats:
+            parent_stats['files'] -= 1
+        index_add_to_totals(index, parent, -1, -size)
+
+
+def new_dir_stats():
+    """Aggregates kept per indexed folder: direct children and recursive totals."""
+    return {'files': 0, 'folders': 0, 'total_files': 0, 'total_size': 0}
+
+
+def get_dir_stats(rel_dir, index):
+    """Return a copy of the aggregates for an indexed folder, or None if it isn't indexed."""
+    if rel_dir == '.':
+        rel_dir = ''
+    with workspace_index_lock:
+        stats = index['dir_stats'].get(rel_dir)
+        return dict(stats) if stats is not None else None
+
+
+def index_scan_tree(index, rel_dir):
+    """
+    Scan a folder and all its subfolders into the index.
+    Returns the relative paths of the folders that were scanned.
+    """
+    scanned = []
+    pending = [rel_dir]
+    while pending:
+        current = pending.pop()
+        subdirs = index_rescan_dir(index, current)
+        if subdirs is None:
+            continue
+        scanned.append(current)
+        pending.extend(subdirs)
+    return scanned
+
+
+def index_rescan_dir(index, rel_dir):
+    """
+    Re-list a single folder, syncing its direct children with the disk.
+    Returns the child folders to descend into, or None if the folder is unreadable.
+    """
+    parent_chain = index_ignore_chain(index, os.path.dirname(rel_dir)) if rel_dir else []
+    try:
+        dir_mtime = os.stat(os.path.join(index['root'], rel_dir)).st_mtime
+        dir_entries, file_entries, chain = scan_workspace_dir(index['root'], rel_dir, parent_chain)
+    except OSError:
         return None
     
-    # Search recursively in all subdirectories
-    for root, dirs, files in os.walk(search_path):
-        # Skip hidden directories and common non-code directories
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', '.git', '.vscode']]
+    store = index['entries']
+    index['dir_mtimes'][rel_dir] = dir_mtime
+    # When ignore rules changed, existing subfolders must be re-listed as well
+    rules_changed = index['ignore_chains'].get(rel_dir, chain) != chain
+    index['ignore_chains'][rel_dir] = chain
+    known = {store.name(child_id): child_id for child_id in store.children(rel_dir)}
+    subdirs = []
+    
+    for is_dir, entry in [(True, e) for e in dir_entries] + [(False, e) for e in file_entries]:
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            continue
         
-        if filename in files:
-            return os.path.join(root, filename)
+        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+        existing = known.pop(entry.name, -1)
+        if existing >= 0 and store.is_dir(existing) != is_dir:
+            index_drop(index, rel_path)
+            existing = -1
         
-        # Also check if the full relative path matches
-        full_candidate = os.path.join(root, filename)
-        if os.path.exists(full_candidate):
-            return full_candidate
+        index_put(index, rel_path, is_dir, stat_result, existing)
+        
+        # Like os.walk, list symlinked folders but don't descend into them
+        if is_dir and (existing < 0 or rules_changed) and not entry.is_symlink():
+            subdirs.append(rel_path)
+    
+    for name in known:
+        index_drop(index, os.path.join(rel_dir, name) if rel_dir else name)
+    
+    return subdirs
+
+
+def index_ignore_chain(index, rel_dir):
+    """Return the ignore rule chain in effect inside an indexed folder."""
+    while rel_dir not in index['ignore_chains']:
+        if not rel_dir:
+            return []
+        rel_dir = os.path.dirname(rel_dir)
+    return index['ignore_chains'][rel_dir]
+
+
+def new_workspace_index(root):
+    """Create an empty workspace index."""
+    return {
+        'root': root,
+        'entries': PathStore(),
+        'dir_mtimes': {},
+        # Ignore rule chain in effect inside each folder (see scan_workspace_dir)
+        'ignore_chains': {},
+        # Per-folder file counts and sizes, updated as entries come and go
+        'dir_stats': {'': new_dir_stats()},
+        # Bumped on every change so dependent indexes can tell when to resync
+        'generation': 0,
+        # Sorted children per folder and the last rendered outline text, per level of detail
+        'outline': {},
+        'outline_text': {},
+        'built_at': time.time(),
+        # Generation and time of the last write to the on-disk cache
+        'saved_generation': None,
+        'saved_at': 0.0
+    }
+
+
+def build_workspace_index(root):
+    """Scan the workspace once and index every file and folder."""
+    index = new_workspace_index(root)
+    index_scan_tree(index, '')
+    return index
+
+
+def save_workspace_index(index, force=False):
+    """
+    Write the index to the workspace cache folder: the path store's columns
+    after compaction (parent folder ids, names, flags, sizes, mtimes) plus
+    the interned folder paths with their mtimes.
+    """
+    from array import array
+    with workspace_index_lock:
+        if index['saved_generation'] == index['generation']:
+            return
+        if not force and time.time() - index['saved_at'] < INDEX_SAVE_INTERVAL:
+            return
+        generation = index['generation']
+        store = index['entries']
+        if store.dead:
+            # Readers only ever see the old store or the finished copy
+            store = index['entries'] = store.compact()
+        sections = {
+            'dirs': '\0'.join(store.dirs[1:]).encode('utf-8', errors='surrogateescape'),
+            'dir_entries': store.dir_entries.tobytes(),
+            'dir_mtimes': array('d', [index['dir_mtimes'].get(rel_dir, 0.0) for rel_dir in store.dirs]),
+            'parents': store.parents.tobytes(),
+            'name_lengths': store.name_lengths.tobytes(),
+            'names': bytes(store.names),
+            'flags': store.flags.tobytes(),
+            'sizes': store.sizes.tobytes(),
+            'mtimes': store.mtimes.tobytes()
+        }
+        count = len(store)
+        folder_count = len(store.dirs)
+    
+    try:
+        cache_path = os.path.join(get_workspace_cache_dir(index['root']), 'index.bin')
+        write_cache_file(cache_path, 'workspace-index', WORKSPACE_INDEX_VERSION,
+                         {'root': index['root'], 'count': count, 'folders': folder_count}, sections)
+        index['saved_generation'] = generation
+        index['saved_at'] = time.time()
+    except OSError:
+        pass
+
+
+def load_workspace_index(root):
+    """
+    Load the cached index for a workspace and bring it up to date with the
+    folders that changed since it was saved. Returns None if there is no
+    usable cache. File edits that leave folder mtimes alone are caught by
+    verify_workspace_index afterwards.
+    """
+    from array import array
+    from itertools import accumulate
+    loaded = read_cache_file(os.path.join(get_workspace_cache_dir(root), 'index.bin'),
+                             'workspace-index', WORKSPACE_INDEX_VERSION)
+    if loaded is None:
+        return None
+    header, sections = loaded
+    if header.get('root') != root:
+        return None
+    
+    count = header['count']
+    folder_count = header['folders']
+    dirs = [''] + (sections['dirs'].decode('utf-8', errors='surrogateescape').split('\0') if folder_count > 1 else [])
+    dir_entries = typed_array('i', sections['dir_entries'])
+    dir_mtimes = typed_array('d', sections['dir_mtimes'])
+    parents = typed_array('i', sections['parents'])
+    name_lengths = typed_array('H', sections['name_lengths'])
+    flags = array('B', sections['flags'])
+    sizes = typed_array('q', sections['sizes'])
+    mtimes = typed_array('d', sections['mtimes'])
+    if not (len(dirs) == len(dir_entries) == len(dir_mtimes) == folder_count):
+        return None
+    if not (len(parents) == len(name_lengths) == len(flags) == len(sizes) == len(mtimes) == count):
+        return None
+    if (count and max(parents) >= folder_count) or sum(name_lengths) != len(sections['names']):
+        return None
+    
+    index = new_workspace_index(root)
+    store = index['entries']
+    store.dirs = dirs
+    store.dir_ids = {rel_dir: folder_id for folder_id, rel_dir in enumerate(dirs)}
+    store.dir_entries = dir_entries
+    store.first_child = array('i', [-1]) * folder_count
+    store.parents = parents
+    store.name_starts = array('I', accumulate(name_lengths, initial=0))[:count]
+    store.name_lengths = name_lengths
+    store.names = bytearray(sections['names'])
+    store.flags = flags
+    store.sizes = sizes
+    store.mtimes = mtimes
+    store.live = count
+    store.reindex()
+    
+    dir_stats = index['dir_stats']
+    for folder_id, rel_dir in enumerate(dirs):
+        index['dir_mtimes'][rel_dir] = dir_mtimes[folder_id]
+        if folder_id:
+            dir_stats[rel_dir] = new_dir_stats()
+    for folder_id in range(1, folder_count):
+        dir_stats[dirs[parents[dir_entries[folder_id]]]]['folders'] += 1
+    
+    direct_sizes = {}
+    ignore_dirs = set()
+    ignore_keys = {name.encode('utf-8') for name in IGNORE_FILE_NAMES}
+    for entry_id, folder_id in enumerate(parents):
+        if flags[entry_id] & 1:
+            continue
+        parent = dirs[folder_id]
+        dir_stats[parent]['files'] += 1
+        direct_sizes[parent] = direct_sizes.get(parent, 0) + sizes[entry_id]
+        if bytes(store.name_key(entry_id)) in ignore_keys:
+            ignore_dirs.add(parent)
+    
+    # Recursive totals, deepest folders first so each one is complete before its parent
+    for rel_dir, stats in dir_stats.items():
+        stats['total_files'] = stats['files']
+        stats['total_size'] = direct_sizes.get(rel_dir, 0)
+    for rel_dir in sorted(dir_stats, key=lambda d: -d.count(os.sep) if d else 1):
+        if rel_dir:
+            parent_stats = dir_stats[os.path.dirname(rel_dir)]
+            parent_stats['total_files'] += dir_stats[rel_dir]['total_files']
+            parent_stats['total_size'] += dir_stats[rel_dir]['total_size']
+    
+    # Ignore rule chains for the folders that have their own rules
+    for rel_dir in sorted(ignore_dirs, key=lambda d: d.count(os.sep) if d else -1):
+        names = {store.name(child_id) for child_id in store.children(rel_dir)}
+        rules = load_ignore_rules(os.path.join(root, rel_dir), names)
+        if rules:
+            parent_chain = index_ignore_chain(index, os.path.dirname(rel_dir)) if rel_dir else []
+            index['ignore_chains'][rel_dir] = parent_chain + [(rel_dir.replace(os.sep, '/'), '', rules)]
+    
+    # Folders whose listing changed (or whose ignore files were edited) are re-listed
+    changed = []
+    for rel_dir, saved_mtime in list(index['dir_mtimes'].items()):
+        try:
+            if os.stat(os.path.join(root, rel_dir)).st_mtime != saved_mtime:
+                changed.append(rel_dir)
+        except OSError:
+            if not rel_dir:
+                return None
+    for rel_dir in ignore_dirs:
+        for name in IGNORE_FILE_NAMES:
+            entry = store.get(os.path.join(rel_dir, name) if rel_dir else name)
+            if entry is None:
+                continue
+            try:
+                if os.stat(os.path.join(root, entry.path)).st_mtime != entry.mtime:
+                    changed.append(rel_dir)
+            except OSError:
+                changed.append(rel_dir)
+    
+    for rel_dir in sorted(set(changed), key=lambda d: d.count(os.sep) if d else -1):
+        if rel_dir == '' or rel_dir in store:
+            index_scan_tree(index, rel_dir)
+    
+    index['saved_generation'] = index['generation']
+    return index
+
+
+def start_index_persistence(index, loaded):
+    """Verify a loaded index against the disk, or save a freshly built one, in a background thread."""
+    stop_event = workspace_watcher['stop'] if workspace_watcher else threading.Event()
+    
+    def run():
+        if loaded:
+            verify_workspace_index(index, stop_event)
+        else:
+            save_workspace_index(index, force=True)
+    
+    threading.Thread(target=run, name="index-persistence", daemon=True).start()
+
+
+def verify_workspace_index(index, stop_event):
+    """
+    Re-list every folder of an index loaded from the cache, in batches, so
+    files edited while the backend wasn't running get fresh stat data.
+    """
+    with workspace_index_lock:
+        rel_dirs = sorted(index['dir_mtimes'])
+    for start in range(0, len(rel_dirs), WATCHER_SWEEP_BATCH):
+        if stop_event.is_set() or workspace_index is not index:
+            return
+        with workspace_index_lock:
+            for rel_dir in rel_dirs[start:start + WATCHER_SWEEP_BATCH]:
+                if rel_dir == '' or rel_dir in index['entries']:
+                    index_rescan_dir(index, rel_dir)
+    save_workspace_index(index, force=True)
+
+
+def get_workspace_index(search_path=None):
+    """Return the index for the workspace, building it on first use. None for other roots."""
+    global workspace_index
+    
+    root = search_path or WORKSPACE_PATH
+    if os.path.abspath(root) != os.path.abspath(WORKSPACE_PATH):
+        return None
+    
+    with workspace_index_lock:
+        if workspace_index is None or workspace_index['root'] != WORKSPACE_PATH:
+            park_active_workspace()
+            if not resume_workspace(WORKSPACE_PATH):
+                # A warm start loads the cached index and checks it in the background
+                index = load_workspace_index(WORKSPACE_PATH)
+                loaded = index is not None
+                workspace_index = index if loaded else build_workspace_index(WORKSPACE_PATH)
+                start_workspace_watcher(workspace_index)
+                start_index_persistence(workspace_index, loaded)
+                start_trigram_index_build(workspace_index)
+                start_symbol_index_build(workspace_index)
+                start_semantic_index_build(workspace_index)
+            evict_cold_workspaces()
+        return workspace_index
+
+
+def park_active_workspace():
+    """
+    Move the active workspace's indexes into the registry and stop its
+    watcher, so switching back can reuse them. Caches are saved to disk
+    in the background in case the workspace gets evicted.
+    """
+    global workspace_index, trigram_index, symbol_index, semantic_index
+    index = workspace_index
+    if index is None:
+        return
+    
+    stop_workspace_watcher()
+    root = index['root']
+    state = {
+        'index': index,
+        'trigram': trigram_index if trigram_index is not None and trigram_index['root'] == root else None,
+        'symbol': symbol_index if symbol_index is not None and symbol_index['root'] == root else None,
+        'semantic': semantic_index if semantic_index is not None and semantic_index['root'] == root else None,
+        'parked_at': time.time()
+    }
+    state['memory'] = estimate_workspace_memory(state)
+    workspace_registry.pop(root, None)
+    workspace_registry[root] = state
+    workspace_index = trigram_index = symbol_index = semantic_index = None
+    
+    threading.Thread(target=save_workspace_state, args=(state,), name="workspace-save", daemon=True).start()
+
+
+def resume_workspace(root):
+    """
+    Make a parked workspace active again. Folders changed while it was
+    parked are re-listed right away, file edits by the background check.
+    Returns False if the workspace isn't in the registry.
+    """
+    global workspace_index, trigram_index, symbol_index, semantic_index
+    state = workspace_registry.pop(root, None)
+    if state is None:
+        return False
+    
+    index = state['index']
+    workspace_index = index
+    trigram_index = state['trigram']
+    symbol_index = state['symbol']
+    semantic_index = state['semantic']
+    
+    index_sync_changed_dirs(index)
+    start_workspace_watcher(index)
+    start_index_persistence(index, True)
+    if trigram_index is None:
+        start_trigram_index_build(index)
+    if symbol_index is None:
+        start_symbol_index_build(index)
+    if semantic_index is None:
+        start_semantic_index_build(index)
+    return True
+
+
+def save_workspace_state(state):
+    """Write every index of a parked workspace to its cache folder."""
+    save_workspace_index(state['index'], force=True)
+    with trigram_index_lock:
+        if state['trigram'] is not None:
+            save_trigram_index(state['trigram'], force=True)
+    with symbol_index_lock:
+        if state['symbol'] is not None:
+            save_symbol_index(state['symbol'], force=True)
+    with semantic_index_lock:
+        if state['semantic'] is not None:
+            save_semantic_index(state['semantic'], force=True)
+
+
+def estimate_workspace_memory(state):
+    """Rough number of bytes held by a workspace's indexes."""
+    with workspace_index_lock:
+        total = state['index']['entries'].nbytes()
+    
+    tindex = state['trigram']
+    if tindex is not None:
+        if tindex['base'] is not None:
+            total += sum(memoryview(values).nbytes for values in tindex['base'])
+        total += sum(len(ids) * 4 + POSTING_LIST_BYTES for ids in tindex['postings'].values())
+        total += len(tindex['files']) * TRIGRAM_FILE_BYTES
+    
+    sindex = state['symbol']
+    if sindex is not None:
+        total += sum(len(entries) for entries in sindex['by_name'].values()) * SYMBOL_ENTRY_BYTES
+    
+    semantic = state['semantic']
+    if semantic is not None:
+        for _, _, chunks in semantic['files'].values():
+            total += sum(term_ids.nbytes + counts.nbytes for _, _, term_ids, counts in chunks)
+        total += semantic['df'].nbytes
+        for matrix in (semantic['matrix'], semantic['delta_matrix']):
+            if matrix is not None:
+                total += sum(getattr(value, 'nbytes', 0) for value in matrix.values())
+    
+    return total
+
+
+def evict_cold_workspaces():
+    """Drop the least recently used parked workspaces until all indexes fit the memory budget."""
+    active = workspace_index
+    total = sum(state['memory'] for state in workspace_registry.values())
+    if active is not None:
+        total += estimate_workspace_memory({
+            'index': active,
+            'trigram': trigram_index,
+            'symbol': symbol_index,
+            'semantic': semantic_index
+        })
+    
+    while total > WORKSPACE_MEMORY_BUDGET and workspace_registry:
+        root = next(iter(workspace_registry))
+        total -= workspace_registry.pop(root)['memory']
+
+
+def index_candidates(index, filename):
+    """
+    Return the relative paths of every indexed file or folder whose name
+    (or trailing relative path) matches filename. The watcher keeps the index
+    current, so paths are not checked on disk; a file deleted in the meantime
+    fails when the caller opens it.
+    """
+    rel_path = os.path.normpath(filename)
+    if rel_path in ('.', os.sep) or rel_path.startswith('..'):
+        return []
+    
+    with workspace_index_lock:
+        store = index['entries']
+        candidates = [store.path(entry_id) for entry_id in store.named(os.path.basename(rel_path))]
+    
+    suffix = os.sep + rel_path
+    return [p for p in candidates if p == rel_path or p.endswith(suffix)]
+
+
+def index_refresh_path(full_path):
+    """
+    Bring the index entry for a path in line with the disk.
+    Called synchronously after the backend writes a file and by the watcher.
+    Returns the relative paths of any folders that were (re)scanned.
+    """
+    invalidate_stat_cache(full_path)
+    index = workspace_index
+    if index is None:
+        return []
+    
+    rel_path = os.path.relpath(os.path.abspath(full_path), os.path.abspath(index['root']))
+    if rel_path == '.':
+        with workspace_index_lock:
+            index_rescan_dir(index, '')
+        return []
+    if rel_path.startswith('..'):
+        return []
+    
+    try:
+        stat_result = os.stat(full_path)
+    except OSError:
+        stat_result = None
+    
+    with workspace_index_lock:
+        if stat_result is None:
+            index_drop(index, rel_path)
+            return []
+        
+        is_dir = os.path.isdir(full_path)
+        if is_skipped_path(rel_path, is_dir):
+            return []
+        if is_path_ignored(index_ignore_chain(index, os.path.dirname(rel_path)), rel_path, is_dir):
+            index_drop(index, rel_path)
+            return []
+        
+        # An edited ignore file changes what belongs in the index below it
+        if os.path.basename(rel_path) in IGNORE_FILE_NAMES:
+            index_put(index, rel_path, False, stat_result)
+            return index_scan_tree(index, os.path.dirname(rel_path))
+        
+        # Make sure every parent folder is indexed
+        parent = os.path.dirname(rel_path)
+        missing = []
+        while parent and parent not in index['entries']:
+            missing.append(parent)
+            parent = os.path.dirname(parent)
+        for folder in reversed(missing):
+            index_put(index, folder, True)
+        
+        existing = index['entries'].get(rel_path)
+        if existing is not None and existing.is_dir != is_dir:
+            index_drop(index, rel_path)
+            existing = None
+        
+        index_put(index, rel_path, is_dir, stat_result)
+        if is_dir and existing is None:
+            return index_scan_tree(index, rel_path)
+        return []
+
+
+# inotify constants (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+INOTIFY_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                      IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+
+
+def load_inotify():
+    """Load inotify from libc. Returns None when not on Linux or unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def start_workspace_watcher(index):
+    """Start a background thread that keeps the index in sync with the disk."""
+    global workspace_watcher
+    
+    stop_workspace_watcher()
+    stop_event = threading.Event()
+    
+    # Watches are registered before returning so no edit slips in unobserved
+    inotify = open_inotify_watches(index)
+    if inotify is not None:
+        target, args = run_inotify_watcher, (index, stop_event, inotify)
+    else:
+        target, args = run_polling_watcher, (index, stop_event)
+    
+    thread = threading.Thread(target=target, args=args, name="workspace-watcher", daemon=True)
+    workspace_watcher = {'thread': thread, 'stop': stop_event, 'root': index['root'],
+                         'mode': 'inotify' if inotify else 'polling'}
+    thread.start()
+
+
+def stop_workspace_watcher():
+    """Stop the running watcher thread, if any."""
+    global workspace_watcher
+    if workspace_watcher:
+        workspace_watcher['stop'].set()
+        workspace_watcher = None
+
+
+def open_inotify_watches(index):
+    """
+    Create an inotify instance watching every indexed folder.
+    Returns a dict with the fd and watch table, or None if inotify can't be used.
+    """
+    libc = load_inotify()
+    if libc is None:
+        return None
+    
+    fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    
+    inotify = {'fd': fd, 'libc': libc, 'watches': {}}
+    with workspace_index_lock:
+        rel_dirs = [''] + index['entries'].folder_paths()
+    
+    # Running out of watches (fs.inotify.max_user_watches) means polling instead
+    if not add_inotify_watches(index, inotify, rel_dirs):
+        os.close(fd)
+        return None
+    
+    # Pick up anything that changed between the initial scan and the watches
+    index_sync_changed_dirs(index)
+    watched = set(inotify['watches'].values())
+    with workspace_index_lock:
+        rel_dirs = [p for p in index['entries'].folder_paths() if p not in watched]
+    add_inotify_watches(index, inotify, rel_dirs)
+    
+    return inotify
+
+
+def add_inotify_watches(index, inotify, rel_dirs):
+    """Add a watch for each folder. Returns False if the kernel refused one."""
+    for rel_dir in rel_dirs:
+        full_dir = os.path.join(index['root'], rel_dir)
+        wd = inotify['libc'].inotify_add_watch(inotify['fd'], os.fsencode(full_dir), INOTIFY_WATCH_MASK)
+        if wd < 0:
+            return False
+        inotify['watches'][wd] = rel_dir
+    return True
+
+
+def run_inotify_watcher(index, stop_event, inotify):
+    """Watcher loop reading inotify events and refreshing the touched paths."""
+    import select
+    import struct
+    
+    fd = inotify['fd']
+    watches = inotify['watches']
+    header_size = struct.calcsize('iIII')
+    try:
+        while not stop_event.is_set() and workspace_index is index:
+            ready, _, _ = select.select([fd], [], [], 1.0)
+            save_workspace_index(index)
+            if not ready:
+                continue
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                continue
+            
+            changed = {}
+            offset = 0
+            overflow = False
+            while offset + header_size <= len(data):
+                wd, mask, _cookie, name_len = struct.unpack_from('iIII', data, offset)
+                name = os.fsdecode(data[offset + header_size:offset + header_size + name_len].rstrip(b'\0'))
+                offset += header_size + name_len
+                
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                if mask & IN_IGNORED:
+                    watches.pop(wd, None)
+                    continue
+                
+                rel_dir = watches.get(wd)
+                if rel_dir is None:
+                    continue
+                if mask & IN_DELETE_SELF:
+                    changed[rel_dir] = True
+                elif name:
+                    changed[os.path.join(rel_dir, name) if rel_dir else name] = True
+            
+            if overflow:
+                # Events were lost - resync every folder from disk
+                with workspace_index_lock:
+                    rel_dirs = [''] + index['entries'].folder_paths()
+                    for rel_dir in rel_dirs:
+                        if rel_dir == '' or rel_dir in index['entries']:
+                            index_rescan_dir(index, rel_dir)
+                continue
+            
+            for rel_path in changed:
+                new_dirs = index_refresh_path(os.path.join(index['root'], rel_path))
+                add_inotify_watches(index, inotify, new_dirs)
+    finally:
+        os.close(fd)
+
+
+def index_sync_changed_dirs(index):
+    """
+    Re-list every indexed folder whose mtime changed since it was last scanned.
+    Returns the (folder, mtime) pairs that were checked.
+    """
+    with workspace_index_lock:
+        dir_mtimes = list(index['dir_mtimes'].items())
+    
+    for rel_dir, known_mtime in dir_mtimes:
+        try:
+            current_mtime = os.stat(os.path.join(index['root'], rel_dir)).st_mtime
+        except OSError:
+            continue
+        if current_mtime != known_mtime:
+            with workspace_index_lock:
+                index_scan_tree(index, rel_dir)
+    
+    return dir_mtimes
+
+
+def run_polling_watcher(index, stop_event):
+    """Watcher loop that polls folder mtimes and re-lists folders that changed."""
+    sweep_position = 0
+    while not stop_event.wait(WATCHER_POLL_INTERVAL):
+        if workspace_index is not index:
+            return
+        
+        save_workspace_index(index)
+        dir_mtimes = index_sync_changed_dirs(index)
+        
+        # File edits don't change folder mtimes, so re-stat a rolling batch of folders
+        if dir_mtimes:
+            batch = dir_mtimes[sweep_position:sweep_position + WATCHER_SWEEP_BATCH]
+            sweep_position = (sweep_position + WATCHER_SWEEP_BATCH) % len(dir_mtimes)
+            with workspace_index_lock:
+                for rel_dir, _ in batch:
+                    if rel_dir == '' or rel_dir in index['entries']:
+                        index_rescan_dir(index, rel_dir)
+
+
+# Files the backend touched this session: absolute path -> access tick, oldest first
+RECENT_PATHS_LIMIT = 64
+# How many of the most recent files count towards proximity ranking
+RECENT_PROXIMITY_FILES = 8
+recent_paths = {}
+recent_paths_tick = 0
+
+
+def note_path_access(full_path):
+    """Record that a file was read, written, run or debugged."""
+    global recent_paths_tick
+    recent_paths_tick += 1
+    key = os.path.abspath(full_path)
+    recent_paths.pop(key, None)
+    recent_paths[key] = recent_paths_tick
+    while len(recent_paths) > RECENT_PATHS_LIMIT:
+        del recent_paths[next(iter(recent_paths))]
+
+
+def shared_prefix_length(a, b):
+    """Number of leading path components a and b have in common."""
+    count = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        count += 1
+    return count
+
+
+def rank_path_candidates(filename, full_paths, search_path):
+    """
+    Order candidate paths for filename, best first: an exact relative path
+    match, then files touched most recently this session, then files
+    closest to the recently touched ones, then shallower paths.
+    A bare file name never counts as an exact match, it would always favour the root.
+    """
+    rel_query = os.path.normpath(filename)
+    if os.sep not in rel_query:
+        rel_query = None
+    root = os.path.abspath(search_path)
+    recent_dirs = [os.path.dirname(p).split(os.sep) for p in list(recent_paths)[-RECENT_PROXIMITY_FILES:]]
+    
+    def rank(full_path):
+        abs_path = os.path.abspath(full_path)
+        rel_path = os.path.relpath(abs_path, root)
+        parts = os.path.dirname(abs_path).split(os.sep)
+        proximity = max((shared_prefix_length(parts, d) for d in recent_dirs), default=0)
+        return (rel_path != rel_query, -recent_paths.get(abs_path, 0), -proximity,
+                rel_path.count(os.sep), rel_path)
+    
+    return sorted(full_paths, key=rank)
+
+
+def resolve_file_candidates(filename, search_path=None):
+    """
+    Find every file or folder that filename could refer to and return their
+    full paths ranked best first (see rank_path_candidates).
+    """
+    if search_path is None:
+        search_path = WORKSPACE_PATH
+    
+    if not filename:
+        return []
+    
+    if os.path.isabs(filename):
+        return [filename] if os.path.exists(filename) else []
+    
+    # Use the workspace index when searching the workspace itself
+    index = get_workspace_index(search_path)
+    if index is not None:
+        candidates = [os.path.join(index['root'], p) for p in index_candidates(index, filename)]
+        # Paths inside skipped or ignored folders are not indexed, so try the direct path
+        direct_path = os.path.join(search_path, filename)
+        if not candidates and os.path.exists(direct_path):
+            candidates.append(direct_path)
+    else:
+        # Search recursively in all subdirectories
+        candidates = []
+        for rel_dir, dir_entries, file_entries in walk_workspace(search_path):
+            root = os.path.join(search_path, rel_dir)
+            full_candidate = os.path.join(root, filename)
+            if any(entry.name == filename for entry in file_entries) or os.path.exists(full_candidate):
+                candidates.append(full_candidate)
+    
+    # Fall back to a path relative to the current directory
+    if not candidates and os.path.exists(filename):
+        candidates.append(filename)
+    
+    return rank_path_candidates(filename, candidates, search_path)
+
+
+def find_file_recursive(filename, search_path=None):
+    """Search for a file recursively in all subdirectories and return the best match."""
+    candidates = resolve_file_candidates(filename, search_path)
+    return candidates[0] if candidates else None
+
+
+def describe_other_candidates(path, full_path, candidates):
+    """Note for results when path matched several files, so the choice is visible."""
+    if len(candidates) < 2 or candidates[0] != full_path:
+        return None
+    others = "\n".join(f"  - {p}" for p in candidates[1:6])
+    more = f"\n  ... and {len(candidates) - 6} more" if len(candidates) > 6 else ""
+    return f"[INFO] '{path}' matched {len(candidates)} files; using '{candidates[0]}'. Other matches:\n{others}{more}"
+
+
+# Fuzzy filename matching (fzf-style): subsequence match scored with bonuses
+FUZZY_BOUNDARY_CHARS = '/\\_-. '
+FUZZY_SCORE_MATCH = 16
+FUZZY_BONUS_BOUNDARY = 10
+FUZZY_BONUS_CAMEL = 8
+FUZZY_BONUS_CONSECUTIVE = 6
+FUZZY_BONUS_BASENAME = 20
+FUZZY_BONUS_BASENAME_PREFIX = 20
+FUZZY_BONUS_BASENAME_EXACT = 40
+FUZZY_MAX_GAP_PENALTY = 10
+# Upper bound on candidates fully scored per query, keeps broad queries fast;
+# beyond it matches are pre-ranked by where the query matched (see fuzzy_find_files)
+FUZZY_CANDIDATE_LIMIT = 2000
+
+
+def get_fuzzy_path_table(index):
+    """
+    Return the sorted workspace file paths joined by newlines, plus lowercased
+    copies of the paths and basenames, so candidates can be found with a
+    single regex scan. Each blob comes with its line start offsets; single
+    paths are sliced out with blob_line. Rebuilt only when the index has changed.
+    """
+    table = index.get('fuzzy_table')
+    if table is not None and table['generation'] == index['generation']:
+        return table
+    
+    with workspace_index_lock:
+        generation = index['generation']
+        paths = sorted(index['entries'].file_paths())
+    
+    lower_paths = [p.lower() for p in paths]
+    lower_names = [p[p.rfind(os.sep) + 1:] for p in lower_paths]
+    table = {
+        'generation': generation,
+        'original_blob': '\n'.join(paths),
+        'original_offsets': line_offsets(paths),
+        'path_blob': '\n'.join(lower_paths),
+        'path_offsets': line_offsets(lower_paths),
+        'name_blob': '\n'.join(lower_names),
+        'name_offsets': line_offsets(lower_names)
+    }
+    index['fuzzy_table'] = table
+    return table
+
+
+def line_offsets(lines):
+    """Start offset of each line once the lines are joined with newlines."""
+    from array import array
+    from itertools import accumulate
+    return array('Q', accumulate((len(line) + 1 for line in lines), initial=0))[:len(lines)]
+
+
+def blob_line(blob, offsets, line):
+    """Line number line of a newline-joined blob."""
+    end = offsets[line + 1] - 1 if line + 1 < len(offsets) else len(blob)
+    return blob[offsets[line]:end]
+
+
+def blob_matching_lines(regex, blob, offsets):
+    """Return the set of line numbers of blob matching regex."""
+    import bisect
+    return {bisect.bisect_right(offsets, match.start()) - 1 for match in regex.finditer(blob)}
+
+
+def fuzzy_align(query, text, start=0):
+    """
+    Find a tight subsequence match of query in text[start:].
+    Returns the matched positions, or None if query is not a subsequence.
+    """
+    # Forward pass finds where the earliest complete match ends...
+    position = start
+    for char in query:
+        position = text.find(char, position)
+        if position < 0:
+            return None
+        position += 1
+    
+    # ...and a backward pass from there gives the shortest window ending at that point
+    positions = []
+    position -= 1
+    for char in reversed(query):
+        position = text.rfind(char, start, position + 1)
+        positions.append(position)
+        position -= 1
+    positions.reverse()
+    return positions
+
+
+def fuzzy_score(query, lower_path, path):
+    """Score how well query matches a path. Returns None when it doesn't match."""
+    base_start = lower_path.rfind(os.sep) + 1
+    positions = fuzzy_align(query, lower_path, base_start)
+    in_basename = positions is not None
+    if not in_basename:
+        positions = fuzzy_align(query, lower_path)
+        if positions is None:
+            return None
+    
+    same_case_length = len(path) == len(lower_path)
+    score = 0
+    previous = -2
+    for i, position in enumerate(positions):
+        score += FUZZY_SCORE_MATCH
+        if position == 0 or lower_path[position - 1] in FUZZY_BOUNDARY_CHARS:
+            score += FUZZY_BONUS_BOUNDARY
+        elif same_case_length and path[position].isupper() and path[position - 1].islower():
+            score += FUZZY_BONUS_CAMEL
+        
+        if position == previous + 1:
+            score += FUZZY_BONUS_CONSECUTIVE
+        elif i > 0:
+            score -= min(position - previous - 1, FUZZY_MAX_GAP_PENALTY)
+        previous = position
+    
+    if in_basename:
+        score += FUZZY_BONUS_BASENAME
+        basename = lower_path[base_start:]
+        if basename == query or os.path.splitext(basename)[0] == query:
+            score += FUZZY_BONUS_BASENAME_EXACT
+        elif basename.startswith(query):
+            score += FUZZY_BONUS_BASENAME_PREFIX
+    
+    return score
+
+
+def fuzzy_find_files(index, keyword, file_type=None, max_results=10):
+    """
+    Rank workspace files against keyword and return the top (rel_path, score) pairs.
+    Ties go to files nearer the ones touched most recently, then to shallower,
+    then shorter, paths.
+    """
+    import heapq
+    
+    query = ''.join(keyword.lower().split())
+    if not query:
+        return []
+    
+    table = get_fuzzy_path_table(index)
+    
+    def path(line):
+        return blob_line(table['original_blob'], table['original_offsets'], line)
+    
+    def lower_path(line):
+        return blob_line(table['path_blob'], table['path_offsets'], line)
+    
+    # Subsequence regex: starts with a literal so re can use its fast prefix search,
+    # possessive [^c]*+ jumps to the next char without backtracking, and the tail
+    # eats the rest of the line so each path matches at most once
+    subsequence = re.compile(re.escape(query[0]) + ''.join(
+        f"[^{re.escape(c)}\n]*+{re.escape(c)}" for c in query[1:]) + "[^\n]*")
+    
+    candidates = blob_matching_lines(subsequence, table['path_blob'], table['path_offsets'])
+    if file_type:
+        suffix = file_type.lower()
+        candidates = {line for line in candidates if lower_path(line).endswith(suffix)}
+    
+    limit = max(FUZZY_CANDIDATE_LIMIT, max_results)
+    if len(candidates) > limit:
+        # Too many to score: keep those whose basename is the query (give or take the
+        # extension), starts with it, holds it, or holds it as a subsequence, in that
+        # order, shallower paths first within each
+        def tier(line):
+            name = blob_line(table['name_blob'], table['name_offsets'], line)
+            position = name.find(query)
+            exact = position == 0 and name[len(query):len(query) + 1] in ('', '.')
+            return (exact, position == 0, position >= 0, subsequence.search(name) is not None,
+                    -lower_path(line).count(os.sep))
+        
+        candidates = heapq.nlargest(limit, candidates, key=tier)
+    
+    root = os.path.abspath(index['root'])
+    recent_dirs = [os.path.dirname(os.path.relpath(p, root)).split(os.sep)
+                   for p in list(recent_paths)[-RECENT_PROXIMITY_FILES:]]
+    
+    scored = []
+    for line in candidates:
+        rel_path = path(line)
+        score = fuzzy_score(query, lower_path(line), rel_path)
+        if score is not None:
+            parts = os.path.dirname(rel_path).split(os.sep)
+            proximity = max((shared_prefix_length(parts, d) for d in recent_dirs), default=0)
+            scored.append((score, proximity, -rel_path.count(os.sep), -len(rel_path), -line))
+    
+    top = heapq.nlargest(max_results, scored)
+    return [(path(-line), score) for score, _, _, _, line in top]
+
+
+# Recently stat'ed indexed paths: absolute path -> (mode, size, mtime, ctime, atime), oldest first.
+# Entries are dropped when the index sees the path change, so the watcher keeps them fresh.
+STAT_CACHE_LIMIT = 20000
+stat_cache = {}
+stat_cache_lock = threading.Lock()
+
+
+def cached_stat(full_path):
+    """Stat a path at most once until it changes. Returns None if it doesn't exist."""
+    key = os.path.abspath(full_path)
+    record = stat_cache.get(key)
+    if record is not None:
+        return record
+    
+    try:
+        stat_result = os.stat(key)
+    except OSError:
+        return None
+    record = (stat_result.st_mode, stat_result.st_size, stat_result.st_mtime,
+              stat_result.st_ctime, stat_result.st_atime)
+    # Only indexed paths get change notifications, so only those can be cached safely
+    index = workspace_index
+    if index is None:
+        return record
+    with workspace_index_lock:
+        indexed = os.path.relpath(key, index['root']) in index['entries']
+    if not indexed:
+        return record
+    with stat_cache_lock:
+        stat_cache[key] = record
+        while len(stat_cache) > STAT_CACHE_LIMIT:
+            del stat_cache[next(iter(stat_cache))]
+    return record
+
+
+def invalidate_stat_cache(full_path):
+    """
+    Forget the cached stat of a path, and of everything below it if it was a
+    folder. Its parent folder goes too: change events name the child, but
+    adding, removing or renaming it changes the parent's mtime.
+    """
+    from stat import S_ISDIR
+    key = os.path.abspath(full_path)
+    with stat_cache_lock:
+        stat_cache.pop(os.path.dirname(key), None)
+        record = stat_cache.pop(key, None)
+        if record is not None and S_ISDIR(record[0]):
+            prefix = key + os.sep
+            for path in [p for p in stat_cache if p.startswith(prefix)]:
+                del stat_cache[path]
+
+
+def format_timestamp(timestamp):
+    """Render a Unix timestamp for display."""
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def find_files_by_keyword(keyword, file_type=None, max_results=10, search_path=None, on_match=None):
+    """
+    Search for files by keyword in their names.
+    Plain keywords are fuzzy-matched against workspace paths and ranked by score;
+    keywords with wildcards are matched with fnmatch.
+    on_match, if given, is called with each match as soon as it is found.
+    """
+    if search_path is None:
+        search_path = WORKSPACE_PATH
+    
+    matches = []
+    pattern = f"*{keyword}*"
+    if file_type:
+        pattern = f"*{keyword}*{file_type}"
+    
+    try:
+        index = get_workspace_index(search_path)
+        if index is not None and not any(char in keyword for char in '*?['):
+            for rel_path, score in fuzzy_find_files(index, keyword, file_type, max_results):
+                with workspace_index_lock:
+                    entry = index['entries'].get(rel_path)
+                if entry is None:
+                    continue
+                matches.append({
+                    'name': entry.name,
+                    'path': rel_path,
+                    'full_path': os.path.join(search_path, rel_path),
+                    'size': entry.size,
+                    'modified': entry.mtime,
+                    'score': score
+                })
+                if on_match:
+                    on_match(matches[-1])
+            return matches
+        
+        for rel_dir, dir_entries, file_entries in walk_workspace(search_path):
+            for entry in file_entries:
+                filename = entry.name
+                # Check if filename matches pattern
+                if fnmatch.fnmatch(filename.lower(), pattern.lower()):
+                    record = cached_stat(entry.path)
+                    if record is None:
+                        continue
+                    matches.append({
+                        'name': filename,
+                        'path': os.path.join(rel_dir, filename) if rel_dir else filename,
+                        'full_path': entry.path,
+                        'size': record[1],
+                        'modified': record[2]
+                    })
+                    if on_match:
+                        on_match(matches[-1])
+                    
+                    if len(matches) >= max_results:
+                        return matches
+    except Exception as e:
+        return [{'error': f"Search error: {str(e)}"}]
+    
+    return matches
+
+
+def find_folders_by_keyword(keyword, max_results=10, search_path=None, on_match=None):
+    """
+    Search for folders by keyword in their names.
+    Supports partial matching.
+    on_match, if given, is called with each match as soon as it is found.
+    """
+    if search_path is None:
+        search_path = WORKSPACE_PATH
+    
+    matches = []
+    
+    try:
+        # Answer from the workspace index: folder names and file counts are precomputed
+        index = get_workspace_index(search_path)
+        if index is not None:
+            with workspace_index_lock:
+                folders = sorted(
+                    p for p in index['entries'].folder_paths()
+                    if keyword.lower() in os.path.basename(p).lower()
+                )
+            
+            for rel_path in folders:
+                stats = get_dir_stats(rel_path, index)
+                if stats is None:
+                    continue
+                matches.append({
+                    'name': os.path.basename(rel_path),
+                    'path': rel_path,
+                    'full_path': os.path.join(search_path, rel_path),
+                    'file_count': stats['total_files']
+                })
+                if on_match:
+                    on_match(matches[-1])
+                
+                if len(matches) >= max_results:
+                    return matches
+            return matches
+        
+        for rel_dir, dir_entries, file_entries in walk_workspace(search_path):
+            for entry in dir_entries:
+                dirname = entry.name
+                # Check if folder name contains keyword
+                if keyword.lower() in dirname.lower():
+                    full_path = entry.path
+                    rel_path = os.path.join(rel_dir, dirname) if rel_dir else dirname
+                    
+                    # Count files in directory
+                    try:
+                        file_count = sum(len(files) for _, _, files in walk_workspace(full_path))
+                    except:
+                        file_count = 0
+                    
+                    matches.append({
+                        'name': dirname,
+                        'path': rel_path,
+                        'full_path': full_path,
+                        'file_count': file_count
+                    })
+                    if on_match:
+                        on_match(matches[-1])
+                    
+                    if len(matches) >= max_results:
+                        return matches
+    except Exception as e:
+        return [{'error': f"Search error: {str(e)}"}]
+    
+    return matches
+
+
+# Extensions that are always binary, so those files are never opened for sniffing
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.pdf', '.zip', '.gz', '.tgz', '.bz2', '.xz',
+    '.7z', '.rar', '.jar', '.war', '.class', '.pyc', '.pyo', '.so', '.dll', '.dylib', '.exe', '.o', '.a',
+    '.lib', '.bin', '.dat', '.db', '.sqlite', '.woff', '.woff2', '.ttf', '.otf', '.eot', '.mp3', '.mp4',
+    '.wav', '.ogg', '.mov', '.avi', '.webm', '.psd', '.xlsx', '.docx', '.pptx', '.wasm', '.pickle', '.pkl'
+}
+# Sniffed kinds as stored in the on-disk index (0 means not sniffed yet)
+FILE_KINDS = {1: 'text', 2: 'binary', 3: 'minified'}
+FILE_KIND_CODES = {kind: code for code, kind in FILE_KINDS.items()}
+# Bytes read from the start of a file to classify it
+SNIFF_BYTES = 8192
+# Legacy-encoded text may fail UTF-8, but should be mostly printable
+SNIFF_MAX_CONTROL_RATIO = 0.1
+# Only files at least this big can be judged minified
+MINIFIED_MIN_SIZE = 16 * 1024
+# Minified: the sample averages very long lines, and has at least one huge one
+MINIFIED_AVG_LINE_LENGTH = 300
+MINIFIED_MAX_LINE_LENGTH = 1000
+
+
+def sniff_file_kind(full_path, size=None):
+    """
+    Classify a file as 'text', 'binary' or 'minified' from its first few KB:
+    NUL bytes and UTF-8 validity tell binary from text, line lengths spot
+    minified bundles. Unreadable files count as binary.
+    """
+    if os.path.splitext(full_path)[1].lower() in BINARY_EXTENSIONS:
+        return 'binary'
+    try:
+        with open(full_path, 'rb') as f:
+            sample = f.read(SNIFF_BYTES)
+            if size is None:
+                size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return 'binary'
+    
+    if b'\0' in sample:
+        return 'binary'
+    
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the sample size is fine
+        truncated = e.reason == 'unexpected end of data' and len(sample) == SNIFF_BYTES
+        if not truncated:
+            control = sum(1 for byte in sample if byte < 32 and byte not in b'\t\n\r\f\b')
+            if control > len(sample) * SNIFF_MAX_CONTROL_RATIO:
+                return 'binary'
+    
+    if size >= MINIFIED_MIN_SIZE:
+        lines = sample.split(b'\n')
+        if len(lines) > 1 and len(sample) == SNIFF_BYTES:
+            lines.pop()  # Cut off by the sample size
+        longest = max(len(line) for line in lines)
+        if longest >= MINIFIED_MAX_LINE_LENGTH and len(sample) / len(lines) >= MINIFIED_AVG_LINE_LENGTH:
+            return 'minified'
+    
+    return 'text'
+
+
+def get_file_kind(full_path, entry=None):
+    """
+    Return the sniffed kind of a file. With an index entry the verdict is
+    cached in the index until the file's mtime or size changes.
+    """
+    if entry is None:
+        return sniff_file_kind(full_path)
+    if entry.kind is not None:
+        return entry.kind
+    kind = sniff_file_kind(full_path, entry.size)
+    with workspace_index_lock:
+        entry.store.set_kind(entry, kind)
+    return kind
+
+
+def is_searchable_file(full_path, search_path):
+    """Check whether the content search should look inside a file."""
+    entry = None
+    index = workspace_index
+    if index is not None and os.path.abspath(search_path) == os.path.abspath(index['root']):
+        with workspace_index_lock:
+            entry = index['entries'].get(os.path.relpath(full_path, index['root']))
+    return get_file_kind(full_path, entry) == 'text'
+
+
+# Per-workspace caches live here, one subfolder per workspace root
+CACHE_DIR = os.getenv("VIBECODING_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "vibecoding")
+
+TRIGRAM_INDEX_VERSION = 2
+# Larger files are not indexed; they are still searched by a plain scan
+TRIGRAM_MAX_FILE_SIZE = 1024 * 1024
+# Minimum seconds between writes of the trigram index to disk
+TRIGRAM_SAVE_INTERVAL = 30.0
+
+trigram_index = None
+trigram_index_lock = threading.RLock()
+
+
+def get_workspace_cache_dir(root):
+    """Return (and create) the cache folder for a workspace root."""
+    import hashlib
+    key = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    cache_dir = os.path.join(CACHE_DIR, key)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+# Versioned binary cache files: magic, header length, JSON header, then 8-byte aligned sections
+CACHE_FILE_MAGIC = b'VIBECACHE\n'
+
+
+def write_cache_file(cache_path, kind, version, header, sections):
+    """
+    Write named binary sections (bytes, bytearray or array) to a cache file,
+    atomically. The header records the kind, version and platform details
+    read_cache_file checks before trusting the data.
+    """
+    import struct
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        size = memoryview(data).nbytes
+        layout[name] = [offset, size]
+        offset += (size + 7) & ~7
+    
+    header = dict(header, kind=kind, version=version, byteorder=sys.byteorder, sep=os.sep, sections=layout)
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix_size = len(CACHE_FILE_MAGIC) + 4 + len(header_bytes)
+    
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(CACHE_FILE_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+        f.write(b'\0' * (-prefix_size & 7))
+        for name, data in sections.items():
+            size = memoryview(data).nbytes
+            f.write(data)
+            f.write(b'\0' * (-size & 7))
+    os.replace(tmp_path, cache_path)
+
+
+def read_cache_file(cache_path, kind, version):
+    """
+    Map a cache file and return (header, {section name: bytes}), or None if
+    it is missing, corrupt, or from another version or platform. Sections
+    are copied out and the mapping closed, so the file can be replaced later.
+    """
+    import mmap
+    import struct
+    try:
+        with open(cache_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            magic_size = len(CACHE_FILE_MAGIC)
+            if buffer[:magic_size] != CACHE_FILE_MAGIC:
+                return None
+            header_size = struct.unpack('<I', buffer[magic_size:magic_size + 4])[0]
+            header_end = magic_size + 4 + header_size
+            header = json.loads(buffer[magic_size + 4:header_end].decode('utf-8'))
+            if (header.get('kind') != kind or header.get('version') != version
+                    or header.get('byteorder') != sys.byteorder or header.get('sep') != os.sep):
+                return None
+            
+            data_start = header_end + (-header_end & 7)
+            sections = {}
+            for name, (offset, size) in header['sections'].items():
+                start = data_start + offset
+                if start + size > len(buffer):
+                    return None
+                sections[name] = buffer[start:start + size]
+            return header, sections
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+
+
+def typed_array(typecode, data):
+    """Build an array of the given typecode from raw section bytes."""
+    from array import array
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+def text_trigrams(data):
+    """Return the set of lowercased byte trigrams in a piece of text (str or bytes)."""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='ignore')
+    data = data.lower().encode('utf-8')
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def trigram_index_add(tindex, rel_path, mtime, size):
+    """Read a file and add its trigrams to the posting lists."""
+    from array import array
+    try:
+        with open(os.path.join(tindex['root'], rel_path), 'rb') as f:
+            data = f.read(TRIGRAM_MAX_FILE_SIZE + 1)
+    except OSError:
+        return
+    if len(data) > TRIGRAM_MAX_FILE_SIZE:
+        return
+    
+    file_id = tindex['next_id']
+    tindex['next_id'] += 1
+    postings = tindex['postings']
+    for trigram in text_trigrams(data):
+        ids = postings.get(trigram)
+        if ids is None:
+            ids = postings[trigram] = array('I')
+        ids.append(file_id)
+    tindex['files'][rel_path] = (mtime, size, file_id)
+    tindex['paths'][file_id] = rel_path
+
+
+def trigram_index_remove(tindex, rel_path):
+    """Forget a file. Its ids stay in the posting lists until the next compaction."""
+    record = tindex['files'].pop(rel_path, None)
+    if record is not None:
+        tindex['paths'].pop(record[2], None)
+        tindex['dead'] += 1
+
+
+def trigram_posting(tindex, trigram):
+    """
+    Return the file ids listed for a trigram, or None. Postings loaded from
+    disk live in flat sorted arrays ('base'); later additions in 'postings'.
+    """
+    import bisect
+    ids = tindex['postings'].get(trigram)
+    if tindex['base'] is None:
+        return ids
+    
+    keys, offsets, base_ids = tindex['base']
+    key = int.from_bytes(trigram, 'big')
+    i = bisect.bisect_left(keys, key)
+    if i == len(keys) or keys[i] != key:
+        return ids
+    found = base_ids[offsets[i]:offsets[i + 1]]
+    return found + ids if ids is not None else found
+
+
+def flatten_trigram_postings(tindex):
+    """Merge base and added postings into flat (keys, offsets, ids) arrays sorted by trigram."""
+    from array import array
+    merged = {}
+    if tindex['base'] is not None:
+        keys, offsets, base_ids = tindex['base']
+        for i, key in enumerate(keys):
+            merged[key] = base_ids[offsets[i]:offsets[i + 1]]
+    for trigram, ids in tindex['postings'].items():
+        key = int.from_bytes(trigram, 'big')
+        merged[key] = merged[key] + ids if key in merged else ids
+    
+    keys = array('I', sorted(merged))
+    offsets = array('Q', [0])
+    flat_ids = array('I')
+    for key in keys:
+        flat_ids.extend(merged[key])
+        offsets.append(len(flat_ids))
+    return keys, offsets, flat_ids
+
+
+def compact_trigram_index(tindex):
+    """Drop ids of removed or re-indexed files from every posting list."""
+    from array import array
+    live = tindex['paths']
+    if tindex['base'] is not None:
+        for trigram, ids in list(tindex['postings'].items()):
+            tindex['postings'][trigram] = trigram_posting(tindex, trigram)
+        keys, offsets, base_ids = tindex['base']
+        for i, key in enumerate(keys):
+            trigram = key.to_bytes(3, 'big')
+            if trigram not in tindex['postings']:
+                tindex['postings'][trigram] = base_ids[offsets[i]:offsets[i + 1]]
+        tindex['base'] = None
+    for trigram in list(tindex['postings']):
+        ids = array('I', [i for i in tindex['postings'][trigram] if i in live])
+        if ids:
+            tindex['postings'][trigram] = ids
+        else:
+            del tindex['postings'][trigram]
+    tindex['dead'] = 0
+
+
+def sync_trigram_index(tindex, index):
+    """
+    Re-index files whose mtime or size changed since they were indexed,
+    add new files and drop deleted ones. Returns the number of changes.
+    """
+    with workspace_index_lock:
+        if tindex['generation'] == index['generation']:
+            return 0
+        generation = index['generation']
+        files = index['entries'].files()
+    
+    # Sniffing may open files, so it happens outside the index lock
+    current = {}
+    oversized = []
+    for entry in files:
+        if get_file_kind(os.path.join(index['root'], entry.path), entry) != 'text':
+            continue
+        if entry.size > TRIGRAM_MAX_FILE_SIZE:
+            oversized.append(entry.path)
+        else:
+            current[entry.path] = (entry.mtime, entry.size)
+    
+    tindex['oversized'] = oversized
+    
+    changes = 0
+    for rel_path in [p for p in tindex['files'] if p not in current]:
+        trigram_index_remove(tindex, rel_path)
+        changes += 1
+    
+    for rel_path, (mtime, size) in current.items():
+        record = tindex['files'].get(rel_path)
+        if record is not None and record[0] == mtime and record[1] == size:
+            continue
+        if record is not None:
+            trigram_index_remove(tindex, rel_path)
+        trigram_index_add(tindex, rel_path, mtime, size)
+        changes += 1
+    
+    if tindex['dead'] > 1000 and tindex['dead'] > len(tindex['files']):
+        compact_trigram_index(tindex)
+    
+    tindex['generation'] = generation
+    if changes:
+        tindex['dirty'] = True
+    return changes
+
+
+def new_trigram_index(root):
+    """Create an empty trigram index for a workspace."""
+    return {
+        'version': TRIGRAM_INDEX_VERSION,
+        'root': root,
+        'files': {},
+        'paths': {},
+        'postings': {},
+        'base': None,
+        'next_id': 0,
+        'dead': 0,
+        'oversized': [],
+        'generation': -1,
+        'dirty': False,
+        'saved_at': 0.0
+    }
+
+
+def load_trigram_index(root):
+    """Load the trigram index for a workspace from disk, or None if missing or stale."""
+    loaded = read_cache_file(os.path.join(get_workspace_cache_dir(root), 'trigrams.bin'),
+                             'trigram-index', TRIGRAM_INDEX_VERSION)
+    if loaded is None:
+        return None
+    header, sections = loaded
+    if header.get('root') != root:
+        return None
+    
+    paths = sections['paths'].decode('utf-8', errors='surrogateescape').split('\0') if header['count'] else []
+    mtimes = typed_array('d', sections['mtimes'])
+    sizes = typed_array('q', sections['sizes'])
+    file_ids = typed_array('I', sections['file_ids'])
+    
+    tindex = new_trigram_index(root)
+    tindex.update(next_id=header['next_id'], dead=header['dead'])
+    tindex['files'] = {rel_path: (mtimes[i], sizes[i], file_ids[i]) for i, rel_path in enumerate(paths)}
+    tindex['paths'] = dict(zip(file_ids, paths))
+    tindex['base'] = (typed_array('I', sections['keys']), typed_array('Q', sections['offsets']),
+                      typed_array('I', sections['ids']))
+    return tindex
+
+
+def save_trigram_index(tindex, force=False):
+    """
+    Write the trigram index to the workspace cache folder: the files table
+    as columns and all postings flattened into sorted arrays, which also
+    become the in-memory base.
+    """
+    from array import array
+    if not tindex['dirty'] or (not force and time.time() - tindex['saved_at'] < TRIGRAM_SAVE_INTERVAL):
+        return
+    
+    tindex['base'] = flatten_trigram_postings(tindex)
+    tindex['postings'] = {}
+    keys, offsets, flat_ids = tindex['base']
+    
+    paths = list(tindex['files'])
+    records = [tindex['files'][p] for p in paths]
+    try:
+        cache_path = os.path.join(get_workspace_cache_dir(tindex['root']), 'trigrams.bin')
+        write_cache_file(cache_path, 'trigram-index', TRIGRAM_INDEX_VERSION, {
+            'root': tindex['root'],
+            'count': len(paths),
+            'next_id': tindex['next_id'],
+            'dead': tindex['dead']
+        }, {
+            'paths': '\0'.join(paths).encode('utf-8', errors='surrogateescape'),
+            'mtimes': array('d', [r[0] for r in records]),
+            'sizes': array('q', [r[1] for r in records]),
+            'file_ids': array('I', [r[2] for r in records]),
+            'keys': keys,
+            'offsets': offsets,
+            'ids': flat_ids
+        })
+        tindex['dirty'] = False
+        tindex['saved_at'] = time.time()
+    except OSError:
+        pass
+
+
+def start_trigram_index_build(index):
+    """Load or build the trigram index for a workspace in a background thread."""
+    def build():
+        global trigram_index
+        tindex = load_trigram_index(index['root']) or new_trigram_index(index['root'])
+        with trigram_index_lock:
+            sync_trigram_index(tindex, index)
+            save_trigram_index(tindex, force=True)
+            if workspace_index is index:
+                trigram_index = tindex
+    
+    threading.Thread(target=build, name="trigram-index", daemon=True).start()
+
+
+def trigram_candidates(keyword, search_path):
+    """
+    Return the sorted relative paths of files that may contain keyword,
+    or None when the trigram index can't narrow the search.
+    """
+    tindex = trigram_index
+    index = workspace_index
+    if tindex is None or index is None or tindex['root'] != search_path:
+        return None
+    
+    query = keyword.lower().encode('utf-8')
+    if len(query) < 3:
+        return None
+    
+    with trigram_index_lock:
+        sync_trigram_index(tindex, index)
+        save_trigram_index(tindex)
+        
+        posting_lists = []
+        for trigram in text_trigrams(keyword):
+            ids = trigram_posting(tindex, trigram)
+            if ids is None:
+                return []
+            posting_lists.append(ids)
+        posting_lists.sort(key=len)
+        
+        candidate_ids = set(posting_lists[0])
+        for ids in posting_lists[1:]:
+            candidate_ids.intersection_update(ids)
+            if not candidate_ids:
+                return []
+        
+        paths = tindex['paths']
+        indexed = [paths[i] for i in candidate_ids if i in paths]
+    
+    # Files too large for the index still need a plain scan
+    return sorted(indexed + tindex['oversized'])
+
+
+# Files at least this big are memory-mapped instead of read into memory
+SEARCH_MMAP_MIN_SIZE = 64 * 1024
+# Newlines are counted in slices of this size so a big mapped file is never copied whole
+NEWLINE_COUNT_CHUNK = 1024 * 1024
+
+# BM25 parameters: term frequency saturation and document length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Ranked searches score at most this many matching files
+SEARCH_RANK_POOL = 1000
+# Occurrences of a term counted per file when ranking; BM25 has long saturated by then
+SEARCH_RANK_MAX_COUNT = 32
+
+term_pattern_cache = {}
+
+
+def compile_term_pattern(term, regex=False, whole_word=False, case_sensitive=False, text=False):
+    """
+    Compile one search term into a byte pattern. Literal terms matched
+    case-insensitively get explicit alternatives for non-ASCII characters,
+    since re only folds ASCII case on bytes. With text=True the pattern is
+    compiled for decoded text instead, where re folds all of Unicode.
+    Raises re.error for bad regexes.
+    """
+    key = (term, regex, whole_word, case_sensitive, text)
+    pattern = term_pattern_cache.get(key)
+    if pattern is None:
+        flags = 0 if case_sensitive else re.IGNORECASE
+        if text:
+            source = term if regex else re.escape(term)
+            if whole_word:
+                source = r'(?<!\w)(?:' + source + r')(?!\w)'
+            pattern = re.compile(source, flags)
+        else:
+            if regex:
+                source = term.encode('utf-8')
+            else:
+                parts = []
+                for char in term:
+                    variants = {char, char.lower(), char.upper()}
+                    if case_sensitive or char.isascii() or len(variants) == 1:
+                        parts.append(re.escape(char.encode('utf-8')))
+                    else:
+                        parts.append(b'(?:' + b'|'.join(re.escape(v.encode('utf-8')) for v in sorted(variants)) + b')')
+                source = b''.join(parts)
+            if whole_word:
+                source = rb'(?<!\w)(?:' + source + rb')(?!\w)'
+            pattern = re.compile(source, flags)
+        if len(term_pattern_cache) > 256:
+            term_pattern_cache.clear()
+        term_pattern_cache[key] = pattern
+    return pattern
+
+
+def build_search_query(keyword, regex=False, whole_word=False, case_sensitive=False, operator=None):
+    """
+    Turn a search string into a query dict. "a OR b" matches files with
+    either term, "a AND b" files with both; operator ('and'/'or') instead
+    splits on whitespace. Otherwise the whole keyword is one term.
+    """
+    if operator:
+        terms = keyword.split()
+        require_all = operator.lower() == 'and'
+    elif ' OR ' in keyword:
+        terms = [t.strip() for t in keyword.split(' OR ')]
+        require_all = False
+    else:
+        terms = [t.strip() for t in keyword.split(' AND ')] if ' AND ' in keyword else [keyword]
+        require_all = True
+    terms = [t for t in terms if t] or [keyword]
+    # A regex can't spell out case variants the way a literal does, so files are decoded for it
+    text = regex and not case_sensitive and not keyword.isascii()
+    
+    return {
+        'terms': terms,
+        'patterns': [compile_term_pattern(t, regex, whole_word, case_sensitive, text) for t in terms],
+        'regex': regex,
+        'text': text,
+        'require_all': require_all
+    }
+
+
+def count_newlines(buffer, start, end):
+    """Count newlines in buffer[start:end] (bytes, str or mmap)."""
+    if isinstance(buffer, str):
+        return buffer.count('\n', start, end)
+    if isinstance(buffer, bytes):
+        return buffer.count(b'\n', start, end)
+    count = 0
+    for offset in range(start, end, NEWLINE_COUNT_CHUNK):
+        count += buffer[offset:min(offset + NEWLINE_COUNT_CHUNK, end)].count(b'\n')
+    return count
+
+
+def scan_buffer_lines(buffer, pattern, max_lines=3):
+    """
+    Find the first max_lines lines of buffer matching pattern.
+    Line numbers are only computed at hits and only those lines are decoded.
+    """
+    newline = '\n' if isinstance(buffer, str) else b'\n'
+    matching_lines = []
+    line_number = 1
+    counted_to = 0
+    position = 0
+    while len(matching_lines) < max_lines and position <= len(buffer):
+        match = pattern.search(buffer, position)
+        if match is None:
+            break
+        hit = match.start()
+        line_start = buffer.rfind(newline, 0, hit) + 1
+        line_end = buffer.find(newline, hit)
+        if line_end == -1:
+            line_end = len(buffer)
+        line_number += count_newlines(buffer, counted_to, line_start)
+        counted_to = line_start
+        line = buffer[line_start:line_end]
+        if not isinstance(line, str):
+            line = line.decode('utf-8', errors='ignore')
+        matching_lines.append({
+            'line_number': line_number,
+            'content': line.strip()[:100]  # First 100 chars
+        })
+        position = line_end + 1
+    return matching_lines
+
+
+def scan_buffer_terms(buffer, query, count_terms):
+    """
+    Match every term of query against buffer. Returns the first matching
+    lines (in file order) and, when count_terms is set, the number of
+    occurrences of each term up to SEARCH_RANK_MAX_COUNT - else just 1 or 0.
+    None if the file doesn't match.
+    """
+    from itertools import islice
+    matching_lines = []
+    counts = []
+    for pattern in query['patterns']:
+        lines = scan_buffer_lines(buffer, pattern)
+        if count_terms and lines:
+            counts.append(sum(1 for _ in islice(pattern.finditer(buffer), SEARCH_RANK_MAX_COUNT)))
+        else:
+            counts.append(len(lines) and 1)
+        matching_lines.extend(lines)
+    
+    found = [count > 0 for count in counts]
+    if not (all(found) if query['require_all'] else any(found)):
+        return None
+    
+    seen = set()
+    unique_lines = []
+    for line_info in sorted(matching_lines, key=lambda l: l['line_number']):
+        if line_info['line_number'] not in seen:
+            seen.add(line_info['line_number'])
+            unique_lines.append(line_info)
+    return unique_lines[:3], counts
+
+
+def match_file_content(full_path, query, search_path, count_terms=False):
+    """Check a single file against a query. Returns its match record, or None."""
+    import mmap
+    try:
+        with open(full_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if query['text']:
+                scanned = scan_buffer_terms(f.read().decode('utf-8', errors='ignore'), query, count_terms)
+            elif size >= SEARCH_MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    scanned = scan_buffer_terms(buffer, query, count_terms)
+            else:
+                scanned = scan_buffer_terms(f.read(), query, count_terms)
+    except (OSError, ValueError):
+        return None  # Skip files that can't be read
+    
+    if scanned is None:
+        return None
+    matching_lines, counts = scanned
+    
+    return {
+        'name': os.path.basename(full_path),
+        'path': os.path.relpath(full_path, search_path),
+        'full_path': full_path,
+        'matches': sum(counts) if count_terms else len(matching_lines),
+        'lines': matching_lines,
+        'term_counts': counts,
+        'size': size
+    }
+
+
+def rank_content_matches(matches, files_scanned):
+    """
+    Order matches by BM25 score, using each file's size as its length and
+    the files scanned as the collection. Adds a 'score' to every match.
+    """
+    import math
+    if not matches:
+        return matches
+    
+    collection_size = max(files_scanned, len(matches))
+    average_size = sum(m['size'] for m in matches) / len(matches) or 1
+    term_count = len(matches[0]['term_counts'])
+    document_frequency = [sum(1 for m in matches if m['term_counts'][i]) for i in range(term_count)]
+    idf = [math.log(1 + (collection_size - df + 0.5) / (df + 0.5)) for df in document_frequency]
+    
+    for match in matches:
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * match['size'] / average_size)
+        match['score'] = round(sum(
+            idf[i] * tf * (BM25_K1 + 1) / (tf + length_norm)
+            for i, tf in enumerate(match['term_counts']) if tf
+        ), 3)
+    
+    return sorted(matches, key=lambda m: -m['score'])
+
+
+# Worker threads used by the parallel content search
+SEARCH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+# Files handed to a worker per task, to keep scheduling overhead low
+SEARCH_BATCH_SIZE = 32
+
+
+def query_trigram_candidates(query, search_path):
+    """
+    Combine the trigram candidates of each literal term: intersect them when
+    all terms are required, unite them otherwise. None when the index can't help.
+    """
+    if query['regex']:
+        return None
+    
+    candidate_sets = [trigram_candidates(term, search_path) for term in query['terms']]
+    if query['require_all']:
+        usable = [set(c) for c in candidate_sets if c is not None]
+        if not usable:
+            return None
+        return sorted(set.intersection(*usable))
+    
+    if any(c is None for c in candidate_sets):
+        return None
+    return sorted(set().union(*candidate_sets))
+
+
+def iter_content_search_paths(query, file_pattern, search_path):
+    """Yield the full paths of the files a content search should look at, in a stable order."""
+    # Only open the files the trigram index says can contain the terms
+    candidates = query_trigram_candidates(query, search_path)
+    if candidates is not None:
+        for rel_path in candidates:
+            if fnmatch.fnmatch(os.path.basename(rel_path), file_pattern):
+                yield os.path.join(search_path, rel_path)
+        return
+    
+    for rel_dir, dir_entries, file_entries in walk_workspace(search_path):
+        for entry in file_entries:
+            # Check file pattern
+            if not fnmatch.fnmatch(entry.name, file_pattern):
+                continue
+            
+            # Skip binary and minified files
+            if not is_searchable_file(entry.path, search_path):
+                continue
+            
+            yield entry.path
+
+
+def match_file_batch(full_paths, query, search_path, count_terms=False):
+    """Match a batch of files, returning the matches in input order."""
+    matches = []
+    for full_path in full_paths:
+        match = match_file_content(full_path, query, search_path, count_terms)
+        if match:
+            matches.append(match)
+    return matches
+
+
+def parallel_match_files(full_paths, query, max_results, search_path, on_match=None, count_terms=False):
+    """
+    Match files on a bounded thread pool while keeping the input order.
+    Once max_results matches are in, nothing new is submitted and queued work is cancelled.
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import islice
+    
+    matches = []
+    paths = iter(full_paths)
+    window = SEARCH_WORKERS * 4
+    
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="content-search") as pool:
+        pending = deque()
+        
+        def submit_next():
+            batch = list(islice(paths, SEARCH_BATCH_SIZE))
+            if not batch:
+                return False
+            pending.append(pool.submit(match_file_batch, batch, query, search_path, count_terms))
+            return True
+        
+        while len(pending) < window and submit_next():
+            pass
+        
+        # Consume batches in submission order so the output matches the serial scan
+        while pending:
+            for match in pending.popleft().result():
+                matches.append(match)
+                if on_match:
+                    on_match(match)
+                if len(matches) >= max_results:
+                    for future in pending:
+                        future.cancel()
+                    return matches
+            submit_next()
+    
+    return matches
+
+
+def search_in_file_content(keyword, file_pattern="*", max_results=10, search_path=None, parallel=True, on_match=None,
+                           regex=False, whole_word=False, case_sensitive=False, operator=None, rank=False):
+    """
+    Search for text inside files.
+    Returns files containing the keyword with line numbers.
+    keyword may combine terms with OR / AND (see build_search_query); each
+    term is a literal, or a regular expression with regex=True. Regexes can't
+    use the trigram index, so they scan every searchable file.
+    With rank=True matches are ordered by BM25 relevance, which means finding
+    up to SEARCH_RANK_POOL matching files first; otherwise they come in walk
+    order and the search stops at max_results.
+    With parallel=True files are read and matched on a thread pool.
+    on_match, if given, is called with each match as soon as it is found
+    (once ranked, when ranking).
+    """
+    if search_path is None:
+        search_path = WORKSPACE_PATH
+    
+    try:
+        query = build_search_query(keyword, regex, whole_word, case_sensitive, operator)
+        
+        files_scanned = 0
+        
+        def counted(paths):
+            nonlocal files_scanned
+            for full_path in paths:
+                files_scanned += 1
+                yield full_path
+        
+        full_paths = counted(iter_content_search_paths(query, file_pattern, search_path))
+        limit = max(max_results, SEARCH_RANK_POOL) if rank else max_results
+        emit = None if rank else on_match
+        
+        if parallel:
+            matches = parallel_match_files(full_paths, query, limit, search_path, emit, count_terms=rank)
+        else:
+            matches = []
+            for full_path in full_paths:
+                match = match_file_content(full_path, query, search_path, count_terms=rank)
+                if match:
+                    matches.append(match)
+                    if emit:
+                        emit(match)
+                    if len(matches) >= limit:
+                        break
+        
+        if rank:
+            # The trigram index narrows the files scanned; IDF wants the whole collection
+            tindex = trigram_index
+            if tindex is not None and tindex['root'] == search_path:
+                files_scanned = max(files_scanned, len(tindex['files']) + len(tindex['oversized']))
+            matches = rank_content_matches(matches, files_scanned)[:max_results]
+            if on_match:
+                for match in matches:
+                    on_match(match)
+        return matches
+    
+    except re.error as e:
+        return [{'error': f"Invalid regular expression: {e}"}]
+    except Exception as e:
+        return [{'error': f"Search error: {str(e)}"}]
+
+
+SYMBOL_INDEX_VERSION = 3
+# Larger Python files are skipped, they are almost always generated
+SYMBOL_MAX_FILE_SIZE = 1024 * 1024
+# Minimum seconds between writes of the symbol index to disk
+SYMBOL_SAVE_INTERVAL = 30.0
+
+symbol_index = None
+symbol_index_lock = threading.RLock()
+
+
+def parse_python_source(source):
+    """
+    Parse Python source once for the symbol index and the import graph.
+    Returns (symbols, module), where module is (imports, names, open_namespace)
+    as described in extract_python_module, or None when the source does not parse.
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return [], None
+    return extract_python_symbols(tree), extract_python_module(tree)
+
+
+def extract_python_module(tree):
+    """
+    Return (imports, names, open_namespace) for a parsed module: its imports
+    (see extract_python_imports), the names it defines at module level, and
+    whether it can hold names not listed there (star imports, __getattr__).
+    """
+    names = set()
+    open_namespace = False
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            open_namespace = open_namespace or node.name == '__getattr__'
+            continue
+        if isinstance(node, ast.Import):
+            names.update(alias.asname or alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name == '*':
+                    open_namespace = True
+                else:
+                    names.add(alias.asname or alias.name)
+        else:
+            # Assignment targets, loop variables, "with ... as", "except ... as" and
+            # the bodies of module-level if/try/for/while/with blocks
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, ast.stmt):
+                    pending.append(child)
+                elif isinstance(child, ast.excepthandler):
+                    if child.name:
+                        names.add(child.name)
+                    pending.extend(child.body)
+                else:
+                    names.update(n.id for n in ast.walk(child)
+                                 if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store))
+    
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Global):
+            names.update(node.names)
+    return extract_python_imports(tree), tuple(sorted(names)), open_namespace
+
+
+def extract_python_imports(tree):
+    """
+    Return the imports of a parsed module as (module, level, names, line) tuples,
+    including the ones inside functions. level is the number of leading dots of
+    a relative import; names is empty for plain "import module".
+    """
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append((alias.name, 0, (), node.lineno))
+        elif isinstance(node, ast.ImportFrom):
+            names = tuple(alias.name for alias in node.names)
+            imports.append((node.module or '', node.level, names, node.lineno))
+    imports.sort(key=lambda item: item[3])
+    return imports
+
+
+def extract_python_symbols(tree):
+    """
+    Return the symbols of a parsed module as (name, qualname, kind, line, end_line)
+    tuples: functions, classes, methods and module-level assignments.
+    """
+    symbols = []
+    
+    def visit(body, prefix, in_class):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = 'method' if in_class else 'function'
+                symbols.append((node.name, prefix + node.name, kind, node.lineno, node.end_lineno))
+            elif isinstance(node, ast.ClassDef):
+                symbols.append((node.name, prefix + node.name, 'class', node.lineno, node.end_lineno))
+                visit(node.body, prefix + node.name + '.', True)
+            elif not prefix and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    for name_node in ast.walk(target):
+                        if isinstance(name_node, ast.Name):
+                            symbols.append((name_node.id, name_node.id, 'variable', node.lineno, node.end_lineno))
+    
+    visit(tree.body, '', False)
+    return symbols
+
+
+def symbol_index_remove(sindex, rel_path):
+    """Forget the symbols of a file."""
+    record = sindex['files'].pop(rel_path, None)
+    if record is None:
+        return
+    for symbol in sindex['by_hash'].get(record[2], []):
+        key = symbol[0].lower()
+        entries = [e for e in sindex['by_name'].get(key, []) if e[0] != rel_path]
+        if entries:
+            sindex['by_name'][key] = entries
+        else:
+            sindex['by_name'].pop(key, None)
+
+
+def symbol_index_add(sindex, rel_path, mtime, size, digest):
+    """Record a file whose symbols are already in by_hash."""
+    sindex['files'][rel_path] = (mtime, size, digest)
+    for symbol in sindex['by_hash'][digest]:
+        sindex['by_name'].setdefault(symbol[0].lower(), []).append((rel_path, symbol))
+
+
+def sync_symbol_index(sindex, index):
+    """
+    Re-read Python files whose mtime or size changed, parse the ones whose
+    content hash is new, and drop deleted files. Returns the number of changes.
+    """
+    import hashlib
+    with workspace_index_lock:
+        if sindex['generation'] == index['generation']:
+            return 0
+        generation = index['generation']
+        current = {
+            entry.path: (entry.mtime, entry.size)
+            for entry in index['entries'].files()
+            if entry.path.endswith('.py') and entry.size <= SYMBOL_MAX_FILE_SIZE
+        }
+    
+    changes = 0
+    for rel_path in [p for p in sindex['files'] if p not in current]:
+        symbol_index_remove(sindex, rel_path)
+        changes += 1
+    
+    changed = []
+    to_parse = {}
+    for rel_path, (mtime, size) in current.items():
+        record = sindex['files'].get(rel_path)
+        if record is not None and record[0] == mtime and record[1] == size:
+            continue
+        try:
+            with open(os.path.join(sindex['root'], rel_path), 'rb') as f:
+                source = f.read()
+        except OSError:
+            continue
+        digest = hashlib.sha1(source).hexdigest()
+        changed.append((rel_path, mtime, size, digest))
+        if digest not in sindex['by_hash']:
+            to_parse[digest] = source
+    
+    # Parsed in this process: worker processes can't be forked safely from a
+    # threaded backend, and spawned ones would re-run its startup code
+    for digest, source in to_parse.items():
+        symbols, module = parse_python_source(source)
+        sindex['by_hash'][digest] = symbols
+        sindex['modules_by_hash'][digest] = module
+    
+    for rel_path, mtime, size, digest in changed:
+        symbol_index_remove(sindex, rel_path)
+        symbol_index_add(sindex, rel_path, mtime, size, digest)
+        changes += 1
+    
+    sindex['generation'] = generation
+    if changes:
+        sindex['dirty'] = True
+    return changes
+
+
+def new_symbol_index(root):
+    """Create an empty symbol index for a workspace."""
+    return {
+        'version': SYMBOL_INDEX_VERSION,
+        'root': root,
+        'files': {},
+        'by_hash': {},
+        # Imports and module-level names per content hash, None for sources that don't parse
+        'modules_by_hash': {},
+        'by_name': {},
+        'generation': -1,
+        'dirty': False,
+        'saved_at': 0.0
+    }
+
+
+def load_symbol_index(root):
+    """Load the symbol index for a workspace from disk, or None if missing or stale."""
+    import marshal
+    loaded = read_cache_file(os.path.join(get_workspace_cache_dir(root), 'symbols.bin'),
+                             'symbol-index', SYMBOL_INDEX_VERSION)
+    if loaded is None:
+        return None
+    header, sections = loaded
+    if header.get('root') != root:
+        return None
+    try:
+        stored = marshal.loads(sections['payload'])
+    except (EOFError, ValueError, TypeError):
+        return None
+    
+    sindex = new_symbol_index(root)
+    sindex['by_hash'] = stored['by_hash']
+    sindex['modules_by_hash'] = stored['modules_by_hash']
+    for rel_path, (mtime, size, digest) in stored['files'].items():
+        if digest in sindex['by_hash']:
+            symbol_index_add(sindex, rel_path, mtime, size, digest)
+    return sindex
+
+
+def save_symbol_index(sindex, force=False):
+    """Write the symbol index to the workspace cache folder (atomically)."""
+    import marshal
+    if not sindex['dirty'] or (not force and time.time() - sindex['saved_at'] < SYMBOL_SAVE_INTERVAL):
+        return
+    
+    # Only keep parsed content that some file still has
+    live = {record[2] for record in sindex['files'].values()}
+    for digest in [d for d in sindex['by_hash'] if d not in live]:
+        del sindex['by_hash'][digest]
+        sindex['modules_by_hash'].pop(digest, None)
+    
+    try:
+        cache_path = os.path.join(get_workspace_cache_dir(sindex['root']), 'symbols.bin')
+        payload = marshal.dumps({'files': sindex['files'], 'by_hash': sindex['by_hash'],
+                                 'modules_by_hash': sindex['modules_by_hash']})
+        write_cache_file(cache_path, 'symbol-index', SYMBOL_INDEX_VERSION, {'root': sindex['root']},
+                         {'payload': payload})
+        sindex['dirty'] = False
+        sindex['saved_at'] = time.time()
+    except OSError:
+        pass
+
+
+def start_symbol_index_build(index):
+    """Load or build the symbol index for a workspace in a background thread."""
+    def build():
+        global symbol_index
+        # The lock is held for the whole build so get_symbol_index waits for it
+        with symbol_index_lock:
+            if symbol_index is not None and symbol_index['root'] == index['root']:
+                return
+            sindex = load_symbol_index(index['root']) or new_symbol_index(index['root'])
+            sync_symbol_index(sindex, index)
+            save_symbol_index(sindex, force=True)
+            if workspace_index is index:
+                symbol_index = sindex
+    
+    threading.Thread(target=build, name="symbol-index", daemon=True).start()
+
+
+def get_symbol_index(search_path=None):
+    """Return the symbol index for the workspace, up to date with the file index."""
+    global symbol_index
+    index = get_workspace_index(search_path)
+    if index is None:
+        return None
+    
+    # Blocks while a background build holds the lock
+    with symbol_index_lock:
+        sindex = symbol_index
+        if sindex is None or sindex['root'] != index['root']:
+            # No build has run for this workspace yet; do it here and let the
+            # background build find it done
+            sindex = load_symbol_index(index['root']) or new_symbol_index(index['root'])
+            symbol_index = sindex
+        sync_symbol_index(sindex, index)
+        save_symbol_index(sindex)
+        return sindex
+
+
+def find_symbols(name, kind=None, max_results=20, search_path=None, on_match=None):
+    """
+    Find where Python functions, classes, methods or module-level variables
+    are defined. name may be qualified ("Class.method"). Exact-case matches
+    come first. Returns a list of dicts with the file and line range.
+    """
+    if search_path is None:
+        search_path = WORKSPACE_PATH
+    
+    sindex = get_symbol_index(search_path)
+    if sindex is None:
+        return [{'error': "Symbol lookup is only available for the open workspace"}]
+    
+    query = name.strip()
+    short_name = query.rsplit('.', 1)[-1]
+    with symbol_index_lock:
+        entries = list(sindex['by_name'].get(short_name.lower(), []))
+    
+    if '.' in query:
+        lowered = query.lower()
+        entries = [e for e in entries if ('.' + e[1][1].lower()).endswith('.' + lowered)]
+    if kind:
+        entries = [e for e in entries if e[1][2] == kind]
+    
+    entries.sort(key=lambda e: (e[1][0] != short_name, e[1][2] == 'variable', e[0].count(os.sep), e[0], e[1][3]))
+    
+    results = []
+    for rel_path, (symbol_name, qualname, symbol_kind, line, end_line) in entries[:max_results]:
+        result = {
+            'name': symbol_name,
+            'qualname': qualname,
+            'kind': symbol_kind,
+            'path': rel_path,
+            'full_path': os.path.join(sindex['root'], rel_path),
+            'line': line,
+            'end_line': end_line
+        }
+        results.append(result)
+        if on_match:
+            on_match(result)
+    return results
+
+
+# Import graph - which workspace Python files import which, resolved from the
+# per-hash imports the symbol index keeps
+
+# Python files that passed the last directory check, per workspace root:
+# relative path -> hash of the file's and its imports' content hashes
+debug_checked = {}
+
+
+def python_module_component(rel_path):
+    """The last dotted component a workspace file is imported as (package name for __init__.py)."""
+    stem = os.path.splitext(os.path.basename(rel_path))[0]
+    return os.path.basename(os.path.dirname(rel_path)) if stem == '__init__' else stem
+
+
+def find_python_module(files, roots, parts):
+    """
+    Look for the module or package parts (an empty list means the root package
+    itself) under each root in turn. Returns (root, relative path) or None.
+    """
+    for root in roots:
+        base = os.path.join(root, *parts)
+        if parts and base + '.py' in files:
+            return root, base + '.py'
+        if os.path.join(base, '__init__.py') in files:
+            return root, os.path.join(base, '__init__.py')
+    return None
+
+
+def resolve_python_import(files, rel_path, imported):
+    """
+    Resolve one import of a workspace file against the workspace files.
+    Returns (module_path, submodules, resolved): the file defining the imported
+    module (or None), {name: path} for imported names that are submodules, and
+    False for relative imports that point nowhere. Absolute imports are looked
+    up from the importing file's folder upwards (and each folder's src/), the
+    way a script or a project root on sys.path would find them; anything not
+    found there is taken to be installed.
+    """
+    module, level, names, _ = imported
+    module_parts = module.split('.') if module else []
+    folder_parts = rel_path.split(os.sep)[:-1]
+    
+    if level:
+        if level - 1 > len(folder_parts):
+            return None, {}, False
+        roots = [os.path.join('', *folder_parts[:len(folder_parts) - level + 1])]
+    else:
+        roots = []
+        for depth in range(len(folder_parts), -1, -1):
+            ancestor = os.path.join('', *folder_parts[:depth])
+            roots.append(ancestor)
+            roots.append(os.path.join(ancestor, 'src'))
+    
+    module_path = None
+    found = find_python_module(files, roots, module_parts)
+    if found is not None:
+        # Submodules live under the same root as their package
+        roots = [found[0]]
+        module_path = found[1]
+    
+    submodules = {}
+    for name in names:
+        found = find_python_module(files, roots, module_parts + [name]) if name != '*' else None
+        if found is not None:
+            submodules[name] = found[1]
+    
+    resolved = not level or module_path is not None or bool(submodules)
+    return module_path, submodules, resolved
+
+
+def new_import_graph():
+    """Create an empty import graph."""
+    return {
+        'generation': -1,
+        # Relative path -> content hash the file's edges were resolved from
+        'digests': {},
+        # Relative path -> workspace files it imports, and the reverse
+        'dependencies': {},
+        'dependents': {}
+    }
+
+
+def sync_import_graph(graph, sindex):
+    """
+    Re-resolve the imports of files whose content changed. When files come or
+    go, files whose imports mention their module names are re-resolved too.
+    """
+    if graph['generation'] == sindex['generation']:
+        return
+    
+    digests = {rel_path: record[2] for rel_path, record in sindex['files'].items()}
+    old_digests = graph['digests']
+    added = digests.keys() - old_digests.keys()
+    removed = old_digests.keys() - digests.keys()
+    changed = {rel_path for rel_path in digests if old_digests.get(rel_path) != digests[rel_path]}
+    
+    if added or removed:
+        components = {python_module_component(rel_path) for rel_path in added | removed}
+        for rel_path, digest in digests.items():
+            module = sindex['modules_by_hash'].get(digest)
+            if rel_path not in changed and module and any(
+                    not components.isdisjoint(imported[0].split('.')) or not components.isdisjoint(imported[2])
+                    for imported in module[0]):
+                changed.add(rel_path)
+    
+    for rel_path in removed | changed:
+        for target in graph['dependencies'].pop(rel_path, ()):
+            graph['dependents'].get(target, set()).discard(rel_path)
+    for rel_path in removed:
+        graph['dependents'].pop(rel_path, None)
+    
+    for rel_path in changed:
+        module = sindex['modules_by_hash'].get(digests[rel_path])
+        targets = set()
+        for imported in (module[0] if module else ()):
+            module_path, submodules, _ = resolve_python_import(digests, rel_path, imported)
+            if module_path is not None:
+                targets.add(module_path)
+            targets.update(submodules.values())
+        targets.discard(rel_path)
+        graph['dependencies'][rel_path] = tuple(sorted(targets))
+        for target in targets:
+            graph['dependents'].setdefault(target, set()).add(rel_path)
+    
+    graph['digests'] = digests
+    graph['generation'] = sindex['generation']
+
+
+def get_import_graph(search_path=None):
+    """Return the import graph of the workspace's Python files, or None for other roots."""
+    sindex = get_symbol_index(search_path)
+    if sindex is None:
+        return None
+    with symbol_index_lock:
+        if sindex.get('import_graph') is None:
+            sindex['import_graph'] = new_import_graph()
+        sync_import_graph(sindex['import_graph'], sindex)
+        return sindex['import_graph']
+
+
+def import_closure(graph, rel_paths, direction, transitive=True):
+    """
+    Files reachable from rel_paths along 'dependencies' or 'dependents' edges,
+    nearest first, not including rel_paths themselves.
+    """
+    edges = graph[direction]
+    seen = set(rel_paths)
+    found = []
+    frontier = list(rel_paths)
+    while frontier:
+        next_frontier = []
+        for rel_path in frontier:
+            for target in sorted(edges.get(rel_path, ())):
+                if target not in seen:
+                    seen.add(target)
+                    found.append(target)
+                    next_frontier.append(target)
+        frontier = next_frontier if transitive else []
+    return found
+
+
+def find_import_relations(path, transitive=True, search_path=None):
+    """
+    Return the workspace Python files a file imports and the files that import it,
+    directly or (with transitive) through other files.
+    """
+    if search_path is None:
+        search_path = WORKSPACE_PATH
+    
+    graph = get_import_graph(search_path)
+    if graph is None:
+        return {'error': "The import graph is only available for the open workspace"}
+    
+    candidates = resolve_file_candidates(path, search_path)
+    full_path = candidates[0] if candidates else os.path.join(search_path, path)
+    rel_path = os.path.relpath(full_path, search_path)
+    with symbol_index_lock:
+        if rel_path not in graph['digests']:
+            return {'error': f"'{path}' is not an indexed Python file in the workspace"}
+        return {
+            'path': rel_path,
+            'dependencies': import_closure(graph, [rel_path], 'dependencies', transitive),
+            'dependents': import_closure(graph, [rel_path], 'dependents', transitive)
+        }
+
+
+def format_import_relations(relations, limit=50):
+    """Format the result of find_import_relations for display."""
+    if 'error' in relations:
+        return f"[ERROR] {relations['error']}"
+    
+    lines = [f"[OK] Import graph for {relations['path']}:"]
+    lines.append("-" * 50)
+    for title, key in (("Imports", 'dependencies'), ("Imported by", 'dependents')):
+        paths = relations[key]
+        lines.append(f"{title} ({len(paths)}):")
+        lines.extend(f"   {p}" for p in paths[:limit])
+        if len(paths) > limit:
+            lines.append(f"   ... and {len(paths) - limit} more")
+    return "\n".join(lines)
+
+
+def check_python_module(sindex, graph, rel_path):
+    """
+    Check a workspace Python file from its cached parse. Returns a list of
+    (error_type, message, line) for a syntax error, relative imports that point
+    nowhere, and names imported from workspace modules that don't define them.
+    """
+    full_path = os.path.join(sindex['root'], rel_path)
+    module = sindex['modules_by_hash'].get(graph['digests'].get(rel_path))
+    if module is None:
+        try:
+            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                error, line_no = validate_python_code(f.read(), full_path)
+        except OSError as e:
+            return [('read', str(e), None)]
+        return [('syntax', error, line_no)] if error else []
+    
+    problems = []
+    for imported in module[0]:
+        module_name, level, names, line_no = imported
+        module_path, submodules, resolved = resolve_python_import(graph['digests'], rel_path, imported)
+        shown = '.' * level + module_name
+        if not resolved:
+            problems.append(('import', f"Relative import '{shown}' does not match any workspace module", line_no))
+            continue
+        target = sindex['modules_by_hash'].get(graph['digests'].get(module_path)) if module_path else None
+        if target is None or target[2]:
+            continue
+        defined = set(target[1])
+        for name in names:
+            if name != '*' and name not in defined and name not in submodules:
+                problems.append(('import', f"'{name}' is imported from '{shown}' ({module_path}) but not defined there", line_no))
+    return problems
+
+
+def describe_dependency_errors(full_path):
+    """
+    Lines describing syntax errors in the workspace modules a Python file
+    imports, directly or indirectly. Empty when there are none or the file
+    isn't part of the import graph.
+    """
+    graph = get_import_graph()
+    if graph is None:
+        return []
+    sindex = get_symbol_index()
+    rel_path = os.path.relpath(full_path, sindex['root'])
+    with symbol_index_lock:
+        if rel_path not in graph['digests']:
+            return []
+        modules = sindex['modules_by_hash']
+        broken = [dependency for dependency in import_closure(graph, [rel_path], 'dependencies')
+                  if graph['digests'][dependency] in modules and modules[graph['digests'][dependency]] is None]
+    if not broken:
+        return []
+    lines = [f"[WARNING] {len(broken)} imported workspace module(s) have syntax errors:"]
+    lines.extend(f"   {dependency}" for dependency in broken)
+    return lines
+
+
+OUTLINE_TOKEN_BUDGET = int(os.getenv("VIBECODING_OUTLINE_TOKENS", "1500"))
+OUTLINE_MAX_DEPTH = 3
+# Children listed per folder before the rest are summarised as "... N more"
+OUTLINE_MAX_CHILDREN = 40
+OUTLINE_MAX_SYMBOLS = 6
+OUTLINE_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Rough token count of a prompt fragment, about four characters per token."""
+    return (len(text) + OUTLINE_CHARS_PER_TOKEN - 1) // OUTLINE_CHARS_PER_TOKEN
+
+
+def outline_folder_children(index, rel_dir):
+    """
+    The direct children of a folder as (name, rel_path, is_dir, size), folders
+    first. Cached on the index until index_put or index_drop touches the folder.
+    Call with workspace_index_lock held.
+    """
+    children = index['outline'].get(rel_dir)
+    if children is None:
+        store = index['entries']
+        children = []
+        for child_id in store.children(rel_dir):
+            name = store.name(child_id)
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+            children.append((name, rel_path, store.is_dir(child_id), store.sizes[child_id]))
+        children.sort(key=lambda child: (not child[2], child[0].lower()))
+        index['outline'][rel_dir] = children
+    return children
+
+
+def outline_file_symbols(sindex, rel_path):
+    """The top-level functions and classes of an indexed Python file, as outline text."""
+    record = sindex['files'].get(rel_path) if sindex is not None else None
+    if record is None:
+        return ""
+    names = [f"class {name}" if kind == 'class' else f"{name}()"
+             for name, qualname, kind, line, end_line in sindex['by_hash'].get(record[2], ())
+             if kind in ('function', 'class') and name == qualname]
+    if len(names) > OUTLINE_MAX_SYMBOLS:
+        names[OUTLINE_MAX_SYMBOLS:] = [f"+{len(names) - OUTLINE_MAX_SYMBOLS} more"]
+    return ", ".join(names)
+
+
+def render_workspace_outline(index, sindex, max_depth, max_chars, detailed=True):
+    """
+    Render the folder tree down to max_depth. When detailed, folders show
+    their file counts and sizes, files their size and top-level Python
+    symbols; otherwise only the names are listed. Returns None as soon as the
+    text grows past max_chars.
+    """
+    lines = []
+    used = 0
+    
+    def visit(rel_dir, depth):
+        nonlocal used
+        indent = '  ' * depth
+        children = outline_folder_children(index, rel_dir)
+        for name, rel_path, is_dir, size in children[:OUTLINE_MAX_CHILDREN]:
+            if not detailed:
+                line = f"{indent}{name}/" if is_dir else f"{indent}{name}"
+            elif is_dir:
+                stats = index['dir_stats'].get(rel_path) or new_dir_stats()
+                line = f"{indent}{name}/ ({stats['total_files']} files, {format_file_size(stats['total_size'])})"
+            else:
+                line = f"{indent}{name} ({format_file_size(size)})"
+                symbols = outline_file_symbols(sindex, rel_path) if name.endswith('.py') else ""
+                if symbols:
+                    line += f": {symbols}"
+            lines.append(line)
+            used += len(line) + 1
+            if used > max_chars:
+                return False
+            if is_dir and depth + 1 < max_depth and not visit(rel_path, depth + 1):
+                return False
+        if len(children) > OUTLINE_MAX_CHILDREN:
+            lines.append(f"{indent}... {len(children) - OUTLINE_MAX_CHILDREN} more")
+        return True
+    
+    return "\n".join(lines) if visit('', 0) else None
+
+
+def get_workspace_outline(max_tokens=None, max_depth=OUTLINE_MAX_DEPTH, detailed=False):
+    """
+    A compact outline of the workspace within max_tokens (default
+    OUTLINE_TOKEN_BUDGET). Deep levels are dropped first when the tree doesn't
+    fit. Only folders that changed since the last call are re-listed, and the
+    text itself is reused until the index or the symbol index changes.
+    Prompts get the structural outline (names only), which stays the same
+    while files are edited; detailed adds sizes, file counts and symbols.
+    """
+    max_tokens = OUTLINE_TOKEN_BUDGET if max_tokens is None else max_tokens
+    index = get_workspace_index()
+    if index is None or max_tokens <= 0:
+        return ""
+    
+    # Symbols are a bonus: don't wait for a symbol index that is still being built
+    sindex = None
+    locked = detailed and symbol_index_lock.acquire(blocking=False)
+    try:
+        if locked and symbol_index is not None and symbol_index['root'] == index['root']:
+            sindex = symbol_index
+            sync_symbol_index(sindex, index)
+        with workspace_index_lock:
+            key = (index['generation'], sindex['generation'] if sindex else None, max_tokens, max_depth)
+            cached = index['outline_text'].get(detailed)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            
+            max_chars = max_tokens * OUTLINE_CHARS_PER_TOKEN
+            text = None
+            for depth in range(max_depth, 0, -1):
+                text = render_workspace_outline(index, sindex, depth, max_chars, detailed)
+                if text is not None:
+                    break
+            if text is None:
+                # Even the top level doesn't fit: cut it at the budget
+                text = render_workspace_outline(index, sindex, 1, float('inf'), detailed)
+                text = text[:max_chars].rsplit('\n', 1)[0] + "\n... (outline truncated)"
+            index['outline_text'][detailed] = (key, text)
+            return text
+    finally:
+        if locked:
+            symbol_index_lock.release()
+
+
+SEMANTIC_INDEX_VERSION = 2
+# Files are split into chunks of this many lines; each chunk is one TF-IDF document
+SEMANTIC_CHUNK_LINES = 40
+# Bigger files are left out of the semantic index
+SEMANTIC_MAX_FILE_SIZE = 256 * 1024
+# Minimum seconds between writes of the semantic index to disk
+SEMANTIC_SAVE_INTERVAL = 30.0
+# Rebuild the base matrix once changed and removed chunks reach this fraction of all chunks
+SEMANTIC_REBUILD_RATIO = 0.2
+# Words too common in code or questions to say anything about a chunk
+SEMANTIC_STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'from', 'this', 'that', 'what', 'where', 'when', 'which', 'who', 'how',
+    'do', 'does', 'we', 'is', 'are', 'be', 'in', 'of', 'to', 'it', 'an', 'on', 'or', 'as', 'at', 'by',
+    'if', 'else', 'elif', 'def', 'class', 'return', 'import', 'self', 'none', 'true', 'false', 'not',
+    'var', 'let', 'const', 'function', 'new', 'null', 'public', 'private', 'static', 'void'
+}
+
+semantic_index = None
+semantic_index_lock = threading.RLock()
+
+
+def split_identifier_tokens(text):
+    """
+    Split text into lowercase search tokens: identifiers are broken at
+    underscores, camelCase and digits, and compound identifiers also keep
+    their joined form. A plural 's' is dropped so 'tokens' finds 'token'.
+    """
+    tokens = []
+    for word in re.findall(r'[A-Za-z][A-Za-z0-9]*', text):
+        parts = re.findall(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+', word)
+        if len(parts) > 1:
+            parts.append(word)
+        for part in parts:
+            token = part.lower()
+            if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+                token = token[:-1]
+            if len(token) > 1 and token not in SEMANTIC_STOP_WORDS:
+                tokens.append(token)
+    return tokens
+
+
+def semantic_term_id(sindex, token):
+    """The vocabulary id of a token, reusing the id of a term no chunk has any more."""
+    term_id = sindex['vocab'].get(token)
+    if term_id is None:
+        if sindex['free_terms']:
+            term_id = sindex['free_terms'].pop()
+            sindex['terms'][term_id] = token
+        else:
+            term_id = len(sindex['terms'])
+            sindex['terms'].append(token)
+        sindex['vocab'][token] = term_id
+    return term_id
+
+
+def semantic_file_chunks(sindex, text):
+    """
+    Split a file into line chunks and count their tokens. Returns a list of
+    (start_line, end_line, term_ids, counts) with NumPy arrays, adding new
+    tokens to the vocabulary.
+    """
+    import numpy as np
+    from collections import Counter
+    lines = text.split('\n')
+    chunks = []
+    for start in range(0, len(lines), SEMANTIC_CHUNK_LINES):
+        counts = Counter(split_identifier_tokens('\n'.join(lines[start:start + SEMANTIC_CHUNK_LINES])))
+        if not counts:
+            continue
+        term_ids = np.fromiter((semantic_term_id(sindex, token) for token in counts), dtype=np.int32, count=len(counts))
+        chunks.append((start + 1, min(start + SEMANTIC_CHUNK_LINES, len(lines)), term_ids,
+                       np.fromiter(counts.values(), dtype=np.float32, count=len(counts))))
+    return chunks
+
+
+def semantic_index_add(sindex, rel_path, record):
+    """Add a file's (mtime, size, chunks) record; its chunks are searched through the delta until the next rebuild."""
+    import numpy as np
+    sindex['files'][rel_path] = record
+    chunks = record[2]
+    if len(sindex['df']) < len(sindex['terms']):
+        grown = np.zeros(max(len(sindex['terms']), 2 * len(sindex['df'])), dtype=np.int32)
+        grown[:len(sindex['df'])] = sindex['df']
+        sindex['df'] = grown
+    for _, _, term_ids, _ in chunks:
+        sindex['df'][term_ids] += 1
+    sindex['chunk_count'] += len(chunks)
+    sindex['delta'].add(rel_path)
+    sindex['delta_matrix'] = None
+
+
+def semantic_index_remove(sindex, rel_path):
+    """Drop a file's chunks, masking its rows out of the base matrix and freeing terms nothing uses any more."""
+    import numpy as np
+    record = sindex['files'].pop(rel_path, None)
+    if record is None:
+        return
+    chunks = record[2]
+    df = sindex['df']
+    for _, _, term_ids, _ in chunks:
+        df[term_ids] -= 1
+    sindex['chunk_count'] -= len(chunks)
+    
+    if chunks:
+        touched = np.unique(np.concatenate([term_ids for _, _, term_ids, _ in chunks]))
+        for term_id in touched[df[touched] == 0].tolist():
+            del sindex['vocab'][sindex['terms'][term_id]]
+            sindex['terms'][term_id] = ''
+            sindex['free_terms'].append(term_id)
+    
+    matrix = sindex['matrix']
+    if matrix is not None and rel_path in matrix['rows']:
+        first, end = matrix['rows'].pop(rel_path)
+        matrix['live'][first:end] = False
+        matrix['dead'] += end - first
+    if rel_path in sindex['delta']:
+        sindex['delta'].discard(rel_path)
+        sindex['delta_matrix'] = None
+
+
+def sync_semantic_index(sindex, index):
+    """
+    Re-tokenize source files whose mtime or size changed, add new ones and
+    drop deleted ones. Returns the number of changes.
+    """
+    with workspace_index_lock:
+        if sindex['generation'] == index['generation']:
+            return 0
+        generation = index['generation']
+        files = [entry for entry in index['entries'].files() if entry.size <= SEMANTIC_MAX_FILE_SIZE]
+    
+    current = {}
+    for entry in files:
+        if get_file_kind(os.path.join(index['root'], entry.path), entry) == 'text':
+            current[entry.path] = (entry.mtime, entry.size)
+    
+    changes = 0
+    for rel_path in [p for p in sindex['files'] if p not in current]:
+        semantic_index_remove(sindex, rel_path)
+        changes += 1
+    
+    for rel_path, (mtime, size) in current.items():
+        record = sindex['files'].get(rel_path)
+        if record is not None and record[0] == mtime and record[1] == size:
+            continue
+        try:
+            with open(os.path.join(index['root'], rel_path), 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+        except OSError:
+            continue
+        # Removed first so terms only the old content had are freed before the new ones get ids
+        semantic_index_remove(sindex, rel_path)
+        semantic_index_add(sindex, rel_path, (mtime, size, semantic_file_chunks(sindex, text)))
+        changes += 1
     
-    return None
+    sindex['generation'] = generation
+    if changes:
+        sindex['dirty'] = True
+    return changes
 
 
-def find_files_by_keyword(keyword, file_type=None, max_results=10, search_path=None):
+def semantic_idf(sindex, term_ids):
+    """Smoothed inverse document frequency of terms, from the current chunk counts."""
+    import numpy as np
+    return (np.log((sindex['chunk_count'] + 1) / (sindex['df'][term_ids] + 1)) + 1).astype(np.float32)
+
+
+def build_semantic_matrix(sindex, paths):
     """
-    Search for files by keyword in their names.
-    Supports partial matching and wildcards.
+    Assemble the chunk x term matrix of some files, stored column-wise (CSC)
+    so a query only touches its own terms' postings. Postings hold the
+    sublinear term frequency; the IDF is applied at query time, while row
+    norms use the IDF of when the matrix was built.
     """
-    if search_path is None:
-        search_path = WORKSPACE_PATH
+    import numpy as np
+    chunk_files = []
+    chunk_lines = []
+    term_arrays = []
+    count_arrays = []
+    rows = {}
+    for rel_path in paths:
+        first = len(chunk_files)
+        for start_line, end_line, term_ids, counts in sindex['files'][rel_path][2]:
+            chunk_files.append(rel_path)
+            chunk_lines.append((start_line, end_line))
+            term_arrays.append(term_ids)
+            count_arrays.append(counts)
+        rows[rel_path] = (first, len(chunk_files))
     
-    matches = []
-    pattern = f"*{keyword}*"
-    if file_type:
-        pattern = f"*{keyword}*{file_type}"
+    vocab_size = len(sindex['terms'])
+    chunk_count = len(chunk_files)
+    if chunk_count == 0:
+        return None
     
-    try:
-        for root, dirs, files in os.walk(search_path):
-            # Skip hidden directories and common non-code directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', '.git', '.vscode', 'out', 'dist', 'build']]
-            
-            for filename in files:
-                # Check if filename matches pattern
-                if fnmatch.fnmatch(filename.lower(), pattern.lower()):
-                    full_path = os.path.join(root, filename)
-                    rel_path = os.path.relpath(full_path, search_path)
-                    matches.append({
-                        'name': filename,
-                        'path': rel_path,
-                        'full_path': full_path,
-                        'size': os.path.getsize(full_path),
-                        'modified': datetime.fromtimestamp(os.path.getmtime(full_path)).strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                    
-                    if len(matches) >= max_results:
-                        return matches
-    except Exception as e:
-        return [{'error': f"Search error: {str(e)}"}]
+    terms = np.concatenate(term_arrays)
+    chunk_rows = np.repeat(np.arange(chunk_count, dtype=np.int32), [len(t) for t in term_arrays])
+    tf = 1 + np.log(np.concatenate(count_arrays))
+    weights = tf * semantic_idf(sindex, terms)
+    norms = np.sqrt(np.bincount(chunk_rows, weights=weights * weights, minlength=chunk_count)).astype(np.float32)
     
-    return matches
+    order = np.argsort(terms, kind='stable')
+    return {
+        'chunk_files': chunk_files,
+        'chunk_lines': chunk_lines,
+        'rows': rows,
+        'live': np.ones(chunk_count, dtype=bool),
+        'dead': 0,
+        'norms': norms,
+        'term_offsets': np.searchsorted(terms[order], np.arange(vocab_size + 1)),
+        'posting_rows': chunk_rows[order],
+        'posting_tf': tf[order].astype(np.float32)
+    }
 
 
-def find_folders_by_keyword(keyword, max_results=10, search_path=None):
+def refresh_semantic_matrix(sindex):
     """
-    Search for folders by keyword in their names.
-    Supports partial matching.
+    Bring the matrices up to date with the files: rebuild the base matrix
+    once the delta or its dead rows pass SEMANTIC_REBUILD_RATIO of all
+    chunks (which also refreshes its norms), otherwise only the small delta.
     """
-    if search_path is None:
-        search_path = WORKSPACE_PATH
+    matrix = sindex['matrix']
+    delta_chunks = sum(len(sindex['files'][p][2]) for p in sindex['delta'])
+    stale = delta_chunks + (matrix['dead'] if matrix is not None else 0)
+    if (matrix is None and sindex['files']) or stale > SEMANTIC_REBUILD_RATIO * max(sindex['chunk_count'], 1):
+        sindex['matrix'] = build_semantic_matrix(sindex, sorted(sindex['files']))
+        sindex['delta'] = set()
+        sindex['delta_matrix'] = None
+    elif sindex['delta'] and sindex['delta_matrix'] is None:
+        sindex['delta_matrix'] = build_semantic_matrix(sindex, sorted(sindex['delta']))
+
+
+def new_semantic_index(root):
+    """Create an empty semantic index for a workspace."""
+    import numpy as np
+    return {
+        'version': SEMANTIC_INDEX_VERSION,
+        'root': root,
+        'files': {},
+        'vocab': {},
+        # Token of each term id; '' marks an id free for reuse
+        'terms': [],
+        'free_terms': [],
+        # Number of chunks containing each term, and of all chunks
+        'df': np.zeros(0, dtype=np.int32),
+        'chunk_count': 0,
+        # Base matrix over most files, plus a delta matrix over files changed since it was built
+        'matrix': None,
+        'delta': set(),
+        'delta_matrix': None,
+        'generation': -1,
+        'dirty': False,
+        'saved_at': 0.0
+    }
+
+
+def load_semantic_index(root):
+    """Load the semantic index for a workspace from disk, or None if missing or stale."""
+    import numpy as np
+    loaded = read_cache_file(os.path.join(get_workspace_cache_dir(root), 'semantic.bin'),
+                             'semantic-index', SEMANTIC_INDEX_VERSION)
+    if loaded is None:
+        return None
+    header, sections = loaded
+    if header.get('root') != root:
+        return None
     
-    matches = []
+    count = header['count']
+    paths = sections['paths'].decode('utf-8', errors='surrogateescape').split('\0') if count else []
+    terms = sections['terms'].decode('utf-8').split('\0') if header['terms'] else []
+    mtimes = typed_array('d', sections['mtimes'])
+    sizes = typed_array('q', sections['sizes'])
+    chunk_counts = typed_array('I', sections['chunk_counts'])
+    chunk_lines = typed_array('I', sections['chunk_lines'])
+    chunk_lengths = np.frombuffer(sections['chunk_lengths'], dtype=np.uint32)
+    term_ids = np.frombuffer(sections['term_ids'], dtype=np.int32).copy()
+    term_counts = np.frombuffer(sections['term_counts'], dtype=np.float32).copy()
+    if not (len(paths) == len(mtimes) == len(sizes) == len(chunk_counts) == count):
+        return None
+    if (sum(chunk_counts) != len(chunk_lengths) or len(chunk_lines) != 2 * len(chunk_lengths)
+            or int(chunk_lengths.sum()) != len(term_ids) or len(term_counts) != len(term_ids)):
+        return None
+    if len(terms) != header['terms'] or (len(term_ids) and (term_ids.min() < 0 or term_ids.max() >= len(terms))):
+        return None
+    
+    sindex = new_semantic_index(root)
+    sindex['terms'] = terms
+    sindex['vocab'] = {token: term_id for term_id, token in enumerate(terms) if token}
+    sindex['free_terms'] = [term_id for term_id, token in enumerate(terms) if not token]
+    ends = np.cumsum(chunk_lengths).tolist()
+    chunk = 0
+    for i, rel_path in enumerate(paths):
+        chunks = []
+        for _ in range(chunk_counts[i]):
+            start, end = (ends[chunk - 1] if chunk else 0), ends[chunk]
+            chunks.append((chunk_lines[2 * chunk], chunk_lines[2 * chunk + 1], term_ids[start:end], term_counts[start:end]))
+            chunk += 1
+        sindex['files'][rel_path] = (mtimes[i], sizes[i], chunks)
+    sindex['df'] = np.bincount(term_ids, minlength=len(terms)).astype(np.int32)
+    sindex['chunk_count'] = len(chunk_lengths)
+    return sindex
+
+
+def save_semantic_index(sindex, force=False):
+    """
+    Write the semantic index to the workspace cache folder: the files table
+    as columns, and every chunk's term ids and counts flattened into arrays.
+    The matrices are not stored; they are rebuilt from the chunks.
+    """
+    import numpy as np
+    from array import array
+    if not sindex['dirty'] or (not force and time.time() - sindex['saved_at'] < SEMANTIC_SAVE_INTERVAL):
+        return
     
+    paths = list(sindex['files'])
+    records = [sindex['files'][p] for p in paths]
+    chunks = [chunk for record in records for chunk in record[2]]
     try:
-        for root, dirs, files in os.walk(search_path):
-            # Skip hidden directories and common non-code directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', '.git', '.vscode', 'out', 'dist', 'build']]
-            
-            for dirname in dirs:
-                # Check if folder name contains keyword
-                if keyword.lower() in dirname.lower():
-                    full_path = os.path.join(root, dirname)
-                    rel_path = os.path.relpath(full_path, search_path)
-                    
-                    # Count files in directory
-                    try:
-                        file_count = sum([len(files) for _, _, files in os.walk(full_path)])
-                    except:
-                        file_count = 0
-                    
-                    matches.append({
-                        'name': dirname,
-                        'path': rel_path,
-                        'full_path': full_path,
-                        'file_count': file_count
-                    })
-                    
-                    if len(matches) >= max_results:
-                        return matches
-    except Exception as e:
-        return [{'error': f"Search error: {str(e)}"}]
+        cache_path = os.path.join(get_workspace_cache_dir(sindex['root']), 'semantic.bin')
+        write_cache_file(cache_path, 'semantic-index', SEMANTIC_INDEX_VERSION, {
+            'root': sindex['root'],
+            'count': len(paths),
+            'terms': len(sindex['terms'])
+        }, {
+            'paths': '\0'.join(paths).encode('utf-8', errors='surrogateescape'),
+            'terms': '\0'.join(sindex['terms']).encode('utf-8'),
+            'mtimes': array('d', [r[0] for r in records]),
+            'sizes': array('q', [r[1] for r in records]),
+            'chunk_counts': array('I', [len(r[2]) for r in records]),
+            'chunk_lines': array('I', [line for chunk in chunks for line in chunk[:2]]),
+            'chunk_lengths': array('I', [len(chunk[2]) for chunk in chunks]),
+            'term_ids': np.concatenate([chunk[2] for chunk in chunks]) if chunks else np.zeros(0, dtype=np.int32),
+            'term_counts': np.concatenate([chunk[3] for chunk in chunks]) if chunks else np.zeros(0, dtype=np.float32)
+        })
+        sindex['dirty'] = False
+        sindex['saved_at'] = time.time()
+    except OSError:
+        pass
+
+
+def start_semantic_index_build(index):
+    """Load or build the semantic index for a workspace in a background thread (needs NumPy)."""
+    def build():
+        global semantic_index
+        try:
+            import numpy
+        except ImportError:
+            return
+        # The lock is held for the whole build so get_semantic_index waits for it
+        with semantic_index_lock:
+            if semantic_index is not None and semantic_index['root'] == index['root']:
+                return
+            sindex = load_semantic_index(index['root']) or new_semantic_index(index['root'])
+            sync_semantic_index(sindex, index)
+            refresh_semantic_matrix(sindex)
+            save_semantic_index(sindex, force=True)
+            if workspace_index is index:
+                semantic_index = sindex
     
-    return matches
+    threading.Thread(target=build, name="semantic-index", daemon=True).start()
 
 
-def search_in_file_content(keyword, file_pattern="*", max_results=10, search_path=None):
+def get_semantic_index(search_path=None):
+    """Return the semantic index for the workspace, up to date with the file index."""
+    global semantic_index
+    index = get_workspace_index(search_path)
+    if index is None:
+        return None
+    
+    # Blocks while a background build holds the lock
+    with semantic_index_lock:
+        sindex = semantic_index
+        if sindex is None or sindex['root'] != index['root']:
+            # No build has run for this workspace yet; do it here and let the
+            # background build find it done
+            sindex = load_semantic_index(index['root']) or new_semantic_index(index['root'])
+            semantic_index = sindex
+        sync_semantic_index(sindex, index)
+        save_semantic_index(sindex)
+        return sindex
+
+
+def semantic_search(query, max_results=10, search_path=None, on_match=None):
     """
-    Search for text inside files.
-    Returns files containing the keyword with line numbers.
+    Find the files most related to a natural-language query by cosine
+    similarity of TF-IDF vectors over line chunks. Returns the best files
+    with their best-matching line ranges.
     """
+    try:
+        import numpy as np
+    except ImportError:
+        return [{'error': "Semantic search needs NumPy (pip install numpy)"}]
+    
     if search_path is None:
         search_path = WORKSPACE_PATH
     
-    matches = []
-    text_extensions = {'.py', '.js', '.ts', '.jsx', '.tsx', '.html', '.css', '.scss', '.json', '.md', '.txt', '.yaml', '.yml', '.xml', '.sql', '.sh', '.bash', '.zsh', '.fish', '.c', '.cpp', '.h', '.hpp', '.java', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala', '.r', '.m', '.mm', '.cs', '.vb', '.fs', '.fsx', '.clj', '.cljs', '.edn', '.erl', '.hrl', '.ex', '.exs', '.elm', '.haskell', '.hs', '.lhs', '.lua', '.pl', '.pm', '.t', '.pod', '.raku', '.nim', '.nims', '.nimble', '.cr', '.ecr', '.slang', '.dart', '.groovy', '.gvy', '.gy', '.gsh', '.tcl', '.tk', '.racket', '.rkt', '.ss', '.scm', '.sch', '.sml', '.ml', '.mli', '.fun', '.sig', '.ocaml', '.opa', '.prolog', '.pl', '.pro', '.elm', '.el', '.lisp', '.lsp', '.l', '.cl', '.fasl', '.scm', '.ss', '.rkt', '.sld', '.sps', '.sls', '.scm', '.ss', '.rkt', '.sld', '.sps', '.sls'}
+    sindex = get_semantic_index(search_path)
+    if sindex is None:
+        return [{'error': "Semantic search is only available for the open workspace"}]
     
-    try:
-        for root, dirs, files in os.walk(search_path):
-            # Skip hidden directories and common non-code directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', '.git', '.vscode', 'out', 'dist', 'build']]
-            
-            for filename in files:
-                # Check file pattern
-                if not fnmatch.fnmatch(filename, file_pattern):
-                    continue
-                
-                # Skip binary files
-                ext = os.path.splitext(filename)[1].lower()
-                if ext not in text_extensions:
-                    continue
-                
-                full_path = os.path.join(root, filename)
-                
-                try:
-                    with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        
-                        if keyword.lower() in content.lower():
-                            # Find line numbers
-                            lines = content.split('\n')
-                            matching_lines = []
-                            for i, line in enumerate(lines, 1):
-                                if keyword.lower() in line.lower():
-                                    matching_lines.append({
-                                        'line_number': i,
-                                        'content': line.strip()[:100]  # First 100 chars
-                                    })
-                                    if len(matching_lines) >= 3:  # Limit to 3 matches per file
-                                        break
-                            
-                            rel_path = os.path.relpath(full_path, search_path)
-                            matches.append({
-                                'name': filename,
-                                'path': rel_path,
-                                'full_path': full_path,
-                                'matches': len(matching_lines),
-                                'lines': matching_lines
-                            })
-                            
-                            if len(matches) >= max_results:
-                                return matches
-                except Exception:
-                    continue  # Skip files that can't be read
-                    
-    except Exception as e:
-        return [{'error': f"Search error: {str(e)}"}]
+    from collections import Counter
+    with semantic_index_lock:
+        refresh_semantic_matrix(sindex)
+        query_counts = Counter(t for t in split_identifier_tokens(query) if t in sindex['vocab'])
+        query_terms = {sindex['vocab'][t]: count for t, count in query_counts.items()}
+        # Base rows first, then the delta's
+        matrices = [m for m in (sindex['matrix'], sindex['delta_matrix']) if m is not None]
+        if not matrices or not query_terms:
+            return []
+        
+        term_ids = list(query_terms)
+        idf = semantic_idf(sindex, np.array(term_ids, dtype=np.int32))
+        query_weights = (1 + np.log(np.array([query_terms[t] for t in term_ids], dtype=np.float32))) * idf
+        parts = []
+        for matrix in matrices:
+            offsets = matrix['term_offsets']
+            part = np.zeros(len(matrix['chunk_files']), dtype=np.float32)
+            for term_id, term_idf, query_weight in zip(term_ids, idf, query_weights):
+                if term_id >= len(offsets) - 1:
+                    continue  # Added to the vocabulary after this matrix was built
+                start, end = offsets[term_id], offsets[term_id + 1]
+                np.add.at(part, matrix['posting_rows'][start:end], matrix['posting_tf'][start:end] * (term_idf * query_weight))
+            part *= matrix['live']
+            part /= np.maximum(matrix['norms'], 1e-9)
+            parts.append(part)
+        scores = np.concatenate(parts) / np.sqrt(float(np.dot(query_weights, query_weights)))
+    
+    # Best chunks first, grouped into files; a file is as good as its best chunk
+    candidate_count = min(len(scores), max_results * 8)
+    best = np.argpartition(-scores, candidate_count - 1)[:candidate_count]
+    best = best[np.argsort(-scores[best], kind='stable')]
     
+    results = {}
+    for row in best:
+        score = float(scores[row])
+        if score <= 0:
+            break
+        matrix = matrices[0]
+        if row >= len(matrix['chunk_files']):
+            row -= len(matrix['chunk_files'])
+            matrix = matrices[1]
+        rel_path = matrix['chunk_files'][row]
+        start_line, end_line = matrix['chunk_lines'][row]
+        result = results.get(rel_path)
+        if result is None:
+            if len(results) >= max_results:
+                continue
+            result = results[rel_path] = {
+                'name': os.path.basename(rel_path),
+                'path': rel_path,
+                'full_path': os.path.join(sindex['root'], rel_path),
+                'score': round(score, 4),
+                'lines': []
+            }
+        if len(result['lines']) < 3:
+            result['lines'].append({'start_line': start_line, 'end_line': end_line, 'score': round(score, 4)})
+    
+    matches = list(results.values())
+    if on_match:
+        for match in matches:
+            on_match(match)
     return matches
 
 
@@ -675,26 +4405,37 @@ def get_file_info(path, search_path=None):
     if not full_path:
         full_path = os.path.join(search_path, path)
     
-    if not os.path.exists(full_path):
+    record = cached_stat(full_path)
+    if record is None:
         return {'error': f"File or folder '{path}' not found"}
     
     try:
-        stat = os.stat(full_path)
+        from stat import S_ISDIR, S_ISREG
+        mode, size, mtime, ctime, atime = record
+        is_directory = S_ISDIR(mode)
         info = {
             'name': os.path.basename(full_path),
             'path': os.path.relpath(full_path, search_path),
             'full_path': full_path,
             'exists': True,
-            'is_file': os.path.isfile(full_path),
-            'is_directory': os.path.isdir(full_path),
-            'size': stat.st_size,
-            'size_human': format_file_size(stat.st_size),
-            'created': datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S'),
-            'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-            'accessed': datetime.fromtimestamp(stat.st_atime).strftime('%Y-%m-%d %H:%M:%S')
+            'is_file': S_ISREG(mode),
+            'is_directory': is_directory,
+            'size': size,
+            'created': ctime,
+            'modified': mtime,
+            'accessed': atime
         }
         
-        if os.path.isdir(full_path):
+        # Indexed folders have their counts precomputed
+        index = get_workspace_index(search_path)
+        stats = get_dir_stats(info['path'], index) if is_directory and index is not None else None
+        if stats is not None:
+            info['item_count'] = stats['files'] + stats['folders']
+            info['files'] = stats['files']
+            info['folders'] = stats['folders']
+            info['total_files'] = stats['total_files']
+            info['total_size'] = stats['total_size']
+        elif is_directory:
             # Count contents
             try:
                 items = os.listdir(full_path)
@@ -712,6 +4453,26 @@ def get_file_info(path, search_path=None):
         return {'error': f"Error getting file info: {str(e)}"}
 
 
+def format_file_info(info):
+    """Format the result of get_file_info for display."""
+    if 'error' in info:
+        return f"[ERROR] {info['error']}"
+    
+    lines = ["[OK] File Information:"]
+    lines.append("-" * 40)
+    for key, value in info.items():
+        if key == 'full_path':
+            continue
+        if key in ('created', 'modified', 'accessed'):
+            value = format_timestamp(value)
+        elif key == 'total_size':
+            value = format_file_size(value)
+        lines.append(f"{key.replace('_', ' ').title()}: {value}")
+        if key == 'size':
+            lines.append(f"Size Human: {format_file_size(value)}")
+    return "\n".join(lines)
+
+
 def format_file_size(size_bytes):
     """Convert bytes to human readable format."""
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -736,7 +4497,7 @@ def format_search_results(results, search_type):
         if search_type == "files":
             lines.append(f"{i}. {item['name']}")
             lines.append(f"   Path: {item['path']}")
-            lines.append(f"   Size: {format_file_size(item['size'])} | Modified: {item['modified']}")
+            lines.append(f"   Size: {format_file_size(item['size'])} | Modified: {format_timestamp(item['modified'])}")
         elif search_type == "folders":
             lines.append(f"{i}. {item['name']}/")
             lines.append(f"   Path: {item['path']}/")
@@ -744,15 +4505,69 @@ def format_search_results(results, search_type):
         elif search_type == "content matches":
             lines.append(f"{i}. {item['name']}")
             lines.append(f"   Path: {item['path']}")
-            lines.append(f"   Matches: {item['matches']} occurrences")
+            if 'score' in item:
+                lines.append(f"   Matches: {item['matches']} occurrences | Score: {item['score']}")
+            else:
+                lines.append(f"   Matches: {item['matches']} occurrences")
             for line_info in item['lines']:
                 lines.append(f"      Line {line_info['line_number']}: {line_info['content']}")
+        elif search_type == "semantic matches":
+            lines.append(f"{i}. {item['name']} (score {item['score']})")
+            lines.append(f"   Path: {item['path']}")
+            for range_info in item['lines']:
+                lines.append(f"      Lines {range_info['start_line']}-{range_info['end_line']} (score {range_info['score']})")
+        elif search_type == "symbols":
+            lines.append(f"{i}. {item['kind']} {item['qualname']}")
+            lines.append(f"   Path: {item['path']}:{item['line']}-{item['end_line']}")
         
         lines.append("")
     
     return "\n".join(lines)
 
 
+def send_search_hit(search_type, item, rank):
+    """Send a single search match to VS Code: extension as soon as it is found."""
+    hit = {"type": "search_hit", "search_type": search_type, "rank": rank}
+    hit.update(item)
+    sys.stdout.write(json.dumps(hit) + "\n")
+    sys.stdout.flush()
+
+
+def stream_search(search_type, search_fn, *args, **kwargs):
+    """
+    Run a search, streaming each match as a search_hit message,
+    then send a search_done summary. Returns the formatted results.
+    """
+    hit_count = 0
+    
+    def on_match(item):
+        nonlocal hit_count
+        hit_count += 1
+        send_search_hit(search_type, item, hit_count)
+    
+    results = search_fn(*args, on_match=on_match, **kwargs)
+    text = format_search_results(results, search_type)
+    sys.stdout.write(json.dumps({
+        "type": "search_done",
+        "search_type": search_type,
+        "count": hit_count,
+        "text": text
+    }) + "\n")
+    sys.stdout.flush()
+    return text
+
+
+def content_search_options(data):
+    """Pick the search_in_file_content query options out of an action or file operation."""
+    options = {}
+    for key in ('regex', 'whole_word', 'case_sensitive', 'rank'):
+        if key in data:
+            options[key] = bool(data[key])
+    if data.get("operator"):
+        options['operator'] = str(data["operator"])
+    return options
+
+
 def validate_python_code(code, filename):
     """Validate Python code for syntax errors with detailed reporting."""
     try:
@@ -1040,15 +4855,20 @@ def run_code(path, environment=None):
 def run_file(path, environment="none"):
     """Run a file and return results with error handling for auto-fix."""
     # Try to find the file recursively if not found directly
-    full_path = find_file_recursive(path)
+    candidates = resolve_file_candidates(path)
+    full_path = candidates[0] if candidates else None
     
     if not full_path:
         # Try direct path as fallback
         full_path = os.path.join(WORKSPACE_PATH, path)
         if not os.path.exists(full_path):
             return f"[ERROR] File '{path}' not found in workspace or any subdirectory. Cannot run."
+    note_path_access(full_path)
     
     result_lines = [f"[RUNNING] Testing file '{full_path}'..."]
+    ambiguity = describe_other_candidates(path, full_path, candidates)
+    if ambiguity:
+        result_lines.append(ambiguity)
     
     # First validate the code
     if path.endswith('.py'):
@@ -1060,6 +4880,7 @@ def run_file(path, environment="none"):
             result_lines.append(f"[ERROR] Syntax error found: {error}")
             result_lines.append(f"[SUGGESTION] Use 'debug_file' action to auto-fix this error.")
             return "\n".join(result_lines)
+        result_lines.extend(describe_dependency_errors(full_path))
     
     # Run the code
     run_result = run_code(full_path, environment)
@@ -1114,6 +4935,8 @@ def create_file(path, content, confirmed=False, action_type='create_new'):
         # Write content to file
         with open(full_path, "w") as f:
             f.write(content)
+        index_refresh_path(full_path)
+        note_path_access(full_path)
         
         # Get file info
         file_size = os.path.getsize(full_path)
@@ -1136,7 +4959,8 @@ def create_file(path, content, confirmed=False, action_type='create_new'):
 def update_file(path, content, confirmed=False):
     try:
         # Try to find the file recursively if not found directly
-        full_path = find_file_recursive(path)
+        candidates = resolve_file_candidates(path)
+        full_path = candidates[0] if candidates else None
 
         if not full_path:
             # Try direct path as fallback
@@ -1150,6 +4974,9 @@ def update_file(path, content, confirmed=False):
         lines = content.split('\n')
         result_lines = []
         result_lines.append(f"[UPDATING] File '{full_path}' ({len(lines)} lines):")
+        ambiguity = describe_other_candidates(path, full_path, candidates)
+        if ambiguity:
+            result_lines.append(ambiguity)
         
         # Write content to file
         try:
@@ -1159,6 +4986,8 @@ def update_file(path, content, confirmed=False):
                     result_lines.append(f"  Line {i}/{len(lines)}: {line[:50]}{'...' if len(line) > 50 else ''}")
         except IOError as e:
             return f"[ERROR] Failed to write to file '{full_path}': {e}"
+        index_refresh_path(full_path)
+        note_path_access(full_path)
         
         # Verify file was written
         if not os.path.exists(full_path):
@@ -1191,7 +5020,8 @@ def debug_file(path, conversation_history="", debug_stage="all"):
     """
     try:
         # First, try to find the file by searching recursively
-        full_path = find_file_recursive(path)
+        candidates = resolve_file_candidates(path)
+        full_path = candidates[0] if candidates else None
         
         # If not found by recursive search, try direct paths
         if not full_path:
@@ -1232,7 +5062,11 @@ def debug_file(path, conversation_history="", debug_stage="all"):
                 filename_for_display = path
             return f"[ERROR] File or directory '{path}' not found in workspace or any subdirectory. Cannot debug.\n\nSearched for:\n- Direct path: {path}\n- In workspace: {os.path.join(WORKSPACE_PATH, path)}\n- By filename: {filename_for_display}\n\nTip: Use 'search_files' action to find the correct path."
         
+        note_path_access(full_path)
         result_lines = [f"[DEBUGGING] Analyzing file '{full_path}'..."]
+        ambiguity = describe_other_candidates(path, full_path, candidates)
+        if ambiguity:
+            result_lines.append(ambiguity)
         result_lines.append(f"[INFO] Debug mode: {debug_stage}")
         
         with open(full_path, "r") as f:
@@ -1268,11 +5102,7 @@ Please fix the syntax error and return ONLY the corrected code in a JSON format:
                 
                 try:
                     # Use Gemini API for AI-powered fix
-                    response = client.models.generate_content(
-                        model=GEMINI_MODEL,
-                        contents=fix_prompt
-                    )
-                    fix_reply = response.text.strip()
+                    fix_reply = cached_generate(fix_prompt).strip()
                     
                     fix_json_str = None
                     for obj in extract_json_objects(fix_reply):
@@ -1314,6 +5144,7 @@ Please fix the syntax error and return ONLY the corrected code in a JSON format:
                     return "\n".join(result_lines)
             else:
                 result_lines.append(f"[OK] No syntax errors found.")
+                result_lines.extend(describe_dependency_errors(full_path))
         
         # Stage 2: Runtime Check
         if debug_stage in ['runtime', 'all']:
@@ -1354,11 +5185,7 @@ Please fix the runtime error and return ONLY the corrected code in a JSON format
                 
                 try:
                     # Use Gemini API for AI-powered fix
-                    response = client.models.generate_content(
-                        model=GEMINI_MODEL,
-                        contents=fix_prompt
-                    )
-                    fix_reply = response.text.strip()
+                    fix_reply = cached_generate(fix_prompt).strip()
 
                     fix_json_str = None
                     for obj in extract_json_objects(fix_reply):
@@ -1431,24 +5258,57 @@ def debug_directory(dir_path, debug_stage="all"):
     
     # Find all source files in the directory
     source_files = []
-    for root, dirs, files in os.walk(dir_path):
-        # Skip hidden directories and common non-code directories
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv', 'env', '.git', '.vscode', 'out', 'dist', 'build', 'target']]
-        
-        for filename in files:
+    for rel_dir, dir_entries, file_entries in walk_workspace(dir_path):
+        for entry in file_entries:
             # Check for source code files
-            if filename.endswith(('.py', '.java', '.js', '.ts', '.cpp', '.c', '.h', '.hpp', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala')):
-                full_path = os.path.join(root, filename)
-                source_files.append(full_path)
+            if entry.name.endswith(('.py', '.java', '.js', '.ts', '.cpp', '.c', '.h', '.hpp', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala')):
+                source_files.append(entry.path)
     
     if not source_files:
         return f"[ERROR] No source files found in directory '{dir_path}'."
     
     result_lines.append(f"[INFO] Found {len(source_files)} source files.")
     
-    # Check each file for errors
+    # Python files in the import graph are checked from their cached parse, and only
+    # when they changed since they last passed or import (indirectly) a file that did.
+    # The imported file may live anywhere in the workspace, not just under dir_path.
     files_with_errors = []
+    graph_checked = set()
+    rel_dir = os.path.relpath(os.path.abspath(dir_path), os.path.abspath(WORKSPACE_PATH))
+    graph = get_import_graph() if not rel_dir.startswith('..') else None
+    if graph is not None:
+        import hashlib
+        sindex = get_symbol_index()
+        with symbol_index_lock:
+            digests = graph['digests']
+            checked = debug_checked.setdefault(os.path.abspath(WORKSPACE_PATH), {})
+            rel_paths = {os.path.relpath(p, WORKSPACE_PATH): p for p in source_files if p.endswith('.py')}
+            rel_paths = {rel: p for rel, p in rel_paths.items() if rel in digests}
+            signatures = {}
+            for rel in rel_paths:
+                closure = sorted([rel] + import_closure(graph, [rel], 'dependencies'))
+                signatures[rel] = hashlib.sha1(
+                    '\0'.join(f"{path}\0{digests[path]}" for path in closure).encode('utf-8', 'surrogateescape')
+                ).hexdigest()
+            impacted = [rel for rel in sorted(rel_paths) if checked.get(rel) != signatures[rel]]
+            for rel in impacted:
+                problems = check_python_module(sindex, graph, rel)
+                for error_type, error_msg, line_no in problems:
+                    files_with_errors.append((rel_paths[rel], error_type, error_msg, line_no))
+                if problems:
+                    checked.pop(rel, None)
+                else:
+                    checked[rel] = signatures[rel]
+        graph_checked = set(rel_paths.values())
+        skipped = len(rel_paths) - len(impacted)
+        if skipped:
+            result_lines.append(f"[INFO] Skipped {skipped} Python file(s) unchanged since they last passed; "
+                                f"re-checked {len(rel_paths) - skipped} changed or affected file(s).")
+    
+    # Check each file for errors
     for file_path in source_files:
+        if file_path in graph_checked:
+            continue
         # Quick syntax check based on file type
         if file_path.endswith('.py'):
             with open(file_path, "r", encoding='utf-8') as f:
@@ -1468,8 +5328,21 @@ def debug_directory(dir_path, debug_stage="all"):
         result_lines.append(f"[OK] No syntax errors found in any files.")
         return "\n".join(result_lines)
     
+    # Syntax errors first - they break every file importing them
+    files_with_errors.sort(key=lambda item: item[1] != 'syntax')
+    error_files = {item[0] for item in files_with_errors}
+    result_lines.append(f"\n[INFO] Found {len(files_with_errors)} error(s) in {len(error_files)} file(s):")
+    for file_path, error_type, error_msg, line_no in files_with_errors:
+        location = os.path.relpath(file_path, WORKSPACE_PATH) + (f":{line_no}" if line_no else "")
+        result_lines.append(f"  - {location} [{error_type}] {error_msg.splitlines()[0]}")
+        rel_path = os.path.relpath(file_path, WORKSPACE_PATH)
+        if error_type == 'syntax' and graph is not None and rel_path in graph['dependents']:
+            dependents = import_closure(graph, [rel_path], 'dependents')
+            result_lines.append(f"      Imported (directly or indirectly) by {len(dependents)} file(s): "
+                                f"{', '.join(dependents[:5])}{' ...' if len(dependents) > 5 else ''}")
+    
     # Debug the first file with errors
-    result_lines.append(f"\n[INFO] Found {len(files_with_errors)} file(s) with errors. Debugging first file...")
+    result_lines.append(f"\n[INFO] Debugging first file...")
     
     file_path, error_type, error_msg, line_no = files_with_errors[0]
     rel_path = os.path.relpath(file_path, WORKSPACE_PATH)
@@ -1503,11 +5376,7 @@ Please fix the syntax error and return ONLY the corrected code in a JSON format:
 """
         
         try:
-            response = client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=fix_prompt
-            )
-            fix_reply = response.text.strip()
+            fix_reply = cached_generate(fix_prompt).strip()
             
             fix_json_str = None
             for obj in extract_json_objects(fix_reply):
@@ -1611,16 +5480,335 @@ def extract_json_objects(s):
     return objects
 
 
+class IncrementalJSONScanner:
+    """
+    Finds the same JSON objects as extract_json_objects, but as the text
+    arrives. feed() returns the events completed by the new text:
+    ('object', start, obj) for each top-level object, and
+    ('file', start, header, idx, entry) for each object in a "files" array
+    once it is complete, where header holds the keys written before the
+    array. start identifies the enclosing object in both. Offsets count
+    from the start of the stream; the text is kept as the chunks it came in,
+    so each feed only looks at the new chunk.
+    """
+    
+    def __init__(self):
+        self.chunks = []
+        self.chunk_starts = []
+        self.length = 0
+        self.start = -1
+        self.reset_object()
+    
+    def reset_object(self):
+        self.depth = 0
+        self.brackets = 0
+        self.in_string = False
+        self.escape_next = False
+        self.files_start = -1
+        self.header = None
+        self.entry_start = -1
+        self.entry_count = 0
+    
+    def slice(self, begin, end):
+        """The streamed text between two offsets."""
+        from bisect import bisect_right
+        first = bisect_right(self.chunk_starts, begin) - 1
+        parts = []
+        for position in range(first, len(self.chunks)):
+            chunk_start = self.chunk_starts[position]
+            if chunk_start >= end:
+                break
+            parts.append(self.chunks[position][max(begin - chunk_start, 0):end - chunk_start])
+        return "".join(parts)
+    
+    @property
+    def text(self):
+        """All text fed so far."""
+        return "".join(self.chunks)
+    
+    def feed(self, text):
+        events = []
+        if not text:
+            return events
+        base = self.length
+        self.chunks.append(text)
+        self.chunk_starts.append(base)
+        self.length += len(text)
+        for offset, char in enumerate(text):
+            i = base + offset
+            if self.start < 0:
+                # Between objects only an opening brace matters
+                if char == '{':
+                    self.start = i
+                    self.reset_object()
+                    self.depth = 1
+                continue
+            
+            if self.escape_next:
+                self.escape_next = False
+            elif char == '\\':
+                self.escape_next = True
+            elif char == '"':
+                self.in_string = not self.in_string
+            elif self.in_string:
+                continue
+            elif char == '{':
+                if self.depth == 1 and self.brackets == 1 and self.files_start >= 0:
+                    self.entry_start = i
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 1 and self.entry_start >= 0:
+                    self.file_entry_done(events, self.slice(self.entry_start, i + 1))
+                    self.entry_start = -1
+                elif self.depth == 0:
+                    try:
+                        events.append(('object', self.start, json.loads(self.slice(self.start, i + 1))))
+                    except json.JSONDecodeError:
+                        pass
+                    self.start = -1
+            elif char == '[':
+                if (self.depth == 1 and self.brackets == 0
+                        and re.search(r'"files"\s*:\s*$', self.slice(max(self.start, i - 64), i))):
+                    self.files_start = i
+                self.brackets += 1
+            elif char == ']':
+                self.brackets -= 1
+                if self.depth == 1 and self.brackets == 0:
+                    self.files_start = -1
+        return events
+    
+    def file_entry_done(self, events, entry_text):
+        """Queue a completed "files" entry, parsing the keys before the array on first use."""
+        if self.header is None:
+            try:
+                self.header = json.loads(self.slice(self.start, self.files_start) + "[]}")
+            except json.JSONDecodeError:
+                self.header = {}
+        try:
+            entry = json.loads(entry_text)
+        except json.JSONDecodeError:
+            return
+        events.append(('file', self.start, self.header, self.entry_count, entry))
+        self.entry_count += 1
+
+
+RESPONSE_CACHE_VERSION = 1
+# Opt-in: replies are reused for byte-identical prompts (set from the config message too)
+RESPONSE_CACHE_ENABLED = os.getenv("VIBECODING_RESPONSE_CACHE", "").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("VIBECODING_RESPONSE_CACHE_MB", "64")) * 1024 * 1024
+# After going over the limit, least recently used replies are dropped down to this fraction of it
+RESPONSE_CACHE_TRIM_RATIO = 0.9
+
+response_cache = None
+response_cache_lock = threading.Lock()
+response_cache_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+
+def response_cache_key(model, contents, config=None):
+    """Content address of a request: a hash of the model, the full prompt and the generation config."""
+    import hashlib
+    if hasattr(config, 'model_dump'):
+        config = config.model_dump(exclude_none=True)
+    payload = json.dumps([RESPONSE_CACHE_VERSION, model, contents, config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+
+def open_response_cache():
+    """Open (creating if needed) the SQLite response cache shared by all workspaces."""
+    global response_cache
+    if response_cache is None:
+        import sqlite3
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        db = sqlite3.connect(os.path.join(CACHE_DIR, 'responses.sqlite'), check_same_thread=False,
+                             isolation_level=None, timeout=5.0)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                   "key TEXT PRIMARY KEY, model TEXT, text TEXT, size INTEGER, created REAL, used REAL)")
+        db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+        response_cache = db
+    return response_cache
+
+
+def response_cache_get(model, contents, config=None):
+    """Return the cached reply for a request, or None on a miss or when the cache is off."""
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    key = response_cache_key(model, contents, config)
+    with response_cache_lock:
+        try:
+            db = open_response_cache()
+            row = db.execute("SELECT text FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET used = ? WHERE key = ?", (time.time(), key))
+        except Exception:
+            row = None
+        response_cache_stats['hits' if row is not None else 'misses'] += 1
+        return row[0] if row is not None else None
+
+
+def response_cache_put(model, contents, text, config=None):
+    """Store a reply, dropping least recently used ones when the cache grows past its size limit."""
+    if not RESPONSE_CACHE_ENABLED or not text:
+        return
+    key = response_cache_key(model, contents, config)
+    size = len(text.encode('utf-8', errors='surrogatepass'))
+    now = time.time()
+    with response_cache_lock:
+        try:
+            db = open_response_cache()
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", (key, model, text, size, now, now))
+            response_cache_stats['stores'] += 1
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > RESPONSE_CACHE_MAX_BYTES:
+                target = RESPONSE_CACHE_MAX_BYTES * RESPONSE_CACHE_TRIM_RATIO
+                stale = []
+                for old_key, old_size in db.execute("SELECT key, size FROM responses ORDER BY used"):
+                    if total <= target:
+                        break
+                    stale.append((old_key,))
+                    total -= old_size
+                db.executemany("DELETE FROM responses WHERE key = ?", stale)
+                response_cache_stats['evictions'] += len(stale)
+        except Exception:
+            # A broken or locked cache must never break generation
+            pass
+
+
+def cached_generate(contents, config=None):
+    """Generate a reply with Gemini, reusing a cached one for an identical request."""
+    text = response_cache_get(GEMINI_MODEL, contents, config)
+    if text is None:
+        if not check_gemini_available():
+            raise RuntimeError(f"Gemini API is unavailable: {gemini_health['last_error'] or 'not configured'}")
+        try:
+            response = client.models.generate_content(model=GEMINI_MODEL, contents=contents, config=config)
+        except Exception as e:
+            record_gemini_result(e)
+            raise
+        record_gemini_result()
+        text = response.text
+        response_cache_put(GEMINI_MODEL, contents, text, config)
+    return text
+
+
+def get_response_cache_stats():
+    """Hit/miss counters of this process plus the size of the on-disk cache."""
+    stats = dict(response_cache_stats, enabled=RESPONSE_CACHE_ENABLED, entries=0, bytes=0,
+                 max_bytes=RESPONSE_CACHE_MAX_BYTES)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    if RESPONSE_CACHE_ENABLED:
+        with response_cache_lock:
+            try:
+                stats['entries'], stats['bytes'] = open_response_cache().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            except Exception:
+                pass
+    return stats
+
+
+def clear_response_cache():
+    """Delete every cached reply. Returns False if the cache couldn't be opened or written."""
+    import sqlite3
+    with response_cache_lock:
+        try:
+            open_response_cache().execute("DELETE FROM responses")
+        except (sqlite3.Error, OSError):
+            return False
+    return True
+
+
+def format_response_cache_stats(stats):
+    """Format get_response_cache_stats for display."""
+    state = "on" if stats['enabled'] else "off"
+    return (f"[OK] Response cache ({state}): {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['stores']} stored, {stats['evictions']} evicted\n"
+            f"   {stats['entries']} replies, {format_file_size(stats['bytes'])} of "
+            f"{format_file_size(stats['max_bytes'])}")
+
+
+# A known outcome (real call or probe) is trusted this long before a background probe refreshes it
+GEMINI_HEALTH_TTL = 300.0
+# Consecutive failed calls that open the circuit
+GEMINI_FAILURE_THRESHOLD = 3
+# How long an open circuit fails fast before letting a trial call through
+GEMINI_OPEN_COOLDOWN = 30.0
+
+gemini_health = {
+    # 'closed' (calls go through), 'open' (calls fail fast) or 'half_open' (one trial call allowed)
+    'state': 'closed',
+    'failures': 0,
+    'checked_at': 0.0,
+    'opened_at': 0.0,
+    'trial_at': 0.0,
+    'probing': False,
+    'last_error': None
+}
+gemini_health_lock = threading.Lock()
+
+
+def is_gemini_outage(error):
+    """
+    Whether a failed call says the API is unusable, as opposed to a bad
+    request: server and connection errors, auth failures and rate limits.
+    """
+    from google.genai import errors
+    if isinstance(error, errors.ClientError):
+        return error.code in (401, 403, 429)
+    return True
+
+
+def record_gemini_result(error=None):
+    """Feed the outcome of a real Gemini call (or probe) into the circuit breaker."""
+    with gemini_health_lock:
+        gemini_health['checked_at'] = time.time()
+        if error is None or not is_gemini_outage(error):
+            gemini_health['state'] = 'closed'
+            gemini_health['failures'] = 0
+            return
+        gemini_health['failures'] += 1
+        gemini_health['last_error'] = str(error)
+        if gemini_health['state'] == 'half_open' or gemini_health['failures'] >= GEMINI_FAILURE_THRESHOLD:
+            gemini_health['state'] = 'open'
+            gemini_health['opened_at'] = time.time()
+
+
+def probe_gemini():
+    """List models in the background to refresh a stale health state."""
+    try:
+        client.models.list()
+        record_gemini_result()
+    except Exception as e:
+        record_gemini_result(e)
+    finally:
+        with gemini_health_lock:
+            gemini_health['probing'] = False
+
+
 def check_gemini_available():
-    """Check if Gemini API is available and configured"""
+    """
+    Check if Gemini API is available and configured, without a network round
+    trip: real calls report their outcome through record_gemini_result, and a
+    stale state is refreshed by a background probe. After repeated failures
+    the circuit opens and calls fail fast until a trial call succeeds.
+    """
     if not GEMINI_API_KEY or GEMINI_API_KEY == "YOUR_API_KEY_HERE":
         return False
-    try:
-        # Test the API by listing models (lightweight check)
-        client.models.list()
+    now = time.time()
+    with gemini_health_lock:
+        state = gemini_health['state']
+        if state != 'closed':
+            if now - max(gemini_health['opened_at'], gemini_health['trial_at']) < GEMINI_OPEN_COOLDOWN:
+                return False
+            # Let this call through as the trial; its outcome closes or re-opens the circuit
+            gemini_health['state'] = 'half_open'
+            gemini_health['trial_at'] = now
+            return True
+        if now - gemini_health['checked_at'] > GEMINI_HEALTH_TTL and not gemini_health['probing']:
+            gemini_health['probing'] = True
+            threading.Thread(target=probe_gemini, name="gemini-probe", daemon=True).start()
         return True
-    except Exception:
-        return False
 
 
 
@@ -1995,6 +6183,7 @@ def backup_file(path):
         backup_path = f"{path}.backup_{timestamp}"
         
         shutil.copy2(path, backup_path)
+        index_refresh_path(backup_path)
         return backup_path
     except Exception as e:
         return None
@@ -2064,7 +6253,8 @@ def debug_file_basic(path):
     """Basic debug functionality without AI auto-fix"""
     try:
         # First, try to find the file by searching recursively
-        full_path = find_file_recursive(path)
+        candidates = resolve_file_candidates(path)
+        full_path = candidates[0] if candidates else None
 
         # If not found by recursive search, try direct paths
         if not full_path:
@@ -2082,7 +6272,11 @@ def debug_file_basic(path):
         if not full_path or not os.path.exists(full_path):
             return f"[ERROR] File '{path}' not found in workspace or any subdirectory."
 
+        note_path_access(full_path)
         result_lines = [f"[DEBUGGING] Analyzing file '{full_path}' (basic check)..."]
+        ambiguity = describe_other_candidates(path, full_path, candidates)
+        if ambiguity:
+            result_lines.append(ambiguity)
 
         with open(full_path, "r") as f:
             content = f.read()
@@ -2123,28 +6317,232 @@ def debug_file_basic(path):
         return f"[ERROR] {e}"
 
 
-def process_message(user_input, conversation_history=""):
-    """Process user message and return AI response"""
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("VIBECODING_HISTORY_TOKENS", "8000"))
+# The newest turns are sent as written; older ones have their code blocks elided
+CONVERSATION_RECENT_TURNS = 3
+# One line per turn folded out of the history; the oldest lines go first
+CONVERSATION_SUMMARY_LINES = 30
+# File contents and code blocks longer than this are replaced by a short reference
+HISTORY_ELIDE_MIN_CHARS = 400
+CODE_BLOCK_PATTERN = re.compile(r"```[^\n`]*\n.*?```", re.DOTALL)
+
+
+def new_conversation():
+    """Create an empty conversation: recent turns plus a summary of the ones folded away."""
+    return {
+        'turns': [],
+        'summary': [],
+        'summary_tokens': 0,
+        'tokens': 0,
+        # Rendered history text, reused until the next turn
+        'rendered': None
+    }
+
+
+def elided_content_note(content, path):
+    """The placeholder that stands in for a file body in the history."""
+    lines = content.count('\n') + 1
+    return f"<{lines} lines elided, see {path}>" if path else f"<{lines} lines elided>"
+
+
+def elide_reply_actions(reply, actions):
+    """
+    Replace the file bodies in a reply's JSON actions with references to the
+    files they were written to, appending "action path" descriptions to actions.
+    """
+    decoder = json.JSONDecoder()
+    parts = []
+    pos = 0
+    start = reply.find('{')
+    while start >= 0:
+        try:
+            obj, end = decoder.raw_decode(reply, start)
+        except ValueError:
+            start = reply.find('{', start + 1)
+            continue
+        if isinstance(obj, dict) and isinstance(obj.get("action"), str):
+            path = obj.get("path") or obj.get("filename") or obj.get("file") or obj.get("folder") or obj.get("name")
+            actions.append(f"{obj['action']} {path}" if isinstance(path, str) else obj['action'])
+            changed = False
+            if isinstance(obj.get("content"), str) and len(obj["content"]) > HISTORY_ELIDE_MIN_CHARS:
+                obj["content"] = elided_content_note(obj["content"], path)
+                changed = True
+            folder = obj.get("folder") if isinstance(obj.get("folder"), str) else ""
+            for file_info in obj.get("files") if isinstance(obj.get("files"), list) else []:
+                if isinstance(file_info, dict) and isinstance(file_info.get("content"), str) \
+                        and len(file_info["content"]) > HISTORY_ELIDE_MIN_CHARS:
+                    file_path = file_info.get("path")
+                    file_path = os.path.join(folder, file_path) if isinstance(file_path, str) else None
+                    file_info["content"] = elided_content_note(file_info["content"], file_path)
+                    changed = True
+            if changed:
+                parts.append(reply[pos:start])
+                parts.append(json.dumps(obj))
+                pos = end
+        start = reply.find('{', end)
+    parts.append(reply[pos:])
+    return "".join(parts)
+
+
+def elide_code_blocks(text):
+    """Replace long fenced code blocks with a line count."""
+    def replace(match):
+        block = match.group(0)
+        if len(block) <= HISTORY_ELIDE_MIN_CHARS:
+            return block
+        return f"```\n<{block.count(chr(10)) - 1} lines of code elided>\n```"
+    return CODE_BLOCK_PATTERN.sub(replace, text)
+
+
+def add_conversation_turn(conversation, user_input, assistant_reply):
+    """
+    Record a finished turn, then fold the oldest turns into the summary until
+    the history fits CONVERSATION_TOKEN_BUDGET. Token counts are computed once
+    per turn here, never when the history is rendered.
+    """
+    actions = []
+    text = f"User: {user_input}\nAssistant: {elide_reply_actions(assistant_reply, actions)}\n"
+    compact = elide_code_blocks(text)
+    conversation['turns'].append({
+        'user': user_input,
+        'actions': actions,
+        'text': text,
+        'tokens': estimate_tokens(text),
+        'compact': compact,
+        'compact_tokens': estimate_tokens(compact),
+        # Set when even the newest turn has to be sent in its compact form
+        'squeezed': False
+    })
+    conversation['rendered'] = None
+    trim_conversation(conversation)
+
+
+def conversation_turn_tokens(conversation, position):
+    """Tokens a turn adds to the rendered history, by its position from the start."""
+    turn = conversation['turns'][position]
+    recent = position >= len(conversation['turns']) - CONVERSATION_RECENT_TURNS
+    return turn['tokens'] if recent and not turn['squeezed'] else turn['compact_tokens']
+
+
+def summarize_turn(turn):
+    """A one-line digest of a turn for the conversation summary."""
+    request = " ".join(turn['user'].split())
+    if len(request) > 120:
+        request = request[:117] + "..."
+    line = f"- User: {request}"
+    if turn['actions']:
+        line += f" -> {', '.join(turn['actions'][:5])}"
+    return line
+
+
+def trim_conversation(conversation):
+    """Fold old turns into the summary, then squeeze the last turn, until the history fits the budget."""
+    turns = conversation['turns']
+    budget = CONVERSATION_TOKEN_BUDGET
+    total = conversation['summary_tokens'] + sum(conversation_turn_tokens(conversation, i) for i in range(len(turns)))
+    while total > budget and len(turns) > 1:
+        line = summarize_turn(turns.pop(0))
+        conversation['summary'].append(line)
+        conversation['summary_tokens'] += estimate_tokens(line) + 1
+        if len(conversation['summary']) > CONVERSATION_SUMMARY_LINES:
+            conversation['summary_tokens'] -= estimate_tokens(conversation['summary'].pop(0)) + 1
+        # Dropping a turn can move another one out of the recent window, so count again
+        total = conversation['summary_tokens'] + sum(conversation_turn_tokens(conversation, i) for i in range(len(turns)))
+    
+    if total > budget and turns:
+        turn = turns[-1]
+        total -= conversation_turn_tokens(conversation, len(turns) - 1)
+        turn['squeezed'] = True
+        room = max(budget - total, 0) * OUTLINE_CHARS_PER_TOKEN
+        if turn['compact_tokens'] * OUTLINE_CHARS_PER_TOKEN > room:
+            suffix = "\n... (truncated)\n"
+            turn['compact'] = turn['compact'][:max(room - len(suffix), 0)] + suffix
+            turn['compact_tokens'] = estimate_tokens(turn['compact'])
+        total += turn['compact_tokens']
+    conversation['tokens'] = total
+
+
+def render_conversation(conversation):
+    """The history text for prompts, in the same "User: ... Assistant: ..." form as each turn."""
+    if conversation['rendered'] is None:
+        parts = []
+        if conversation['summary']:
+            parts.append("Earlier in this conversation:\n" + "\n".join(conversation['summary']) + "\n")
+        turns = conversation['turns']
+        for position, turn in enumerate(turns):
+            recent = position >= len(turns) - CONVERSATION_RECENT_TURNS
+            parts.append(turn['text'] if recent and not turn['squeezed'] else turn['compact'])
+        conversation['rendered'] = "".join(parts)
+    return conversation['rendered']
+
+
+def process_message(user_input, conversation_history="", on_delta=None):
+    """
+    Process user message and return AI response. With on_delta, the reply is
+    streamed and each piece of text is passed to on_delta as it arrives.
+    """
     # Check for simple greetings that don't need AI
     greeting_keywords = ['hi', 'hello', 'hey', 'help', 'start']
     user_lower = user_input.lower().strip()
     if any(user_lower.startswith(kw) for kw in greeting_keywords) and len(user_input) < 20:
         return "Hello! Great to connect. What are we building today?"
 
-    # Check if Gemini API is available for actual AI processing
-    if not check_gemini_available():
-        return "Error: Cannot connect to Gemini API. Please check your API key configuration.\n\nMake sure GEMINI_API_KEY is set correctly in the backend configuration."
-
     try:
-        full_prompt = f"{SYSTEM_PROMPT}\n\nConversation history:\n{conversation_history}\n\nUser: {user_input}\nAssistant:"
+        # Real paths up front save the "file not found, search, retry" round trips
+        outline = get_workspace_outline()
+        outline_section = f"\n\nWorkspace outline:\n{outline}" if outline else ""
+        full_prompt = f"{SYSTEM_PROMPT}{outline_section}\n\nConversation history:\n{conversation_history}\n\nUser: {user_input}\nAssistant:"
+
+        # Replies are keyed on what shapes them: the system prompt, history, user input and
+        # a hash of the outline. The outline is structural (names only), so editing a
+        # file's contents doesn't invalidate the cache; adding or removing one does
+        import hashlib
+        outline_hash = hashlib.sha256(outline.encode('utf-8', errors='surrogatepass')).hexdigest()
+        cache_contents = [SYSTEM_PROMPT, outline_hash, conversation_history, user_input]
+
+        # A cached reply needs no API call, so it is served even when Gemini is unreachable
+        cached_reply = response_cache_get(GEMINI_MODEL, cache_contents)
+        if cached_reply is not None:
+            if on_delta is not None:
+                on_delta(cached_reply)
+            return cached_reply
+
+        # Check if Gemini API is available for actual AI processing
+        if not check_gemini_available():
+            return "Error: Cannot connect to Gemini API. Please check your API key configuration.\n\nMake sure GEMINI_API_KEY is set correctly in the backend configuration."
+
+        if on_delta is None:
+            # Use Gemini API with new client
+            try:
+                response = client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=full_prompt
+                )
+            except Exception as e:
+                record_gemini_result(e)
+                raise
+            record_gemini_result()
 
-        # Use Gemini API with new client
-        response = client.models.generate_content(
-            model=GEMINI_MODEL,
-            contents=full_prompt
-        )
+            assistant_reply = response.text.strip()
+            response_cache_put(GEMINI_MODEL, cache_contents, assistant_reply)
+            return assistant_reply
 
-        assistant_reply = response.text.strip()
+        parts = []
+        try:
+            for chunk in client.models.generate_content_stream(model=GEMINI_MODEL, contents=full_prompt):
+                if chunk.text:
+                    parts.append(chunk.text)
+                    on_delta(chunk.text)
+        except Exception as e:
+            record_gemini_result(e)
+            if not parts:
+                raise
+            # Keep what already reached the user, but don't cache a broken reply
+            parts.append(f"\n\nError: {str(e)}")
+            return "".join(parts).strip()
+        record_gemini_result()
+        assistant_reply = "".join(parts).strip()
+        response_cache_put(GEMINI_MODEL, cache_contents, assistant_reply)
         return assistant_reply
 
 
@@ -2152,9 +6550,267 @@ def process_message(user_input, conversation_history=""):
         return f"Error: {str(e)}"
 
 
+def stream_chat_actions(user_input, conversation_history="", on_delta=None):
+    """
+    Generate a reply on a worker thread and yield IncrementalJSONScanner events
+    as soon as the text completing them arrives, so actions run while the
+    model is still writing. 'object' events also carry the reply up to that
+    point. The last event is ('done', reply).
+    """
+    import queue
+    events = queue.Queue()
+    scanner = IncrementalJSONScanner()
+    
+    def scan(text):
+        found = scanner.feed(text)
+        # Actions get the reply written so far as context
+        reply_so_far = scanner.text if any(event[0] == 'object' for event in found) else ""
+        for event in found:
+            events.put(event + (reply_so_far,) if event[0] == 'object' else event)
+    
+    def on_text(text):
+        if on_delta is not None:
+            on_delta(text)
+        scan(text)
+    
+    def generate():
+        reply = ""
+        try:
+            reply = process_message(user_input, conversation_history, on_delta=on_text)
+            if not scanner.length:
+                # Greetings and errors come back without streaming
+                scan(reply)
+        finally:
+            events.put(('done', reply))
+    
+    threading.Thread(target=generate, name="chat-reply", daemon=True).start()
+    while True:
+        event = events.get()
+        yield event
+        if event[0] == 'done':
+            return
+
+
+def stream_project_file(projects, start, header, idx, file_info):
+    """
+    Write a create_project file entry while the rest of the reply is still
+    being generated. projects maps the action's start offset to its state.
+    """
+    action = header.get("action") or header.get("intent")
+    folder = header.get("folder") or header.get("name") or header.get("project")
+    if not isinstance(action, str) or action.strip().lower() not in ("create_project", "create project", "createproject"):
+        return
+    if not folder or not isinstance(folder, str):
+        # The folder comes after the files; everything is written once the action is complete
+        return
+    if start not in projects:
+        try:
+            projects[start] = start_project(folder)
+        except OSError:
+            # create_project reports it when the action is complete
+            return
+    write_project_file(projects[start], idx, file_info)
+
+
+def execute_chat_action(action_data, conversation_history, action_results, project=None):
+    """
+    Run one JSON action from a chat reply, appending its output to action_results.
+    project is the state of a create_project whose files were partly written
+    while the reply streamed. Returns False when later actions must wait for
+    the user to confirm this one.
+    """
+    global pending_confirmation
+    try:
+        action = action_data.get("action") or action_data.get("intent")
+        if isinstance(action, str):
+            act = action.strip().lower()
+        else:
+            act = action
+
+        if act in ("create_folder", "create folder", "createfolder"):
+            folder = action_data.get("folder") or action_data.get("name")
+            if folder:
+                result = create_folder(folder)
+                action_results.append(result)
+            else:
+                action_results.append("Qwen: missing folder name")
+
+        elif act in ("create_project", "create project", "createproject"):
+            folder = action_data.get("folder") or action_data.get("name") or action_data.get("project")
+            files = action_data.get("files", [])
+            if folder and files:
+                result = create_project(folder, files, project)
+                action_results.append(result)
+            else:
+                action_results.append("Qwen: missing folder name or files list")
+
+        elif act in ("create_file", "create file", "createfile"):
+            path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
+            content = action_data.get("content", "")
+            if path:
+                result = create_file(path, content)
+                # Check if confirmation is required
+                if result.startswith("[CONFIRMATION_REQUIRED]"):
+                    pending_confirmation = {
+                        "action": "create_file",
+                        "path": path,
+                        "content": content
+                    }
+                    send_confirmation_request(result, pending_confirmation)
+                    action_results.append(result)
+                    # Don't process further actions until confirmation received
+                    return False
+                else:
+                    action_results.append(result)
+            else:
+                action_results.append("Qwen: missing path")
+
+        elif act in ("update_file", "update file", "updatefile"):
+            path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
+            content = action_data.get("content", "")
+            if path:
+                # Check if file exists in main directory first
+                main_path = os.path.join(WORKSPACE_PATH, path)
+                if os.path.exists(main_path):
+                    # Update file in main directory
+                    result = update_file(path, content)
+                    action_results.append(result)
+                else:
+                    # Check if file exists in subdirectory
+                    existing_path = find_file_recursive(path)
+                    if existing_path:
+                        # Ask for confirmation to modify existing
+                        result = update_file(path, content)
+                        if result.startswith("[CONFIRMATION_REQUIRED]"):
+                            pending_confirmation = {
+                                "action": "update_file",
+                                "path": path,
+                                "content": content
+                            }
+                            send_confirmation_request(result, pending_confirmation)
+                            action_results.append(result)
+                            # Don't process further actions until confirmation received
+                            return False
+                        else:
+                            action_results.append(result)
+                    else:
+                        # Create new file
+                        result = create_file(path, content)
+                        action_results.append(f"[INFO] File '{path}' did not exist. Created new file.")
+                        action_results.append(result)
+            else:
+                action_results.append("Qwen: missing path")
+
+        elif act in ("debug_file", "debug file", "debugfile"):
+            path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
+            debug_stage = action_data.get("stage", "all")
+            if path:
+                result = debug_file(path, conversation_history, debug_stage)
+                action_results.append(result)
+            else:
+                action_results.append("Qwen: missing path")
+
+        elif act in ("run_file", "run file", "runfile", "test_file", "test file", "testfile"):
+            path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
+            environment = action_data.get("environment", "none")
+            if path:
+                result = run_file(path, environment)
+                action_results.append(result)
+            else:
+                action_results.append("Qwen: missing path")
+
+        elif act in ("search_files", "search files", "searchfiles"):
+            keyword = action_data.get("keyword") or action_data.get("search") or action_data.get("query")
+            file_type = action_data.get("file_type") or action_data.get("extension")
+            max_results = action_data.get("max_results", 10)
+            if keyword:
+                if STREAM_SEARCH_RESULTS:
+                    result = stream_search("files", find_files_by_keyword, keyword, file_type, max_results)
+                else:
+                    results = find_files_by_keyword(keyword, file_type, max_results)
+                    result = format_search_results(results, "files")
+                action_results.append(result)
+            else:
+                action_results.append("[ERROR] Missing search keyword")
+
+        elif act in ("search_folders", "search folders", "searchfolders"):
+            keyword = action_data.get("keyword") or action_data.get("search") or action_data.get("query")
+            max_results = action_data.get("max_results", 10)
+            if keyword:
+                if STREAM_SEARCH_RESULTS:
+                    result = stream_search("folders", find_folders_by_keyword, keyword, max_results)
+                else:
+                    results = find_folders_by_keyword(keyword, max_results)
+                    result = format_search_results(results, "folders")
+                action_results.append(result)
+            else:
+                action_results.append("[ERROR] Missing search keyword")
+
+        elif act in ("search_in_files", "search in files", "searchinfiles", "grep"):
+            keyword = action_data.get("keyword") or action_data.get("search") or action_data.get("query")
+            file_pattern = action_data.get("file_pattern") or action_data.get("pattern") or "*"
+            max_results = action_data.get("max_results", 10)
+            search_options = content_search_options(action_data)
+            if keyword:
+                if STREAM_SEARCH_RESULTS:
+                    result = stream_search("content matches", search_in_file_content, keyword, file_pattern, max_results, **search_options)
+                else:
+                    results = search_in_file_content(keyword, file_pattern, max_results, **search_options)
+                    result = format_search_results(results, "content matches")
+                action_results.append(result)
+            else:
+                action_results.append("[ERROR] Missing search keyword")
+
+        elif act in ("semantic_search", "semantic search", "semanticsearch"):
+            query = action_data.get("query") or action_data.get("keyword") or action_data.get("search")
+            max_results = action_data.get("max_results", 10)
+            if query:
+                if STREAM_SEARCH_RESULTS:
+                    result = stream_search("semantic matches", semantic_search, query, max_results)
+                else:
+                    results = semantic_search(query, max_results)
+                    result = format_search_results(results, "semantic matches")
+                action_results.append(result)
+            else:
+                action_results.append("[ERROR] Missing search query")
+
+        elif act in ("find_symbol", "find symbol", "findsymbol", "goto_definition", "find_definition"):
+            symbol_name = action_data.get("name") or action_data.get("symbol") or action_data.get("keyword")
+            kind = action_data.get("kind")
+            max_results = action_data.get("max_results", 20)
+            if symbol_name:
+                if STREAM_SEARCH_RESULTS:
+                    result = stream_search("symbols", find_symbols, symbol_name, kind, max_results)
+                else:
+                    results = find_symbols(symbol_name, kind, max_results)
+                    result = format_search_results(results, "symbols")
+                action_results.append(result)
+            else:
+                action_results.append("[ERROR] Missing symbol name")
+
+        elif act in ("import_graph", "find_dependents", "find_dependencies", "dependents", "dependencies"):
+            path = action_data.get("path") or action_data.get("file") or action_data.get("filename")
+            if path:
+                relations = find_import_relations(path, action_data.get("transitive", True))
+                action_results.append(format_import_relations(relations))
+            else:
+                action_results.append("[ERROR] Missing file path")
+
+        elif act in ("get_file_info", "get file info", "getfileinfo", "file_info"):
+            path = action_data.get("path") or action_data.get("file") or action_data.get("filename")
+            if path:
+                action_results.append(format_file_info(get_file_info(path)))
+            else:
+                action_results.append("[ERROR] Missing file path")
+    except Exception as e:
+        action_results.append(f"[ERROR] Failed to process action: {e}")
+    return True
+
+
 def main():
-    global WORKSPACE_PATH, pending_confirmation
-    conversation_history = ""
+    global WORKSPACE_PATH, pending_confirmation, STREAM_SEARCH_RESULTS, STREAM_CHAT_RESPONSES, WORKSPACE_MEMORY_BUDGET, OUTLINE_TOKEN_BUDGET
+    global RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_MAX_BYTES, CONVERSATION_TOKEN_BUDGET
+    conversation = new_conversation()
     
     # Send ready signal immediately - don't wait for Gemini API check
     sys.stdout.write(json.dumps({"type": "ready", "text": "Hello.! What would you like to work on today?"}) + "\n")
@@ -2176,6 +6832,25 @@ def main():
                     if not os.path.exists(WORKSPACE_PATH):
                         os.makedirs(WORKSPACE_PATH, exist_ok=True)
                     send_status(f"Workspace set to: {WORKSPACE_PATH}")
+                    # Build the file index once so later lookups don't walk the tree
+                    index = get_workspace_index()
+                    send_status(f"Indexed {len(index['entries'])} workspace entries")
+                if "streamSearchResults" in data:
+                    STREAM_SEARCH_RESULTS = bool(data["streamSearchResults"])
+                if "streamChatResponses" in data:
+                    STREAM_CHAT_RESPONSES = bool(data["streamChatResponses"])
+                if "workspaceMemoryBudgetMB" in data:
+                    WORKSPACE_MEMORY_BUDGET = int(data["workspaceMemoryBudgetMB"]) * 1024 * 1024
+                    with workspace_index_lock:
+                        evict_cold_workspaces()
+                if "workspaceOutlineTokens" in data:
+                    OUTLINE_TOKEN_BUDGET = int(data["workspaceOutlineTokens"])
+                if "responseCache" in data:
+                    RESPONSE_CACHE_ENABLED = bool(data["responseCache"])
+                if "responseCacheMB" in data:
+                    RESPONSE_CACHE_MAX_BYTES = int(data["responseCacheMB"]) * 1024 * 1024
+                if "historyTokenBudget" in data:
+                    CONVERSATION_TOKEN_BUDGET = int(data["historyTokenBudget"])
                 continue
             
             # Handle file operations from TypeScript backend
@@ -2195,36 +6870,64 @@ def main():
                     elif action == "run_file":
                         result = run_file(data.get("path", ""), data.get("environment", "none"))
                     elif action == "search_files":
-                        results = find_files_by_keyword(
-                            data.get("keyword", ""), 
-                            data.get("file_type"), 
-                            data.get("max_results", 10)
-                        )
+                        search_args = (data.get("keyword", ""), data.get("file_type"), data.get("max_results", 10))
+                        if data.get("stream", STREAM_SEARCH_RESULTS):
+                            # search_done already carries the summary
+                            stream_search("files", find_files_by_keyword, *search_args)
+                            continue
+                        results = find_files_by_keyword(*search_args)
                         result = format_search_results(results, "files")
                     elif action == "search_folders":
-                        results = find_folders_by_keyword(
-                            data.get("keyword", ""), 
-                            data.get("max_results", 10)
-                        )
+                        search_args = (data.get("keyword", ""), data.get("max_results", 10))
+                        if data.get("stream", STREAM_SEARCH_RESULTS):
+                            stream_search("folders", find_folders_by_keyword, *search_args)
+                            continue
+                        results = find_folders_by_keyword(*search_args)
                         result = format_search_results(results, "folders")
                     elif action == "search_in_files":
-                        results = search_in_file_content(
-                            data.get("keyword", ""), 
-                            data.get("file_pattern", "*"), 
-                            data.get("max_results", 10)
-                        )
+                        search_args = (data.get("keyword", ""), data.get("file_pattern", "*"), data.get("max_results", 10))
+                        search_options = content_search_options(data)
+                        if data.get("stream", STREAM_SEARCH_RESULTS):
+                            stream_search("content matches", search_in_file_content, *search_args, **search_options)
+                            continue
+                        results = search_in_file_content(*search_args, **search_options)
                         result = format_search_results(results, "content matches")
-                    elif action == "get_file_info":
-                        info = get_file_info(data.get("path", ""))
-                        if "error" in info:
-                            result = f"[ERROR] {info['error']}"
-                        else:
-                            lines = ["[OK] File Information:"]
-                            lines.append("-" * 40)
-                            for key, value in info.items():
-                                if key != "full_path":
-                                    lines.append(f"{key.replace('_', ' ').title()}: {value}")
+                    elif action == "resolve_path":
+                        candidates = resolve_file_candidates(data.get("path", ""))
+                        if candidates:
+                            lines = [f"[OK] {len(candidates)} match(es) for '{data.get('path', '')}', best first:"]
+                            lines.extend(f"{i}. {p}" for i, p in enumerate(candidates, 1))
                             result = "\n".join(lines)
+                        else:
+                            result = f"[ERROR] No file or folder matches '{data.get('path', '')}'"
+                    elif action == "semantic_search":
+                        search_args = (data.get("query", ""), data.get("max_results", 10))
+                        if data.get("stream", STREAM_SEARCH_RESULTS):
+                            stream_search("semantic matches", semantic_search, *search_args)
+                            continue
+                        results = semantic_search(*search_args)
+                        result = format_search_results(results, "semantic matches")
+                    elif action == "find_symbol":
+                        search_args = (data.get("name", ""), data.get("kind"), data.get("max_results", 20))
+                        if data.get("stream", STREAM_SEARCH_RESULTS):
+                            stream_search("symbols", find_symbols, *search_args)
+                            continue
+                        results = find_symbols(*search_args)
+                        result = format_search_results(results, "symbols")
+                    elif action == "import_graph":
+                        relations = find_import_relations(data.get("path", ""), data.get("transitive", True))
+                        result = format_import_relations(relations)
+                    elif action == "workspace_outline":
+                        outline = get_workspace_outline(data.get("max_tokens"), data.get("max_depth", OUTLINE_MAX_DEPTH),
+                                                        detailed=True)
+                        result = f"[OK] Workspace outline:\n{outline}" if outline else "[ERROR] No workspace outline available"
+                    elif action == "response_cache_stats":
+                        cleared = clear_response_cache() if data.get("clear") else True
+                        result = format_response_cache_stats(get_response_cache_stats())
+                        if not cleared:
+                            result = "[ERROR] Could not clear the response cache\n" + result
+                    elif action == "get_file_info":
+                        result = format_file_info(get_file_info(data.get("path", "")))
                     else:
                         result = f"[ERROR] Unknown file operation: {action}"
                     
@@ -2398,177 +7101,50 @@ def main():
                             send_response(website_result.get("message"))
                             continue
                     
-                    # Process the message normally with Gemini
-                    assistant_reply = process_message(user_input, conversation_history)
-                    
-                    # Update conversation history
-                    conversation_history += f"User: {user_input}\nAssistant: {assistant_reply}\n"
+                    # Process the message with Gemini, running each JSON action as soon
+                    # as the model has finished writing it
+                    stream_reply = data.get("stream", STREAM_CHAT_RESPONSES)
+                    conversation_history = render_conversation(conversation)
+                    action_results = []
+                    projects = {}
+                    run_actions = True
+                    for event in stream_chat_actions(user_input, conversation_history,
+                                                     on_delta=send_delta if stream_reply else None):
+                        if event[0] == 'done':
+                            assistant_reply = event[1]
+                        elif not run_actions:
+                            continue
+                        elif event[0] == 'file':
+                            stream_project_file(projects, *event[1:])
+                        else:
+                            turn_history = conversation_history + f"User: {user_input}\nAssistant: {event[3]}\n"
+                            run_actions = execute_chat_action(event[2], turn_history, action_results,
+                                                              projects.pop(event[1], None))
                     
-                    # Extract and execute JSON actions
-                    json_objects = extract_json_objects(assistant_reply)
+                    # The reply broke off inside a create_project, after some of its files were written
+                    for project in projects.values():
+                        action_results.append(summarize_project(
+                            project, "[WARNING] The reply ended before the create_project action was complete."))
                     
-                    action_results = []
-                    if json_objects:
-                        for action_data in json_objects:
-                            try:
-                                action = action_data.get("action") or action_data.get("intent")
-                                if isinstance(action, str):
-                                    act = action.strip().lower()
-                                else:
-                                    act = action
-
-                                if act in ("create_folder", "create folder", "createfolder"):
-                                    folder = action_data.get("folder") or action_data.get("name")
-                                    if folder:
-                                        result = create_folder(folder)
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("Qwen: missing folder name")
-
-                                elif act in ("create_project", "create project", "createproject"):
-                                    folder = action_data.get("folder") or action_data.get("name") or action_data.get("project")
-                                    files = action_data.get("files", [])
-                                    if folder and files:
-                                        result = create_project(folder, files)
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("Qwen: missing folder name or files list")
-
-                                elif act in ("create_file", "create file", "createfile"):
-                                    path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
-                                    content = action_data.get("content", "")
-                                    if path:
-                                        result = create_file(path, content)
-                                        # Check if confirmation is required
-                                        if result.startswith("[CONFIRMATION_REQUIRED]"):
-                                            pending_confirmation = {
-                                                "action": "create_file",
-                                                "path": path,
-                                                "content": content
-                                            }
-                                            send_confirmation_request(result, pending_confirmation)
-                                            action_results.append(result)
-                                            # Don't process further actions until confirmation received
-                                            break
-                                        else:
-                                            action_results.append(result)
-                                    else:
-                                        action_results.append("Qwen: missing path")
-
-                                elif act in ("update_file", "update file", "updatefile"):
-                                    path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
-                                    content = action_data.get("content", "")
-                                    if path:
-                                        # Check if file exists in main directory first
-                                        main_path = os.path.join(WORKSPACE_PATH, path)
-                                        if os.path.exists(main_path):
-                                            # Update file in main directory
-                                            result = update_file(path, content)
-                                            action_results.append(result)
-                                        else:
-                                            # Check if file exists in subdirectory
-                                            existing_path = find_file_recursive(path)
-                                            if existing_path:
-                                                # Ask for confirmation to modify existing
-                                                result = update_file(path, content)
-                                                if result.startswith("[CONFIRMATION_REQUIRED]"):
-                                                    pending_confirmation = {
-                                                        "action": "update_file",
-                                                        "path": path,
-                                                        "content": content
-                                                    }
-                                                    send_confirmation_request(result, pending_confirmation)
-                                                    action_results.append(result)
-                                                    # Don't process further actions until confirmation received
-                                                    break
-                                                else:
-                                                    action_results.append(result)
-                                            else:
-                                                # Create new file
-                                                result = create_file(path, content)
-                                                action_results.append(f"[INFO] File '{path}' did not exist. Created new file.")
-                                                action_results.append(result)
-                                    else:
-                                        action_results.append("Qwen: missing path")
-
-                                elif act in ("debug_file", "debug file", "debugfile"):
-                                    path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
-                                    debug_stage = action_data.get("stage", "all")
-                                    if path:
-                                        result = debug_file(path, conversation_history, debug_stage)
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("Qwen: missing path")
-
-                                elif act in ("run_file", "run file", "runfile", "test_file", "test file", "testfile"):
-                                    path = action_data.get("path") or action_data.get("filename") or action_data.get("file")
-                                    environment = action_data.get("environment", "none")
-                                    if path:
-                                        result = run_file(path, environment)
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("Qwen: missing path")
-
-                                elif act in ("search_files", "search files", "searchfiles"):
-                                    keyword = action_data.get("keyword") or action_data.get("search") or action_data.get("query")
-                                    file_type = action_data.get("file_type") or action_data.get("extension")
-                                    max_results = action_data.get("max_results", 10)
-                                    if keyword:
-                                        results = find_files_by_keyword(keyword, file_type, max_results)
-                                        result = format_search_results(results, "files")
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("[ERROR] Missing search keyword")
-
-                                elif act in ("search_folders", "search folders", "searchfolders"):
-                                    keyword = action_data.get("keyword") or action_data.get("search") or action_data.get("query")
-                                    max_results = action_data.get("max_results", 10)
-                                    if keyword:
-                                        results = find_folders_by_keyword(keyword, max_results)
-                                        result = format_search_results(results, "folders")
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("[ERROR] Missing search keyword")
-
-                                elif act in ("search_in_files", "search in files", "searchinfiles", "grep"):
-                                    keyword = action_data.get("keyword") or action_data.get("search") or action_data.get("query")
-                                    file_pattern = action_data.get("file_pattern") or action_data.get("pattern") or "*"
-                                    max_results = action_data.get("max_results", 10)
-                                    if keyword:
-                                        results = search_in_file_content(keyword, file_pattern, max_results)
-                                        result = format_search_results(results, "content matches")
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("[ERROR] Missing search keyword")
-
-                                elif act in ("get_file_info", "get file info", "getfileinfo", "file_info"):
-                                    path = action_data.get("path") or action_data.get("file") or action_data.get("filename")
-                                    if path:
-                                        info = get_file_info(path)
-                                        if 'error' in info:
-                                            result = f"[ERROR] {info['error']}"
-                                        else:
-                                            lines = ["[OK] File Information:"]
-                                            lines.append("-" * 40)
-                                            for key, value in info.items():
-                                                if key != 'full_path':
-                                                    lines.append(f"{key.replace('_', ' ').title()}: {value}")
-                                            result = "\n".join(lines)
-                                        action_results.append(result)
-                                    else:
-                                        action_results.append("[ERROR] Missing file path")
-
-                            except Exception as e:
-                                action_results.append(f"[ERROR] Failed to process action: {e}")
+                    # Update conversation history
+                    add_conversation_turn(conversation, user_input, assistant_reply)
                     
                     # Send response back to VS Code:
                     if action_results:
                         full_response = assistant_reply + "\n\n" + "\n".join(action_results)
-                        send_response(full_response)
+                        send_response(full_response, streamed=stream_reply)
                     else:
-                        send_response(assistant_reply)
+                        send_response(assistant_reply, streamed=stream_reply)
                         
             elif data.get("type") == "exit":
+                if workspace_index is not None:
+                    save_workspace_index(workspace_index, force=True)
+                if trigram_index is not None:
+                    save_trigram_index(trigram_index, force=True)
+                if symbol_index is not None:
+                    save_symbol_index(symbol_index, force=True)
+                if semantic_index is not None:
+                    save_semantic_index(semantic_index, force=True)
                 break
         except json.JSONDecodeError as e:
             # Log the problematic line for debugging
@@ -0,0 +1,82 @@
+"""
+Benchmark the serial and parallel content search on a synthetic workspace.
+
+Usage: python benchmark_search.py [file_count] [lines_per_file] [--cold]
+
+--cold drops the OS page cache before every run (Linux, needs root) so the
+numbers reflect disk reads rather than cached ones.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# backend.py exits without an API key; searching doesn't need a real one
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import backend
+
+
+def create_workspace(root, file_count, lines_per_file):
+    """Write file_count Python files spread over nested folders."""
+    words = ['alpha', 'beta', 'gamma', 'delta', 'request', 'handler', 'config', 'value', 'result', 'index']
+    rng = random.Random(42)
+    for i in range(file_count):
+        folder = os.path.join(root, f"pkg{i % 20}", f"mod{i % 7}")
+        os.makedirs(folder, exist_ok=True)
+        lines = [' '.join(rng.choice(words) for _ in range(10)) for _ in range(lines_per_file)]
+        # A rare token that only a few files contain, so the scan has to visit everything
+        if i % 500 == 499:
+            lines.append("needle_token = True")
+        with open(os.path.join(folder, f"file_{i}.py"), "w", encoding="utf-8") as f:
+            f.write('\n'.join(lines))
+
+
+def drop_page_cache():
+    """Ask the kernel to drop clean cached pages."""
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("3\n")
+
+
+def time_search(keyword, parallel, cold=False, runs=3):
+    """Return the best wall time over a few runs, plus the results of the last run."""
+    best = None
+    results = None
+    for _ in range(runs):
+        if cold:
+            drop_page_cache()
+        start = time.perf_counter()
+        results = backend.search_in_file_content(keyword, "*.py", 1000, parallel=parallel)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    cold = "--cold" in sys.argv
+    file_count = int(args[0]) if len(args) > 0 else 5000
+    lines_per_file = int(args[1]) if len(args) > 1 else 200
+
+    root = tempfile.mkdtemp(prefix="vibecoding-bench-")
+    try:
+        print(f"Creating {file_count} files x {lines_per_file} lines in {root}...")
+        create_workspace(root, file_count, lines_per_file)
+        backend.WORKSPACE_PATH = root
+
+        serial_time, serial_results = time_search("needle_token", parallel=False, cold=cold)
+        parallel_time, parallel_results = time_search("needle_token", parallel=True, cold=cold)
+
+        print(f"Serial:   {serial_time:.3f}s ({len(serial_results)} matches)")
+        print(f"Parallel: {parallel_time:.3f}s ({len(parallel_results)} matches, {backend.SEARCH_WORKERS} workers)")
+        print(f"Speedup:  {serial_time / parallel_time:.2f}x")
+        print(f"Same results: {serial_results == parallel_results}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import tempfile
+import time
+import types
+
+# backend reads these at import time: it refuses to start without an API key,
+# and its caches must not touch the user's real cache folder
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ["VIBECODING_CACHE_DIR"] = tempfile.mkdtemp(prefix="vibecoding-tests-")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Return a function that writes {relative path: content} into a fresh
+    folder and makes it the backend's indexed workspace (without starting
+    the watcher or the background index builds). Paths ending in '/' are
+    created as empty folders; bytes content is written as is.
+    """
+    root = str(tmp_path / "workspace")
+    os.makedirs(root)
+    
+    def make(files=None):
+        for rel_path, content in (files or {}).items():
+            full_path = os.path.join(root, rel_path)
+            if rel_path.endswith('/'):
+                os.makedirs(full_path, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb' if isinstance(content, bytes) else 'w') as f:
+                f.write(content)
+        
+        monkeypatch.setattr(backend, 'WORKSPACE_PATH', root)
+        monkeypatch.setattr(backend, 'workspace_index', backend.build_workspace_index(root))
+        for name in ('trigram_index', 'symbol_index', 'semantic_index'):
+            monkeypatch.setattr(backend, name, None)
+        monkeypatch.setattr(backend, 'workspace_registry', {})
+        monkeypatch.setattr(backend, 'recent_paths', {})
+        backend.stat_cache.clear()
+        return root
+    
+    return make
+
+
+class FakeModels:
+    """Stands in for client.models: replies with queued texts (str, list of stream chunks, or an exception)."""
+    
+    def __init__(self):
+        self.replies = []
+        self.prompts = []
+    
+    def next_reply(self, contents):
+        self.prompts.append(contents)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+    
+    def generate_content(self, model, contents, config=None):
+        reply = self.next_reply(contents)
+        return types.SimpleNamespace(text=reply if isinstance(reply, str) else "".join(reply))
+    
+    def generate_content_stream(self, model, contents, config=None):
+        reply = self.next_reply(contents)
+        for chunk in ([reply] if isinstance(reply, str) else reply):
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield types.SimpleNamespace(text=chunk)
+    
+    def list(self):
+        return []
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Replace the Gemini client with a FakeModels and start from a healthy, closed circuit."""
+    models = FakeModels()
+    monkeypatch.setattr(backend, 'client', types.SimpleNamespace(models=models))
+    monkeypatch.setattr(backend, 'gemini_health', dict(backend.gemini_health, state='closed', failures=0,
+                                                       checked_at=time.time(), opened_at=0.0, trial_at=0.0,
+                                                       probing=False, last_error=None))
+    return models
@@ -0,0 +1,77 @@
+import json
+import os
+import struct
+from array import array
+
+import backend
+
+
+def write(tmp_path, **kwargs):
+    path = str(tmp_path / 'test.bin')
+    sections = {'ints': array('i', [1, -2, 3]), 'odd': b"abcde", 'empty': b""}
+    backend.write_cache_file(path, kwargs.get('kind', 'test'), kwargs.get('version', 1), {'root': '/w'}, sections)
+    return path
+
+
+def test_sections_round_trip(tmp_path):
+    header, sections = backend.read_cache_file(write(tmp_path), 'test', 1)
+    assert header['root'] == '/w'
+    assert list(backend.typed_array('i', sections['ints'])) == [1, -2, 3]
+    assert sections['odd'] == b"abcde"
+    assert sections['empty'] == b""
+    assert not os.path.exists(str(tmp_path / 'test.bin.tmp'))
+
+
+def test_wrong_kind_version_or_platform_is_rejected(tmp_path):
+    path = write(tmp_path)
+    assert backend.read_cache_file(path, 'other', 1) is None
+    assert backend.read_cache_file(path, 'test', 2) is None
+    
+    with open(path, 'rb') as f:
+        data = f.read()
+    start = len(backend.CACHE_FILE_MAGIC) + 4
+    size = struct.unpack('<I', data[len(backend.CACHE_FILE_MAGIC):start])[0]
+    header = json.loads(data[start:start + size])
+    header['byteorder'] = 'big' if header['byteorder'] == 'little' else 'little'
+    patched = json.dumps(header).encode().ljust(size)
+    with open(path, 'wb') as f:
+        f.write(data[:start] + patched + data[start + size:])
+    assert backend.read_cache_file(path, 'test', 1) is None
+
+
+def test_corrupt_or_missing_files_are_rejected(tmp_path):
+    path = write(tmp_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    with open(path, 'wb') as f:
+        f.write(b"NOTCACHE\n" + data[9:])
+    assert backend.read_cache_file(path, 'test', 1) is None
+    
+    with open(path, 'wb') as f:
+        f.write(data[:-12])
+    assert backend.read_cache_file(path, 'test', 1) is None
+    
+    with open(path, 'wb') as f:
+        f.write(data[:len(backend.CACHE_FILE_MAGIC) + 10])
+    assert backend.read_cache_file(path, 'test', 1) is None
+    assert backend.read_cache_file(str(tmp_path / 'missing.bin'), 'test', 1) is None
+
+
+def test_workspace_index_round_trips(workspace):
+    root = workspace({'a.py': "x", 'src/b.py': "yy", 'src/deep/c.txt': "", 'empty/': None})
+    index = backend.workspace_index
+    backend.save_workspace_index(index, force=True)
+    
+    loaded = backend.load_workspace_index(root)
+    assert sorted(loaded['entries'].file_paths()) == sorted(index['entries'].file_paths())
+    assert sorted(loaded['entries'].folder_paths()) == sorted(index['entries'].folder_paths())
+    assert loaded['dir_stats'] == index['dir_stats']
+    assert backend.load_workspace_index(os.path.join(root, 'src')) is None
+
+
+def test_workspace_index_from_another_version_is_ignored(workspace, monkeypatch):
+    root = workspace({'a.py': "x"})
+    backend.save_workspace_index(backend.workspace_index, force=True)
+    monkeypatch.setattr(backend, 'WORKSPACE_INDEX_VERSION', backend.WORKSPACE_INDEX_VERSION + 1)
+    assert backend.load_workspace_index(root) is None
@@ -0,0 +1,51 @@
+import mmap
+import os
+
+import backend
+
+
+def lines(buffer, keyword, **kwargs):
+    pattern = backend.build_search_query(keyword, **kwargs)['patterns'][0]
+    return [(l['line_number'], l['content']) for l in backend.scan_buffer_lines(buffer, pattern)]
+
+
+def test_line_numbers_are_counted_only_up_to_each_hit():
+    buffer = b"alpha\nbeta\n\ngamma beta\nbeta\n"
+    assert lines(buffer, 'beta') == [(2, 'beta'), (4, 'gamma beta'), (5, 'beta')]
+    assert lines(buffer, 'BETA') == lines(buffer, 'beta')
+    assert lines(buffer, 'BETA', case_sensitive=True) == []
+
+
+def test_hit_on_the_last_line_without_a_newline():
+    assert lines(b"one\ntwo", 'two') == [(2, 'two')]
+
+
+def test_each_line_is_reported_once():
+    assert lines(b"x x x\nx\n", 'x') == [(1, 'x x x'), (2, 'x')]
+
+
+def test_count_newlines_agrees_across_buffer_types(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, 'NEWLINE_COUNT_CHUNK', 4)
+    data = b"a\nbb\n\nccc\nd\n" * 3
+    path = tmp_path / 'f.txt'
+    path.write_bytes(data)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for start, end in [(0, len(data)), (3, 17), (5, 6)]:
+            expected = data.count(b'\n', start, end)
+            assert backend.count_newlines(buffer, start, end) == expected
+            assert backend.count_newlines(data, start, end) == expected
+            assert backend.count_newlines(data.decode(), start, end) == expected
+
+
+def test_large_files_are_memory_mapped_with_the_same_result(tmp_path, monkeypatch):
+    path = tmp_path / 'big.txt'
+    path.write_bytes(b"filler\n" * 50 + "naïve needle\n".encode() + b"end\n")
+    query = backend.build_search_query('needle')
+    small = backend.match_file_content(str(path), query, str(tmp_path))
+    
+    monkeypatch.setattr(backend, 'SEARCH_MMAP_MIN_SIZE', 1)
+    mapped = backend.match_file_content(str(path), query, str(tmp_path))
+    assert mapped == small
+    assert mapped['lines'] == [{'line_number': 51, 'content': 'naïve needle'}]
+    assert backend.match_file_content(str(path), backend.build_search_query('absent'), str(tmp_path)) is None
+    assert backend.match_file_content(os.path.join(tmp_path, 'missing'), query, str(tmp_path)) is None
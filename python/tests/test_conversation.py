@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import backend
+
+
+def code_block(lines):
+    return "```python\n" + "x = 1\n" * lines + "```"
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """Set the history token budget."""
+    return lambda tokens: monkeypatch.setattr(backend, 'CONVERSATION_TOKEN_BUDGET', tokens)
+
+
+def add(conversation, count, reply="ok", start=0):
+    for i in range(start, start + count):
+        backend.add_conversation_turn(conversation, f"request {i}", reply)
+
+
+def test_long_code_blocks_are_elided():
+    short = code_block(3)
+    assert backend.elide_code_blocks(f"see {short} done") == f"see {short} done"
+    assert backend.elide_code_blocks(f"see {code_block(100)} done") == "see ```\n<100 lines of code elided>\n``` done"
+
+
+def test_action_file_bodies_become_references():
+    body = "line\n" * 100
+    reply = "Here:\n" + json.dumps({"action": "create_file", "path": "a.py", "content": body}) + \
+            "\n" + json.dumps({"action": "create_project", "folder": "demo", "files": [
+                {"path": "main.py", "content": body}, {"path": "tiny.py", "content": "x"}]}) + " {not json"
+    actions = []
+    elided = backend.elide_reply_actions(reply, actions)
+    assert actions == ["create_file a.py", "create_project demo"]
+    assert "<101 lines elided, see a.py>" in elided
+    assert "<101 lines elided, see demo/main.py>" in elided
+    assert '"content": "x"' in elided and elided.endswith(" {not json")
+    assert backend.elide_reply_actions("no actions here", []) == "no actions here"
+
+
+def test_history_renders_turns_in_order():
+    conversation = backend.new_conversation()
+    add(conversation, 2)
+    assert backend.render_conversation(conversation) == (
+        "User: request 0\nAssistant: ok\nUser: request 1\nAssistant: ok\n")
+
+
+def test_older_turns_lose_their_code_first():
+    conversation = backend.new_conversation()
+    backend.add_conversation_turn(conversation, "write it", "Sure:\n" + code_block(100))
+    assert "x = 1" in backend.render_conversation(conversation)
+    add(conversation, backend.CONVERSATION_RECENT_TURNS)
+    rendered = backend.render_conversation(conversation)
+    assert "x = 1" not in rendered and "<100 lines of code elided>" in rendered
+
+
+def test_old_turns_fold_into_the_summary_within_budget(budget):
+    budget(300)
+    reply = " ".join(["a fairly ordinary reply"] * 8)
+    conversation = backend.new_conversation()
+    add(conversation, 12, reply=reply)
+    rendered = backend.render_conversation(conversation)
+    assert 0 < len(conversation['summary']) < 12
+    assert len(conversation['summary']) + len(conversation['turns']) == 12
+    assert conversation['tokens'] <= 300
+    assert backend.estimate_tokens(rendered) <= 300 + 10
+    assert rendered.startswith("Earlier in this conversation:\n- User: request 0")
+    assert rendered.endswith(f"User: request 11\nAssistant: {reply}\n")
+
+
+def test_summary_keeps_only_the_newest_lines(budget, monkeypatch):
+    budget(1)
+    monkeypatch.setattr(backend, 'CONVERSATION_SUMMARY_LINES', 3)
+    conversation = backend.new_conversation()
+    add(conversation, 6)
+    assert conversation['summary'] == [f"- User: request {i}" for i in (2, 3, 4)]
+    assert len(conversation['turns']) == 1
+
+
+def test_a_single_oversized_turn_is_cut_to_fit(budget):
+    budget(50)
+    conversation = backend.new_conversation()
+    backend.add_conversation_turn(conversation, "dump", "word " * 500)
+    rendered = backend.render_conversation(conversation)
+    assert rendered.endswith("\n... (truncated)\n")
+    assert backend.estimate_tokens(rendered) <= 50
+
+
+def test_summary_lines_name_the_actions():
+    turn = {'user': "make   a\n" + "very " * 40 + "long request", 'actions': ["create_file a.py", "run_file a.py"]}
+    line = backend.summarize_turn(turn)
+    assert line.startswith("- User: make a very") and "..." in line
+    assert line.endswith("-> create_file a.py, run_file a.py")
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import backend
+
+
+FILES = {
+    'top.txt': "12345",
+    'src/a.py': "123",
+    'src/b.py': "1234567",
+    'src/deep/c.py': "1",
+    'docs/': None,
+}
+
+
+def stats(rel_dir):
+    return backend.get_dir_stats(os.path.normpath(rel_dir) if rel_dir else '', backend.workspace_index)
+
+
+def test_build_computes_direct_and_recursive_totals(workspace):
+    workspace(FILES)
+    assert stats('') == {'files': 1, 'folders': 2, 'total_files': 4, 'total_size': 16}
+    assert stats('src') == {'files': 2, 'folders': 1, 'total_files': 3, 'total_size': 11}
+    assert stats('src/deep') == {'files': 1, 'folders': 0, 'total_files': 1, 'total_size': 1}
+    assert stats('docs') == {'files': 0, 'folders': 0, 'total_files': 0, 'total_size': 0}
+    assert backend.get_dir_stats('.', backend.workspace_index) == stats('')
+    assert stats('missing') is None
+
+
+def test_totals_follow_writes_and_deletions(workspace):
+    root = workspace(FILES)
+    with open(os.path.join(root, 'src', 'deep', 'c.py'), 'w') as f:
+        f.write("12345")
+    backend.index_refresh_path(os.path.join(root, 'src', 'deep', 'c.py'))
+    assert stats('src')['total_size'] == 15
+    assert stats('')['total_size'] == 20
+    
+    shutil.rmtree(os.path.join(root, 'src', 'deep'))
+    backend.index_refresh_path(os.path.join(root, 'src', 'deep'))
+    assert stats('src') == {'files': 2, 'folders': 0, 'total_files': 2, 'total_size': 10}
+    assert stats('') == {'files': 1, 'folders': 2, 'total_files': 3, 'total_size': 15}
+
+
+def test_totals_survive_a_save_and_load(workspace):
+    root = workspace(FILES)
+    backend.save_workspace_index(backend.workspace_index, force=True)
+    loaded = backend.load_workspace_index(root)
+    assert loaded['dir_stats'] == backend.workspace_index['dir_stats']
+
+
+def test_get_dir_stats_returns_a_copy(workspace):
+    workspace(FILES)
+    stats('src')['files'] = 99
+    assert stats('src')['files'] == 2
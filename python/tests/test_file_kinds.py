@@ -0,0 +1,39 @@
+import os
+
+import backend
+
+
+def sniff(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return backend.sniff_file_kind(str(path))
+
+
+def test_text_binary_and_minified_files(tmp_path):
+    assert sniff(tmp_path, 'a.py', b"print('hi')\n") == 'text'
+    assert sniff(tmp_path, 'utf8.txt', "héllo wörld\n".encode()) == 'text'
+    assert sniff(tmp_path, 'latin1.txt', "héllo wörld\n".encode('latin-1')) == 'text'
+    assert sniff(tmp_path, 'nul.txt', b"abc\0def") == 'binary'
+    assert sniff(tmp_path, 'noise.txt', b"\xff\x01\x02\x03" * 100) == 'binary'
+    assert sniff(tmp_path, 'image.png', b"plain text") == 'binary'
+    assert sniff(tmp_path, 'bundle.js', b"var a=1;" * 4000) == 'minified'
+    assert sniff(tmp_path, 'long.js', (b"x = 1\n" * 4000)) == 'text'
+    assert backend.sniff_file_kind(str(tmp_path / 'missing.txt')) == 'binary'
+
+
+def test_multibyte_character_cut_by_the_sample_is_still_text(tmp_path):
+    data = b"a" * (backend.SNIFF_BYTES - 1) + "é".encode()
+    assert sniff(tmp_path, 'cut.txt', data) == 'text'
+
+
+def test_kind_is_cached_in_the_index_until_the_file_changes(workspace):
+    root = workspace({'data.txt': "text\n"})
+    path = os.path.join(root, 'data.txt')
+    assert backend.is_searchable_file(path, root)
+    entry = backend.workspace_index['entries'].get('data.txt')
+    assert entry.kind == 'text'
+    
+    with open(path, 'wb') as f:
+        f.write(b"\0\1\2 binary now")
+    backend.index_refresh_path(path)
+    assert not backend.is_searchable_file(path, root)
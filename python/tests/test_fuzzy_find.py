@@ -0,0 +1,83 @@
+import os
+
+import backend
+
+
+def score(query, path):
+    path = os.path.normpath(path)
+    return backend.fuzzy_score(query, path.lower(), path)
+
+
+def find(query, **kwargs):
+    return [path for path, _ in backend.fuzzy_find_files(backend.workspace_index, query, **kwargs)]
+
+
+def test_align_finds_the_tightest_window():
+    assert backend.fuzzy_align('abc', 'a_abc') == [2, 3, 4]
+    assert backend.fuzzy_align('ac', 'abc') == [0, 2]
+    assert backend.fuzzy_align('ca', 'abc') is None
+
+
+def test_non_subsequence_does_not_match():
+    assert score('xyz', 'src/main.py') is None
+
+
+def test_basename_matches_beat_folder_matches():
+    assert score('main', 'src/main.py') > score('main', 'main/other.py')
+
+
+def test_exact_and_prefix_basenames_rank_higher():
+    assert score('util', 'lib/util.py') > score('util', 'lib/utility.py') > score('util', 'lib/my_util_x.py')
+
+
+def test_consecutive_and_boundary_characters_score_higher():
+    assert score('ab', 'x/ab.py') > score('ab', 'x/axb.py')
+    assert score('fb', 'x/fooBar.py') > score('fb', 'x/foobar.py')
+
+
+def test_find_orders_results_and_breaks_ties_by_depth(workspace):
+    workspace({
+        'src/config.py': "",
+        'src/deep/config.py': "",
+        'src/conftest.py': "",
+        'config/readme.md': "",
+        'other.txt': "",
+    })
+    results = find('config')
+    assert results[:2] == [os.path.normpath('src/config.py'), os.path.normpath('src/deep/config.py')]
+    assert os.path.normpath('other.txt') not in results
+
+
+def test_find_filters_by_file_type_and_limits_results(workspace):
+    workspace({'a/main.py': "", 'b/main.js': "", 'c/main.py': "", 'd/main_x.py': ""})
+    assert all(p.endswith('.py') for p in find('main', file_type='.py'))
+    assert len(find('main', max_results=2)) == 2
+    assert find('   ') == []
+
+
+def test_find_sees_files_added_after_the_first_query(workspace):
+    root = workspace({'one.py': ""})
+    assert find('two') == []
+    with open(os.path.join(root, 'two.py'), 'w'):
+        pass
+    backend.index_refresh_path(os.path.join(root, 'two.py'))
+    assert find('two') == ['two.py']
+
+
+def test_every_match_is_ranked_not_just_the_first_ones_found(workspace, monkeypatch):
+    monkeypatch.setattr(backend, 'FUZZY_CANDIDATE_LIMIT', 2)
+    workspace({'a/attest.py': "", 'b/contest.py': "", 'c/latest.py': "", 'd/x_t_e_s_t.py': "", 'z/test.py': ""})
+    assert find('test', max_results=1) == [os.path.normpath('z/test.py')]
+
+
+def test_file_type_is_applied_before_the_candidate_limit(workspace, monkeypatch):
+    monkeypatch.setattr(backend, 'FUZZY_CANDIDATE_LIMIT', 1)
+    workspace({'a/main.js': "", 'b/main.js': "", 'c/main.js': "", 'z/main.py': ""})
+    assert find('main', file_type='.py', max_results=1) == [os.path.normpath('z/main.py')]
+
+
+def test_ties_go_to_files_near_the_recently_used_ones(workspace):
+    root = workspace({'api/config.py': "", 'web/config.py': "", 'web/views.py': ""})
+    assert find('config')[0] == os.path.normpath('api/config.py')
+    backend.note_path_access(os.path.join(root, 'web', 'views.py'))
+    assert find('config')[0] == os.path.normpath('web/config.py')
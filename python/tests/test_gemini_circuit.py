@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+from google.genai import errors
+
+import backend
+
+
+def client_error(code):
+    return errors.ClientError(code, {'error': {'message': f"status {code}"}})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Pin backend.time.time to a settable value."""
+    now = [1000.0]
+    monkeypatch.setattr(backend.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize('error, outage', [
+    (client_error(400), False),
+    (client_error(404), False),
+    (client_error(401), True),
+    (client_error(429), True),
+    (errors.ServerError(503, {}), True),
+    (ConnectionError("refused"), True),
+])
+def test_only_outages_count_as_failures(error, outage):
+    assert backend.is_gemini_outage(error) is outage
+
+
+def test_circuit_opens_after_repeated_failures(gemini, clock):
+    backend.gemini_health['checked_at'] = clock[0]
+    for _ in range(backend.GEMINI_FAILURE_THRESHOLD - 1):
+        backend.record_gemini_result(ConnectionError("down"))
+        assert backend.check_gemini_available()
+    backend.record_gemini_result(ConnectionError("down"))
+    assert backend.gemini_health['state'] == 'open'
+    assert not backend.check_gemini_available()
+    assert backend.gemini_health['last_error'] == "down"
+
+
+def test_bad_requests_and_successes_reset_the_count(gemini, clock):
+    backend.gemini_health['checked_at'] = clock[0]
+    backend.record_gemini_result(ConnectionError("down"))
+    backend.record_gemini_result(client_error(400))
+    assert backend.gemini_health['failures'] == 0
+    backend.record_gemini_result(ConnectionError("down"))
+    backend.record_gemini_result()
+    assert (backend.gemini_health['state'], backend.gemini_health['failures']) == ('closed', 0)
+
+
+def test_half_open_trial_closes_or_reopens_the_circuit(gemini, clock):
+    backend.gemini_health['checked_at'] = clock[0]
+    for _ in range(backend.GEMINI_FAILURE_THRESHOLD):
+        backend.record_gemini_result(ConnectionError("down"))
+    
+    clock[0] += backend.GEMINI_OPEN_COOLDOWN + 1
+    assert backend.check_gemini_available()
+    assert backend.gemini_health['state'] == 'half_open'
+    # Only one trial call at a time
+    assert not backend.check_gemini_available()
+    
+    backend.record_gemini_result(ConnectionError("still down"))
+    assert backend.gemini_health['state'] == 'open'
+    assert not backend.check_gemini_available()
+    
+    clock[0] += backend.GEMINI_OPEN_COOLDOWN + 1
+    assert backend.check_gemini_available()
+    backend.record_gemini_result()
+    assert backend.gemini_health['state'] == 'closed'
+    assert backend.check_gemini_available()
+
+
+def test_stale_state_is_refreshed_by_a_background_probe(gemini, clock, monkeypatch):
+    probe = backend.probe_gemini
+    probed = threading.Event()
+    monkeypatch.setattr(backend, 'probe_gemini', probed.set)
+    backend.gemini_health['checked_at'] = clock[0] - backend.GEMINI_HEALTH_TTL - 1
+    assert backend.check_gemini_available()
+    assert backend.check_gemini_available()
+    assert backend.gemini_health['probing']
+    
+    assert probed.wait(5)
+    
+    backend.gemini_health['failures'] = 2
+    probe()
+    assert backend.gemini_health['failures'] == 0 and not backend.gemini_health['probing']
+    assert backend.gemini_health['checked_at'] == clock[0]
+
+
+def test_open_circuit_fails_fast_without_calling_the_model(workspace, gemini):
+    workspace({'a.py': ""})
+    backend.gemini_health.update(state='open', opened_at=backend.time.time())
+    assert backend.process_message("write a parser").startswith("Error: Cannot connect to Gemini API")
+    assert gemini.prompts == []
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+import backend
+
+
+def matches(pattern, path):
+    regex, negate, dir_only = backend.compile_ignore_pattern(pattern)
+    return regex.fullmatch(path) is not None
+
+
+@pytest.mark.parametrize("line", ["", "   ", "# comment", "/", "!"])
+def test_blank_and_comment_lines_are_skipped(line):
+    assert backend.compile_ignore_pattern(line) is None
+
+
+def test_negation_and_dir_only_flags():
+    regex, negate, dir_only = backend.compile_ignore_pattern("!build/")
+    assert negate and dir_only
+    assert regex.fullmatch("build")
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    # Without a slash a pattern matches at any depth
+    ("*.pyc", "app.pyc", True),
+    ("*.pyc", "pkg/sub/app.pyc", True),
+    ("*.pyc", "app.py", False),
+    # With one it is anchored to the ignore file's folder
+    ("/dist", "dist", True),
+    ("/dist", "pkg/dist", False),
+    ("docs/*.md", "docs/a.md", True),
+    ("docs/*.md", "docs/sub/a.md", False),
+    # Matching a folder covers what is inside it
+    ("node_modules", "web/node_modules/react/index.js", True),
+    ("?.txt", "a.txt", True),
+    ("?.txt", "ab.txt", False),
+    ("[abc].log", "b.log", True),
+    ("[!abc].log", "b.log", False),
+    ("\\#notes", "#notes", True),
+])
+def test_glob_syntax(pattern, path, expected):
+    assert matches(pattern, path) is expected
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    ("**/logs", "logs", True),
+    ("**/logs", "a/b/logs", True),
+    ("a/**/b", "a/b", True),
+    ("a/**/b", "a/x/y/b", True),
+    ("a/**", "a/x/y", True),
+    ("a/**", "a", False),
+])
+def test_whole_segment_double_star_crosses_folders(pattern, path, expected):
+    assert matches(pattern, path) is expected
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    ("foo**bar", "fooxbar", True),
+    ("foo**bar", "foo/x/bar", False),
+    ("a**/b", "ax/b", True),
+    ("a**/b", "a/x/b", False),
+    ("**.log", "x.log", True),
+    ("/**.log", "sub/x.log", False),
+])
+def test_double_star_inside_a_segment_is_a_plain_star(pattern, path, expected):
+    assert matches(pattern, path) is expected
+
+
+def walked_files(top):
+    return sorted(
+        os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+        for rel_dir, dir_entries, file_entries in backend.walk_workspace(top)
+        for entry in file_entries
+    )
+
+
+def test_walker_applies_nested_ignore_files_and_negation(workspace):
+    root = workspace({
+        '.gitignore': "*.log\nbuild/\n",
+        'app.log': "",
+        'main.py': "",
+        'build/out.py': "",
+        'logs/.gitignore': "!keep.log\n",
+        'logs/keep.log': "",
+        'logs/drop.log': "",
+        'node_modules/pkg/index.js': "",
+    })
+    assert walked_files(root) == sorted(
+        os.path.normpath(p) for p in ('.gitignore', 'main.py', 'logs/.gitignore', 'logs/keep.log'))
+
+
+def test_walker_below_the_root_still_sees_outer_ignore_files(workspace):
+    root = workspace({'.gitignore': "secret/\n", 'pkg/a.py': "", 'pkg/secret/key.txt': ""})
+    assert walked_files(os.path.join(root, 'pkg')) == ['a.py']
+
+
+def test_dir_only_rules_leave_files_of_that_name_alone(workspace):
+    root = workspace({'.gitignore': "cache/\n", 'cache': "a file, not a folder"})
+    assert 'cache' in walked_files(root)
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import backend
+
+
+FILES = {
+    'app/__init__.py': "",
+    'app/main.py': "from app import models\nfrom .views import render\nimport requests\n",
+    'app/models.py': "from .db import connect\n",
+    'app/views.py': "def render():\n    pass\n",
+    'app/db.py': "import sqlite3\ndef connect():\n    pass\n",
+    'app/broken.py': "from .missing import thing\nfrom .views import nothing_here\n",
+    'src/lib/__init__.py': "",
+    'src/lib/util.py': "",
+    'scripts/run.py': "import lib.util\nfrom app.main import *\n",
+}
+
+
+def p(path):
+    return os.path.normpath(path)
+
+
+def files(*paths):
+    return {p(path): 'digest' for path in paths}
+
+
+@pytest.mark.parametrize('importer, imported, expected', [
+    ('app/main.py', ('app', 0, ('models',), 1), ('app/__init__.py', {'models': 'app/models.py'}, True)),
+    ('app/main.py', ('views', 1, ('render',), 2), ('app/views.py', {}, True)),
+    ('app/main.py', ('', 1, ('views',), 2), ('app/__init__.py', {'views': 'app/views.py'}, True)),
+    ('app/main.py', ('requests', 0, (), 3), (None, {}, True)),
+    ('app/main.py', ('missing', 1, ('x',), 1), (None, {}, False)),
+    ('app/main.py', ('x', 3, (), 1), (None, {}, False)),
+    ('scripts/run.py', ('lib.util', 0, (), 1), ('src/lib/util.py', {}, True)),
+])
+def test_resolve_python_import(importer, imported, expected):
+    workspace_files = files('app/__init__.py', 'app/main.py', 'app/models.py', 'app/views.py',
+                            'src/lib/__init__.py', 'src/lib/util.py', 'scripts/run.py')
+    module_path, submodules, resolved = backend.resolve_python_import(workspace_files, p(importer), imported)
+    expected_path, expected_submodules, expected_resolved = expected
+    assert module_path == (p(expected_path) if expected_path else None)
+    assert submodules == {name: p(path) for name, path in expected_submodules.items()}
+    assert resolved is expected_resolved
+
+
+def test_import_closure_walks_nearest_first():
+    graph = {'dependencies': {'a': ('b', 'c'), 'b': ('d',), 'd': ('a',)}}
+    assert backend.import_closure(graph, ['a'], 'dependencies') == ['b', 'c', 'd']
+    assert backend.import_closure(graph, ['a'], 'dependencies', transitive=False) == ['b', 'c']
+    assert backend.import_closure(graph, ['x'], 'dependencies') == []
+
+
+def test_relations_follow_the_workspace(workspace):
+    root = workspace(FILES)
+    relations = backend.find_import_relations('app/main.py', search_path=root)
+    assert relations['dependencies'] == [p(x) for x in ('app/__init__.py', 'app/models.py', 'app/views.py', 'app/db.py')]
+    assert relations['dependents'] == [p('scripts/run.py')]
+    assert backend.find_import_relations('db.py', search_path=root)['dependents'] == [
+        p('app/models.py'), p('app/main.py'), p('scripts/run.py')]
+    
+    # A new module is picked up by the files that already named it
+    with open(os.path.join(root, 'app', 'missing.py'), 'w') as f:
+        f.write("thing = 1\n")
+    backend.index_refresh_path(os.path.join(root, 'app', 'missing.py'))
+    assert backend.find_import_relations('missing.py', search_path=root)['dependents'] == [p('app/broken.py')]
+    assert 'error' in backend.find_import_relations('nope.py', search_path=root)
+
+
+def test_check_python_module_reports_bad_imports(workspace):
+    root = workspace(FILES)
+    graph = backend.get_import_graph(root)
+    sindex = backend.get_symbol_index(root)
+    problems = backend.check_python_module(sindex, graph, p('app/broken.py'))
+    assert [(kind, line) for kind, _, line in problems] == [('import', 1), ('import', 2)]
+    assert "'nothing_here'" in problems[1][1]
+    assert backend.check_python_module(sindex, graph, p('app/main.py')) == []
+
+
+def test_debug_directory_rechecks_files_whose_imports_changed_elsewhere(workspace):
+    root = workspace({
+        'lib/__init__.py': "",
+        'lib/util.py': "def helper():\n    pass\n",
+        'pkg/__init__.py': "",
+        'pkg/main.py': "from lib.util import helper\n",
+    })
+    assert "'helper'" not in backend.debug_directory(os.path.join(root, 'pkg'))
+    assert "Skipped 2 Python file(s)" in backend.debug_directory(os.path.join(root, 'pkg'))
+    
+    with open(os.path.join(root, 'lib', 'util.py'), 'w') as f:
+        f.write("def other():\n    pass\n")
+    backend.index_refresh_path(os.path.join(root, 'lib', 'util.py'))
+    # Debugging lib first must not hide the change from pkg's next check
+    backend.debug_directory(os.path.join(root, 'lib'))
+    report = backend.debug_directory(os.path.join(root, 'pkg'))
+    assert 'main.py' in report and "'helper'" in report
@@ -0,0 +1,92 @@
+import os
+import shutil
+
+import backend
+
+
+def paths(*rel_paths):
+    return sorted(os.path.normpath(p) for p in rel_paths)
+
+
+def indexed_files():
+    return sorted(backend.workspace_index['entries'].file_paths())
+
+
+def test_refresh_adds_a_new_file_and_its_missing_folders(workspace):
+    root = workspace({'a.py': ""})
+    os.makedirs(os.path.join(root, 'pkg', 'sub'))
+    with open(os.path.join(root, 'pkg', 'sub', 'b.py'), 'w') as f:
+        f.write("x = 1\n")
+    backend.index_refresh_path(os.path.join(root, 'pkg', 'sub', 'b.py'))
+    assert indexed_files() == paths('a.py', 'pkg/sub/b.py')
+    assert 'pkg' in backend.workspace_index['entries']
+
+
+def test_refresh_scans_a_new_folder(workspace):
+    root = workspace({'a.py': ""})
+    os.makedirs(os.path.join(root, 'lib', 'deep'))
+    for name in ('lib/one.py', 'lib/deep/two.py'):
+        open(os.path.join(root, name), 'w').close()
+    scanned = backend.index_refresh_path(os.path.join(root, 'lib'))
+    assert sorted(scanned) == paths('lib', 'lib/deep')
+    assert indexed_files() == paths('a.py', 'lib/deep/two.py', 'lib/one.py')
+
+
+def test_refresh_drops_deleted_files_and_folders(workspace):
+    root = workspace({'a.py': "", 'lib/one.py': "", 'lib/deep/two.py': ""})
+    os.remove(os.path.join(root, 'a.py'))
+    backend.index_refresh_path(os.path.join(root, 'a.py'))
+    shutil.rmtree(os.path.join(root, 'lib'))
+    backend.index_refresh_path(os.path.join(root, 'lib'))
+    assert indexed_files() == []
+    assert backend.workspace_index['entries'].folder_paths() == []
+
+
+def test_refresh_skips_paths_in_skipped_folders(workspace):
+    root = workspace({'a.py': "", 'node_modules/': None})
+    open(os.path.join(root, 'node_modules', 'x.js'), 'w').close()
+    backend.index_refresh_path(os.path.join(root, 'node_modules', 'x.js'))
+    assert indexed_files() == paths('a.py')
+
+
+def test_refresh_skips_ignored_paths(workspace):
+    root = workspace({'.gitignore': "*.log\n", 'a.py': ""})
+    open(os.path.join(root, 'debug.log'), 'w').close()
+    backend.index_refresh_path(os.path.join(root, 'debug.log'))
+    assert indexed_files() == paths('.gitignore', 'a.py')
+
+
+def test_editing_an_ignore_file_rescans_below_it(workspace):
+    root = workspace({'.gitignore': "", 'a.py': "", 'b.log': ""})
+    with open(os.path.join(root, '.gitignore'), 'w') as f:
+        f.write("*.log\n")
+    backend.index_refresh_path(os.path.join(root, '.gitignore'))
+    assert indexed_files() == paths('.gitignore', 'a.py')
+
+
+def test_a_file_replaced_by_a_folder_is_reindexed(workspace):
+    root = workspace({'thing': ""})
+    os.remove(os.path.join(root, 'thing'))
+    os.makedirs(os.path.join(root, 'thing'))
+    open(os.path.join(root, 'thing', 'inner.py'), 'w').close()
+    backend.index_refresh_path(os.path.join(root, 'thing'))
+    assert backend.workspace_index['entries'].get('thing').is_dir
+    assert indexed_files() == paths('thing/inner.py')
+
+
+def test_sync_changed_dirs_relists_folders_whose_mtime_changed(workspace):
+    root = workspace({'lib/one.py': ""})
+    index = backend.workspace_index
+    open(os.path.join(root, 'lib', 'two.py'), 'w').close()
+    # Make the change visible even on filesystems with coarse mtimes
+    index['dir_mtimes'][os.path.normpath('lib')] -= 10
+    backend.index_sync_changed_dirs(index)
+    assert indexed_files() == paths('lib/one.py', 'lib/two.py')
+
+
+def test_every_change_bumps_the_generation(workspace):
+    root = workspace({'a.py': ""})
+    generation = backend.workspace_index['generation']
+    open(os.path.join(root, 'b.py'), 'w').close()
+    backend.index_refresh_path(os.path.join(root, 'b.py'))
+    assert backend.workspace_index['generation'] > generation
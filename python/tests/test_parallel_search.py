@@ -0,0 +1,36 @@
+import os
+
+import backend
+
+
+def make_tree(workspace):
+    files = {}
+    for i in range(150):
+        # Every third file mentions the keyword
+        files[f"pkg{i % 5}/mod{i:03}.py"] = "value = 'needle'\n" if i % 3 == 0 else "value = 'hay'\n"
+    return workspace(files)
+
+
+def test_parallel_scan_returns_the_same_matches_in_the_same_order(workspace):
+    root = make_tree(workspace)
+    serial = backend.search_in_file_content("needle", "*.py", 1000, root, parallel=False)
+    parallel = backend.search_in_file_content("needle", "*.py", 1000, root, parallel=True)
+    assert len(serial) == 50
+    assert [m['path'] for m in parallel] == [m['path'] for m in serial]
+
+
+def test_parallel_scan_stops_at_max_results(workspace):
+    root = make_tree(workspace)
+    matches = backend.search_in_file_content("needle", "*.py", 7, root, parallel=True)
+    first = backend.search_in_file_content("needle", "*.py", 1000, root, parallel=False)[:7]
+    assert [m['path'] for m in matches] == [m['path'] for m in first]
+
+
+def test_parallel_match_files_reports_matches_in_input_order(workspace):
+    root = make_tree(workspace)
+    full_paths = sorted(os.path.join(root, f"pkg{i % 5}", f"mod{i:03}.py") for i in range(150))
+    query = backend.build_search_query("needle")
+    seen = []
+    matches = backend.parallel_match_files(full_paths, query, 1000, root, on_match=seen.append)
+    assert seen == matches
+    assert [m['full_path'] for m in matches] == [p for p in full_paths if int(p[-6:-3]) % 3 == 0]
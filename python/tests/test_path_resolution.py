@@ -0,0 +1,58 @@
+import os
+
+import backend
+
+
+FILES = {
+    'utils.py': "",
+    'pkg/utils.py': "",
+    'pkg/sub/utils.py': "",
+    'other/sub/utils.py': "",
+    'other/readme.md': "",
+}
+
+
+def resolve(root, filename):
+    return [os.path.relpath(p, root) for p in backend.resolve_file_candidates(filename, root)]
+
+
+def test_bare_name_prefers_shallower_paths(workspace):
+    root = workspace(FILES)
+    assert resolve(root, 'utils.py') == [os.path.normpath(p) for p in (
+        'utils.py', 'pkg/utils.py', 'other/sub/utils.py', 'pkg/sub/utils.py')]
+
+
+def test_trailing_path_narrows_the_candidates(workspace):
+    root = workspace(FILES)
+    assert sorted(resolve(root, 'sub/utils.py')) == sorted(
+        os.path.normpath(p) for p in ('pkg/sub/utils.py', 'other/sub/utils.py'))
+    assert resolve(root, 'pkg/sub/utils.py') == [os.path.normpath('pkg/sub/utils.py')]
+    assert resolve(root, 'missing.py') == []
+    assert resolve(root, '../utils.py') == []
+
+
+def test_recently_touched_files_and_their_neighbours_come_first(workspace):
+    root = workspace(FILES)
+    backend.note_path_access(os.path.join(root, 'other', 'readme.md'))
+    assert resolve(root, 'sub/utils.py')[0] == os.path.normpath('other/sub/utils.py')
+    
+    backend.note_path_access(os.path.join(root, 'pkg', 'sub', 'utils.py'))
+    assert resolve(root, 'utils.py')[0] == os.path.normpath('pkg/sub/utils.py')
+
+
+def test_deleted_files_leave_the_candidates_once_the_index_sees_them(workspace):
+    root = workspace(FILES)
+    os.remove(os.path.join(root, 'pkg', 'utils.py'))
+    backend.index_refresh_path(os.path.join(root, 'pkg', 'utils.py'))
+    assert os.path.normpath('pkg/utils.py') not in resolve(root, 'utils.py')
+
+
+def test_describe_other_candidates_lists_the_rest():
+    assert backend.describe_other_candidates('a.py', '/x/a.py', ['/x/a.py']) is None
+    assert backend.describe_other_candidates('a.py', '/y/a.py', ['/x/a.py', '/y/a.py']) is None
+    
+    candidates = [f'/d{i}/a.py' for i in range(8)]
+    note = backend.describe_other_candidates('a.py', '/d0/a.py', candidates)
+    assert note.startswith("[INFO] 'a.py' matched 8 files; using '/d0/a.py'.")
+    assert '  - /d5/a.py' in note and '/d6/a.py' not in note
+    assert note.endswith("... and 2 more")
@@ -0,0 +1,122 @@
+import os
+import random
+
+import backend
+
+
+def p(path):
+    return os.path.normpath(path)
+
+
+def build(*paths):
+    """A store holding paths; folders end in '/' and must come before their contents."""
+    store = backend.PathStore()
+    for path in paths:
+        store.add(p(path.rstrip('/')), path.endswith('/'))
+    return store
+
+
+def children(store, rel_dir):
+    return sorted(store.name(entry_id) for entry_id in store.children(p(rel_dir) if rel_dir else ''))
+
+
+def named(store, name):
+    return sorted(store.path(entry_id) for entry_id in store.named(name))
+
+
+def test_add_and_look_up():
+    store = build('src/', 'src/a.py', 'src/lib/', 'src/lib/a.py', 'README.md')
+    assert len(store) == 5
+    assert p('src/lib/a.py') in store and 'src/missing.py' not in store
+    entry = store.get(p('src/lib/a.py'))
+    assert (entry.name, entry.path, entry.is_dir) == ('a.py', p('src/lib/a.py'), False)
+    assert store.get(p('src/lib')).is_dir
+    assert store.find('nope') == -1 and store.get('nope') is None
+    assert children(store, '') == ['README.md', 'src']
+    assert children(store, 'src') == ['a.py', 'lib']
+    assert named(store, 'a.py') == [p('src/a.py'), p('src/lib/a.py')]
+    assert sorted(store.folder_paths()) == [p('src'), p('src/lib')]
+
+
+def test_non_ascii_and_undecodable_names_round_trip():
+    name = 'caf\xe9-\udcff.txt'
+    store = build('dir/', 'dir/' + name)
+    assert store.file_paths() == [p('dir/' + name)]
+    assert named(store, name) == [p('dir/' + name)]
+
+
+def test_remove_unlinks_siblings_and_name_chains():
+    store = build('a/', 'a/x.py', 'a/y.py', 'a/z.py', 'b/', 'b/y.py', 'y.py')
+    store.remove(store.find(p('a/y.py')))
+    assert children(store, 'a') == ['x.py', 'z.py']
+    assert named(store, 'y.py') == [p('b/y.py'), 'y.py']
+    store.remove(store.find('y.py'))
+    store.remove(store.find(p('b/y.py')))
+    assert named(store, 'y.py') == []
+    
+    store.remove(store.find('b'))
+    assert children(store, '') == ['a']
+    assert store.folder_paths() == ['a']
+    assert (len(store), store.dead) == (3, 4)
+
+
+def test_update_forgets_the_sniffed_kind():
+    store = build('a.txt')
+    entry_id = store.find('a.txt')
+    store.update(entry_id, 10, 1.0)
+    store.set_kind(store.entry(entry_id), 'binary')
+    assert store.get('a.txt').kind == 'binary'
+    assert not store.update(entry_id, 10, 1.0)
+    assert store.update(entry_id, 11, 1.0)
+    assert store.get('a.txt').kind is None
+
+
+def test_compact_returns_a_renumbered_copy():
+    store = build('a/', 'a/one.py', 'a/two.py', 'b/', 'b/three.py', 'four.py')
+    for entry_id in (store.find(p('a/one.py')), store.find(p('b/three.py')), store.find('b')):
+        store.remove(entry_id)
+    store.update(store.find(p('a/two.py')), 7, 2.5)
+    stale = store.entry(store.find(p('a/two.py')))
+    
+    compacted = store.compact()
+    assert compacted is not store and store.dead == 3
+    assert (len(compacted), compacted.dead) == (3, 0)
+    assert sorted(compacted.file_paths()) == sorted([p('a/two.py'), 'four.py'])
+    assert compacted.folder_paths() == ['a']
+    assert compacted.get(p('a/two.py')).size == 7
+    assert compacted.get(p('a')).id < compacted.get(p('a/two.py')).id
+    
+    # Snapshots taken before compacting can't write into the copy
+    compacted.set_kind(stale, 'text')
+    assert compacted.get(p('a/two.py')).kind is None
+
+
+def test_reindex_rebuilds_the_lookups():
+    store = build('a/', 'a/b.py', 'c.py')
+    store.remove(store.find('c.py'))
+    store.path_ids, store.name_heads = {}, {}
+    store.reindex()
+    assert store.find(p('a/b.py')) >= 0 and 'c.py' not in store
+    assert children(store, '') == ['a']
+    assert named(store, 'b.py') == [p('a/b.py')]
+
+
+def test_random_changes_keep_the_store_consistent():
+    rng = random.Random(7)
+    store = backend.PathStore()
+    files = set()
+    for step in range(2000):
+        if files and rng.random() < 0.4:
+            path = rng.choice(sorted(files))
+            files.discard(path)
+            store.remove(store.find(path))
+        else:
+            path = f"f{rng.randrange(300)}.py"
+            if path not in files:
+                files.add(path)
+                store.add(path, False)
+        if step % 500 == 499:
+            store = store.compact()
+    assert sorted(store.file_paths()) == sorted(files)
+    assert children(store, '') == sorted(files)
+    assert all(named(store, path) == [path] for path in files)
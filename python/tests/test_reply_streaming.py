@@ -0,0 +1,51 @@
+import json
+
+import backend
+
+
+def messages(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+
+
+def test_message_formats(capsys):
+    backend.send_delta("par")
+    backend.send_response("full reply", streamed=True)
+    backend.send_response("plain")
+    assert messages(capsys) == [
+        {'type': 'delta', 'text': "par"},
+        {'type': 'response', 'text': "full reply", 'streamed': True},
+        {'type': 'response', 'text': "plain"},
+    ]
+
+
+def test_streamed_reply_passes_each_chunk_on(workspace, gemini):
+    workspace({'a.py': ""})
+    gemini.replies.append(["Sure, ", "here it ", "is. "])
+    deltas = []
+    assert backend.process_message("write a parser", on_delta=deltas.append) == "Sure, here it is."
+    assert deltas == ["Sure, ", "here it ", "is. "]
+    assert "User: write a parser\nAssistant:" in gemini.prompts[0]
+
+
+def test_blocking_reply_without_on_delta(workspace, gemini):
+    workspace({'a.py': ""})
+    gemini.replies.append("  done  ")
+    assert backend.process_message("write a parser") == "done"
+
+
+def test_stream_failing_midway_keeps_the_text_already_sent(workspace, gemini):
+    workspace({'a.py': ""})
+    gemini.replies.append(["Partial ", ConnectionError("dropped")])
+    deltas = []
+    reply = backend.process_message("write a parser", on_delta=deltas.append)
+    assert deltas == ["Partial "]
+    assert reply == "Partial \n\nError: dropped"
+    
+    gemini.replies.append([ConnectionError("down")])
+    assert backend.process_message("write a parser", on_delta=deltas.append) == "Error: down"
+
+
+def test_greetings_are_answered_without_the_model(workspace, gemini):
+    workspace({'a.py': ""})
+    assert backend.process_message("hello", on_delta=lambda text: None).startswith("Hello!")
+    assert gemini.prompts == []
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """An empty, enabled response cache in its own folder."""
+    monkeypatch.setattr(backend, 'CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(backend, 'RESPONSE_CACHE_ENABLED', True)
+    monkeypatch.setattr(backend, 'response_cache', None)
+    monkeypatch.setattr(backend, 'response_cache_stats', {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0})
+    yield
+    if backend.response_cache is not None:
+        backend.response_cache.close()
+
+
+def test_keys_depend_on_model_prompt_and_config():
+    key = backend.response_cache_key('m', 'prompt')
+    assert key == backend.response_cache_key('m', 'prompt')
+    assert key != backend.response_cache_key('other', 'prompt')
+    assert key != backend.response_cache_key('m', 'prompt ')
+    assert key != backend.response_cache_key('m', 'prompt', {'temperature': 0})
+
+
+def test_put_then_get(cache):
+    assert backend.response_cache_get('m', 'p') is None
+    backend.response_cache_put('m', 'p', "reply")
+    backend.response_cache_put('m', 'empty', "")
+    assert backend.response_cache_get('m', 'p') == "reply"
+    assert backend.response_cache_get('m', 'empty') is None
+    stats = backend.get_response_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['stores'], stats['entries']) == (1, 2, 1, 1)
+    assert stats['hit_rate'] == pytest.approx(1 / 3)
+
+
+def test_disabled_cache_stores_nothing(cache, monkeypatch):
+    monkeypatch.setattr(backend, 'RESPONSE_CACHE_ENABLED', False)
+    backend.response_cache_put('m', 'p', "reply")
+    assert backend.response_cache_get('m', 'p') is None
+    assert backend.response_cache is None
+
+
+def test_least_recently_used_replies_are_evicted(cache, monkeypatch):
+    monkeypatch.setattr(backend, 'RESPONSE_CACHE_MAX_BYTES', 30)
+    clock = iter(range(100))
+    monkeypatch.setattr(backend.time, 'time', lambda: float(next(clock)))
+    backend.response_cache_put('m', 'a', "x" * 10)
+    backend.response_cache_put('m', 'b', "x" * 10)
+    backend.response_cache_put('m', 'c', "x" * 10)
+    assert backend.response_cache_get('m', 'a') is not None
+    backend.response_cache_put('m', 'd', "x" * 10)
+    
+    # Trimmed to RESPONSE_CACHE_TRIM_RATIO of the limit, oldest use first
+    assert [backend.response_cache_get('m', p) is not None for p in 'abcd'] == [True, False, False, True]
+    assert backend.response_cache_stats['evictions'] == 2
+
+
+def test_clear(cache):
+    backend.response_cache_put('m', 'p', "reply")
+    assert backend.clear_response_cache() is True
+    assert backend.response_cache_get('m', 'p') is None
+
+
+def test_clear_reports_a_cache_it_cannot_open(cache):
+    blocked = os.path.join(backend.CACHE_DIR, 'responses.sqlite')
+    os.makedirs(blocked)
+    assert backend.clear_response_cache() is False
+
+
+def test_cached_generate_skips_the_model_on_a_hit(cache, gemini, monkeypatch):
+    monkeypatch.setattr(backend, 'RESPONSE_CACHE_ENABLED', True)
+    gemini.replies.append("fresh")
+    assert backend.cached_generate("prompt") == "fresh"
+    assert backend.cached_generate("prompt") == "fresh"
+    assert len(gemini.prompts) == 1
+
+
+def test_chat_replies_survive_edits_but_not_new_files(cache, gemini, workspace):
+    root = workspace({'a.py': "x = 1\n"})
+    gemini.replies.extend(["first", "second", "third"])
+    assert backend.process_message("write a parser") == "first"
+    
+    with open(os.path.join(root, 'a.py'), 'w') as f:
+        f.write("x = 2\ny = 3\n")
+    backend.index_refresh_path(os.path.join(root, 'a.py'))
+    assert backend.process_message("write a parser") == "first"
+    
+    with open(os.path.join(root, 'b.py'), 'w'):
+        pass
+    backend.index_refresh_path(os.path.join(root, 'b.py'))
+    assert backend.process_message("write a parser") == "second"
+    assert backend.process_message("write a parser", "User: earlier") == "third"
@@ -0,0 +1,67 @@
+import pytest
+
+import backend
+
+
+def test_query_splits_on_or_and_and_operators():
+    query = backend.build_search_query('foo OR bar')
+    assert (query['terms'], query['require_all']) == (['foo', 'bar'], False)
+    query = backend.build_search_query('foo AND bar')
+    assert (query['terms'], query['require_all']) == (['foo', 'bar'], True)
+    query = backend.build_search_query('foo bar baz', operator='or')
+    assert (query['terms'], query['require_all']) == (['foo', 'bar', 'baz'], False)
+    assert backend.build_search_query('foo bar')['terms'] == ['foo bar']
+
+
+@pytest.mark.parametrize('keyword, regex, expected', [
+    ('straße', False, True),
+    ('STRASSE', False, False),
+    ('ÉTÉ', False, True),
+    ('[ée]t[ée]', True, True),
+    ('ÉT.', True, True),
+])
+def test_case_insensitive_non_ascii_terms(keyword, regex, expected):
+    query = backend.build_search_query(keyword, regex=regex)
+    assert query['text'] is (regex and not keyword.isascii())
+    buffer = "Straße im Été\n"
+    if not query['text']:
+        buffer = buffer.encode('utf-8')
+    assert bool(backend.scan_buffer_terms(buffer, query, False)) is expected
+
+
+def match(name, size, counts):
+    return {'name': name, 'size': size, 'term_counts': counts}
+
+
+def test_bm25_prefers_more_hits_shorter_files_and_rarer_terms():
+    ranked = backend.rank_content_matches([match('few', 100, [1]), match('many', 100, [5])], 10)
+    assert [m['name'] for m in ranked] == ['many', 'few']
+    
+    ranked = backend.rank_content_matches([match('long', 10000, [2]), match('short', 100, [2])], 10)
+    assert [m['name'] for m in ranked] == ['short', 'long']
+    
+    # 'common' is in every file, 'rare' only in one
+    ranked = backend.rank_content_matches([
+        match('common', 100, [3, 0]),
+        match('rare', 100, [0, 1]),
+        match('both', 100, [1, 0]),
+    ], 3)
+    assert ranked[0]['name'] == 'rare'
+    assert all('score' in m for m in ranked)
+    assert backend.rank_content_matches([], 5) == []
+
+
+def test_term_counts_are_capped_when_ranking():
+    query = backend.build_search_query('x')
+    buffer = b"x\n" * (backend.SEARCH_RANK_MAX_COUNT * 2)
+    assert backend.scan_buffer_terms(buffer, query, True)[1] == [backend.SEARCH_RANK_MAX_COUNT]
+    assert backend.scan_buffer_terms(buffer, query, False)[1] == [1]
+
+
+def test_ranking_is_opt_in(workspace):
+    root = workspace({'a.txt': "needle\n", 'b.txt': "needle needle needle\nneedle\n"})
+    plain = backend.search_in_file_content('needle', search_path=root, parallel=False)
+    assert all('score' not in m for m in plain)
+    
+    ranked = backend.search_in_file_content('needle', search_path=root, parallel=False, rank=True)
+    assert [m['name'] for m in ranked] == ['b.txt', 'a.txt']
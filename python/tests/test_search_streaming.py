@@ -0,0 +1,29 @@
+import json
+
+import backend
+
+
+def messages(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{')]
+
+
+def test_stream_search_sends_each_hit_then_a_summary(workspace, capsys):
+    root = workspace({'a.py': "token = 1\n", 'b.py': "token = 2\n", 'c.py': "other\n"})
+    capsys.readouterr()
+    
+    text = backend.stream_search("content", backend.search_in_file_content, "token", "*", 10, root, False)
+    sent = messages(capsys)
+    
+    hits = [m for m in sent if m['type'] == 'search_hit']
+    assert [(h['path'], h['rank'], h['search_type']) for h in hits] == [('a.py', 1, 'content'), ('b.py', 2, 'content')]
+    assert hits[0]['lines'][0]['line_number'] == 1
+    assert sent[-1] == {'type': 'search_done', 'search_type': 'content', 'count': 2, 'text': text}
+
+
+def test_stream_search_with_no_hits_still_sends_the_summary(workspace, capsys):
+    root = workspace({'a.py': "x\n"})
+    capsys.readouterr()
+    backend.stream_search("files", backend.find_files_by_keyword, "zzz", None, 10, root)
+    sent = messages(capsys)
+    assert [m['type'] for m in sent] == ['search_done']
+    assert sent[0]['count'] == 0
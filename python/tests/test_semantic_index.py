@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+import backend
+
+np = pytest.importorskip('numpy')
+
+
+FILES = {
+    'auth/tokens.py': "def refresh_access_token(session):\n    token = session.refreshToken\n    return token\n",
+    'db/models.py': "class UserModel:\n    table_name = 'users'\n    def save_row(self):\n        pass\n",
+    'ui/button.js': "function renderButton(label) {\n  return label;\n}\n",
+}
+
+
+def paths(results):
+    return [r['path'] for r in results]
+
+
+def rewrite(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    with open(path, 'w') as f:
+        f.write(content)
+    os.utime(path, (1, 1))
+    backend.index_refresh_path(path)
+
+
+def test_identifiers_split_into_tokens():
+    assert backend.split_identifier_tokens("refreshAccessToken") == ['refresh', 'access', 'token', 'refreshaccesstoken']
+    assert backend.split_identifier_tokens("HTTPServer user_names v2") == ['http', 'server', 'httpserver', 'user', 'name', 'v2']
+    assert backend.split_identifier_tokens("where is the class") == []
+    assert backend.split_identifier_tokens("class pass") == ['pass']
+
+
+def test_search_finds_the_related_file(workspace):
+    root = workspace(FILES)
+    results = backend.semantic_search("where do we refresh auth tokens", search_path=root)
+    assert paths(results)[0] == os.path.normpath('auth/tokens.py')
+    assert results[0]['lines'][0]['start_line'] == 1
+    assert backend.semantic_search("unrelated gibberish", search_path=root) == []
+
+
+def test_changed_files_are_searched_through_the_delta(workspace, monkeypatch):
+    monkeypatch.setattr(backend, 'SEMANTIC_REBUILD_RATIO', 10.0)
+    root = workspace(FILES)
+    backend.semantic_search("token", search_path=root)
+    base = backend.semantic_index['matrix']
+    
+    rewrite(root, 'ui/button.js', "function renderInvoice(invoice) {\n  return invoice.total;\n}\n")
+    assert paths(backend.semantic_search("invoice total", search_path=root)) == [os.path.normpath('ui/button.js')]
+    assert backend.semantic_search("button label", search_path=root) == []
+    sindex = backend.semantic_index
+    assert sindex['matrix'] is base and sindex['delta'] == {os.path.normpath('ui/button.js')}
+
+
+def test_rebuild_once_enough_chunks_changed(workspace, monkeypatch):
+    monkeypatch.setattr(backend, 'SEMANTIC_REBUILD_RATIO', 0.1)
+    root = workspace(FILES)
+    backend.semantic_search("token", search_path=root)
+    base = backend.semantic_index['matrix']
+    rewrite(root, 'db/models.py', "class InvoiceModel:\n    pass\n")
+    assert paths(backend.semantic_search("invoice", search_path=root)) == [os.path.normpath('db/models.py')]
+    assert backend.semantic_index['matrix'] is not base
+    assert not backend.semantic_index['delta']
+
+
+def test_terms_no_chunk_uses_are_freed_and_reused(workspace):
+    root = workspace(FILES)
+    backend.semantic_search("token", search_path=root)
+    sindex = backend.semantic_index
+    assert 'label' in sindex['vocab']
+    
+    os.remove(os.path.join(root, 'ui', 'button.js'))
+    backend.index_refresh_path(os.path.join(root, 'ui', 'button.js'))
+    backend.semantic_search("token", search_path=root)
+    assert 'label' not in sindex['vocab']
+    freed = len(sindex['free_terms'])
+    assert freed > 0
+    
+    terms = len(sindex['terms'])
+    rewrite(root, 'auth/tokens.py', FILES['auth/tokens.py'] + "# brand newword\n")
+    backend.semantic_search("token", search_path=root)
+    assert len(sindex['terms']) == terms
+    assert len(sindex['free_terms']) == freed - 2
+
+
+def test_index_round_trips_through_the_cache(workspace):
+    root = workspace(FILES)
+    backend.semantic_search("token", search_path=root)
+    sindex = backend.semantic_index
+    sindex['dirty'] = True
+    backend.save_semantic_index(sindex, force=True)
+    
+    loaded = backend.load_semantic_index(sindex['root'])
+    assert loaded['vocab'] == sindex['vocab']
+    assert loaded['chunk_count'] == sindex['chunk_count']
+    assert np.array_equal(loaded['df'][:len(loaded['terms'])], sindex['df'][:len(sindex['terms'])])
+    
+    backend.semantic_index = loaded
+    assert paths(backend.semantic_search("refresh token", search_path=root))[0] == os.path.normpath('auth/tokens.py')
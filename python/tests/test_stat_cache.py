@@ -0,0 +1,51 @@
+import os
+import time
+
+import backend
+
+
+def test_indexed_paths_are_stated_once_until_they_change(workspace):
+    root = workspace({'src/a.py': "1"})
+    path = os.path.join(root, 'src', 'a.py')
+    record = backend.cached_stat(path)
+    assert record[1] == 1
+    
+    with open(path, 'w') as f:
+        f.write("12345")
+    assert backend.cached_stat(path) is record
+    backend.index_refresh_path(path)
+    assert backend.cached_stat(path)[1] == 5
+
+
+def test_paths_outside_the_index_are_not_cached(workspace, tmp_path):
+    workspace({'node_modules/x.js': "", 'a.py': ""})
+    outside = tmp_path / 'outside.txt'
+    outside.write_text("x")
+    assert backend.cached_stat(str(outside)) is not None
+    assert backend.cached_stat(os.path.join(backend.WORKSPACE_PATH, 'node_modules', 'x.js')) is not None
+    assert list(backend.stat_cache) == []
+    assert backend.cached_stat(str(tmp_path / 'missing')) is None
+
+
+def test_invalidating_a_folder_drops_everything_below_it_and_its_parent(workspace):
+    root = workspace({'src/deep/a.py': "", 'src/b.py': "", 'other.py': ""})
+    paths = [os.path.join(root, p) for p in ('src', 'src/deep', 'src/deep/a.py', 'src/b.py', 'other.py')]
+    for path in paths:
+        backend.cached_stat(path)
+    assert sorted(backend.stat_cache) == sorted(paths)
+    
+    backend.invalidate_stat_cache(os.path.join(root, 'src', 'deep'))
+    assert sorted(backend.stat_cache) == sorted(paths[i] for i in (3, 4))
+
+
+def test_stat_cache_is_bounded(workspace, monkeypatch):
+    monkeypatch.setattr(backend, 'STAT_CACHE_LIMIT', 2)
+    root = workspace({'a': "", 'b': "", 'c': ""})
+    for name in 'abc':
+        backend.cached_stat(os.path.join(root, name))
+    assert list(backend.stat_cache) == [os.path.join(root, 'b'), os.path.join(root, 'c')]
+
+
+def test_format_timestamp():
+    moment = time.mktime((2024, 3, 5, 14, 7, 9, 0, 0, -1))
+    assert backend.format_timestamp(moment) == '2024-03-05 14:07:09'
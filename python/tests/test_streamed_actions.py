@@ -0,0 +1,90 @@
+import os
+import random
+
+import pytest
+
+import backend
+
+
+REPLY = (
+    'Creating it now.\n'
+    '{"action": "create_project", "folder": "demo", "files": ['
+    '{"path": "main.py", "content": "print(\\"hi {there}\\")"}, '
+    '{"path": "lib/util.py", "content": "x = [1, 2]"}]}\n'
+    'Then {"action": "run_file", "path": "demo/main.py"} and a stray { brace'
+)
+
+
+def feed_in_pieces(text, sizes):
+    scanner = backend.IncrementalJSONScanner()
+    events = []
+    position = 0
+    for size in sizes:
+        events.extend(scanner.feed(text[position:position + size]))
+        position += size
+    events.extend(scanner.feed(text[position:]))
+    return scanner, events
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_scanner_matches_extract_json_objects_across_chunk_boundaries(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 12) for _ in range(len(REPLY) // 4)]
+    scanner, events = feed_in_pieces(REPLY, sizes)
+    objects = [e[2] for e in events if e[0] == 'object']
+    assert objects == backend.extract_json_objects(REPLY)
+    
+    files = [e for e in events if e[0] == 'file']
+    assert [(e[3], e[4]['path']) for e in files] == [(0, 'main.py'), (1, 'lib/util.py')]
+    assert files[0][2] == {'action': 'create_project', 'folder': 'demo', 'files': []}
+    # Each file arrives before the object that holds it
+    assert events.index(files[-1]) < [e[0] for e in events].index('object')
+    assert scanner.text == REPLY and scanner.length == len(REPLY)
+
+
+def test_scanner_slices_across_chunks():
+    scanner, _ = feed_in_pieces("abcdefghij", [3, 1, 4])
+    assert scanner.slice(0, 10) == "abcdefghij"
+    assert scanner.slice(2, 5) == "cde"
+    assert scanner.slice(4, 8) == "efgh"
+    assert scanner.slice(9, 20) == "j"
+
+
+def test_stream_chat_actions_yield_actions_with_the_reply_so_far(workspace, gemini):
+    workspace({'a.py': ""})
+    pieces = [REPLY[i:i + 7] for i in range(0, len(REPLY), 7)]
+    gemini.replies.append(pieces)
+    events = list(backend.stream_chat_actions("make a demo", on_delta=lambda text: None))
+    
+    assert events[-1] == ('done', REPLY.strip())
+    objects = [e for e in events if e[0] == 'object']
+    assert [e[2]['action'] for e in objects] == ['create_project', 'run_file']
+    ends = [REPLY.index(']}') + 2, REPLY.index('main.py"}') + 9]
+    for event, end in zip(objects, ends):
+        assert REPLY.startswith(event[3]) and len(event[3]) >= end
+
+
+def test_unstreamed_replies_are_still_scanned(workspace, gemini):
+    workspace({'a.py': ""})
+    gemini.replies.append('{"action": "read_file", "path": "a.py"}')
+    events = list(backend.stream_chat_actions("read a.py"))
+    assert [e[0] for e in events] == ['object', 'done']
+    assert events[0][3] == '{"action": "read_file", "path": "a.py"}'
+
+
+def test_project_files_are_written_while_the_reply_streams(workspace):
+    root = workspace({})
+    projects = {}
+    header = {'action': 'create_project', 'folder': 'demo'}
+    backend.stream_project_file(projects, 5, header, 0, {'path': 'main.py', 'content': 'print(1)'})
+    backend.stream_project_file(projects, 5, header, 1, {'path': 'lib/util.py', 'content': 'x = 1'})
+    backend.stream_project_file(projects, 9, {'action': 'create_project'}, 0, {'path': 'later.py'})
+    backend.stream_project_file(projects, 12, {'action': 'run_file', 'folder': 'x'}, 0, {'path': 'x.py'})
+    assert list(projects) == [5]
+    assert os.path.exists(os.path.join(root, 'demo', 'lib', 'util.py'))
+    
+    # A reply that breaks off before the action closes still reports what was written
+    summary = backend.summarize_project(projects[5], "[WARNING] The reply ended early.")
+    assert "[SUMMARY] Project 'demo':" in summary
+    assert "  Created: 2 files" in summary
+    assert summary.endswith("[WARNING] The reply ended early.")
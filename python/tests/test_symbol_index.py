@@ -0,0 +1,81 @@
+import ast
+import os
+
+import backend
+
+
+SOURCE = '''
+LIMIT = 10
+first, second = 1, 2
+
+
+def helper():
+    def inner():
+        pass
+
+
+class Loader:
+    size = 3
+
+    def load(self):
+        pass
+
+    async def fetch(self):
+        pass
+'''
+
+
+def names(results):
+    return [(r['path'], r['qualname'], r['kind']) for r in results]
+
+
+def test_extract_symbols_qualifies_methods_and_skips_nested_names():
+    symbols = backend.extract_python_symbols(ast.parse(SOURCE))
+    assert [(s[1], s[2]) for s in symbols] == [
+        ('LIMIT', 'variable'), ('first', 'variable'), ('second', 'variable'),
+        ('helper', 'function'), ('Loader', 'class'), ('Loader.load', 'method'), ('Loader.fetch', 'method'),
+    ]
+    assert symbols[3][3:] == (6, 8)
+
+
+def test_unparseable_source_has_no_symbols():
+    assert backend.parse_python_source(b"def broken(:\n") == ([], None)
+
+
+def test_find_symbols_by_name_qualname_and_kind(workspace):
+    workspace({'pkg/loader.py': SOURCE, 'main.py': "def load():\n    pass\nloader = None\n"})
+    assert names(backend.find_symbols('load')) == [
+        ('main.py', 'load', 'function'), (os.path.normpath('pkg/loader.py'), 'Loader.load', 'method')]
+    assert names(backend.find_symbols('Loader.load')) == [
+        (os.path.normpath('pkg/loader.py'), 'Loader.load', 'method')]
+    assert names(backend.find_symbols('load', kind='method')) == names(backend.find_symbols('Loader.load'))
+    # Exact case first, then case-insensitive matches
+    assert [r['name'] for r in backend.find_symbols('Loader')] == ['Loader', 'loader']
+
+
+def test_symbols_follow_file_changes(workspace):
+    root = workspace({'a.py': "def old():\n    pass\n"})
+    assert backend.find_symbols('old')
+    
+    path = os.path.join(root, 'a.py')
+    with open(path, 'w') as f:
+        f.write("def new_name():\n    pass\n\n\ndef other():\n    pass\n")
+    os.utime(path, (1, 1))
+    backend.index_refresh_path(path)
+    assert backend.find_symbols('old') == []
+    assert backend.find_symbols('new_name')[0]['line'] == 1
+    
+    os.remove(path)
+    backend.index_refresh_path(path)
+    assert backend.find_symbols('other') == []
+
+
+def test_symbol_index_round_trips_through_the_cache(workspace):
+    root = workspace({'a.py': SOURCE})
+    sindex = backend.get_symbol_index(root)
+    backend.save_symbol_index(sindex, force=True)
+    
+    loaded = backend.load_symbol_index(sindex['root'])
+    assert loaded['files'] == sindex['files']
+    assert loaded['by_name'] == sindex['by_name']
+    assert backend.load_symbol_index(os.path.join(root, 'elsewhere')) is None
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+import backend
+
+
+FILES = {
+    'alpha.py': "def load_config(path):\n    return open(path).read()\n",
+    'beta.py': "class Loader:\n    pass\n",
+    # Has every trigram of 'abcd' but never the word itself
+    'gamma.txt': "abc bcd\n",
+    'image.png': b"\x89PNG\r\n\x1a\n\x00\x00abcd",
+}
+
+
+@pytest.fixture
+def tindex(workspace, monkeypatch):
+    root = workspace(FILES)
+    tindex = backend.new_trigram_index(root)
+    backend.sync_trigram_index(tindex, backend.workspace_index)
+    monkeypatch.setattr(backend, 'trigram_index', tindex)
+    return tindex
+
+
+def test_text_trigrams_are_lowercased_bytes():
+    assert backend.text_trigrams("ABcd") == {b'abc', b'bcd'}
+    assert backend.text_trigrams(b"ab") == set()
+
+
+def test_candidates_are_files_with_every_trigram(tindex):
+    root = tindex['root']
+    assert backend.trigram_candidates("load_config", root) == ['alpha.py']
+    assert backend.trigram_candidates("LOADER", root) == ['beta.py']
+    # A superset: the filter can't tell 'abc bcd' from 'abcd'
+    assert backend.trigram_candidates("abcd", root) == ['gamma.txt']
+    assert backend.trigram_candidates("nowhere to be found", root) == []
+
+
+def test_only_searchable_text_files_are_indexed(tindex):
+    assert sorted(tindex['files']) == ['alpha.py', 'beta.py', 'gamma.txt']
+
+
+def test_short_keywords_and_other_roots_are_not_narrowed(tindex, tmp_path):
+    assert backend.trigram_candidates("lo", tindex['root']) is None
+    assert backend.trigram_candidates("load_config", str(tmp_path)) is None
+
+
+def test_every_index_change_bumps_the_generation(tindex):
+    root = tindex['root']
+    generation = backend.workspace_index['generation']
+    open(os.path.join(root, 'delta.py'), 'w').close()
+    backend.index_refresh_path(os.path.join(root, 'delta.py'))
+    assert backend.workspace_index['generation'] > generation
+
+
+def test_candidates_follow_edits_and_deletions(tindex):
+    root = tindex['root']
+    with open(os.path.join(root, 'beta.py'), 'w') as f:
+        f.write("def load_config():\n    pass\n")
+    backend.index_refresh_path(os.path.join(root, 'beta.py'))
+    os.remove(os.path.join(root, 'alpha.py'))
+    backend.index_refresh_path(os.path.join(root, 'alpha.py'))
+    assert backend.trigram_candidates("load_config", root) == ['beta.py']
+    assert backend.trigram_candidates("loader", root) == []
+
+
+def test_saved_index_answers_the_same_after_loading(tindex, monkeypatch):
+    root = tindex['root']
+    backend.save_trigram_index(tindex, force=True)
+    loaded = backend.load_trigram_index(root)
+    assert loaded['files'] == tindex['files']
+    monkeypatch.setattr(backend, 'trigram_index', loaded)
+    assert backend.trigram_candidates("load_config", root) == ['alpha.py']
+    assert backend.trigram_candidates("abcd", root) == ['gamma.txt']
+
+
+def test_compaction_keeps_only_live_ids(tindex):
+    root = tindex['root']
+    os.remove(os.path.join(root, 'alpha.py'))
+    backend.index_refresh_path(os.path.join(root, 'alpha.py'))
+    backend.sync_trigram_index(tindex, backend.workspace_index)
+    backend.compact_trigram_index(tindex)
+    live = set(tindex['paths'])
+    assert all(set(ids) <= live for ids in tindex['postings'].values())
+    assert backend.trigram_candidates("load_config", root) == []
@@ -0,0 +1,58 @@
+import os
+
+import backend
+
+
+FILES = {
+    'README.md': "# demo\n",
+    'src/app.py': "print('app')\n",
+    'src/util/helpers.py': "def helper():\n    pass\n",
+    'tests/helpers.py': "",
+    'node_modules/lib/index.js': "",
+    '.git/config': "",
+}
+
+
+def test_build_indexes_files_and_folders_but_not_skipped_ones(workspace):
+    workspace(FILES)
+    store = backend.workspace_index['entries']
+    assert sorted(store.file_paths()) == sorted(
+        os.path.normpath(p) for p in ('README.md', 'src/app.py', 'src/util/helpers.py', 'tests/helpers.py'))
+    assert sorted(store.folder_paths()) == sorted(os.path.normpath(p) for p in ('src', 'src/util', 'tests'))
+
+
+def test_index_candidates_match_name_or_trailing_path(workspace):
+    workspace(FILES)
+    index = backend.workspace_index
+    assert sorted(backend.index_candidates(index, 'helpers.py')) == sorted(
+        os.path.normpath(p) for p in ('src/util/helpers.py', 'tests/helpers.py'))
+    assert backend.index_candidates(index, 'util/helpers.py') == [os.path.normpath('src/util/helpers.py')]
+    assert backend.index_candidates(index, 'missing.py') == []
+    assert backend.index_candidates(index, '../README.md') == []
+
+
+def test_find_file_recursive_prefers_the_shallowest_match(workspace):
+    root = workspace(FILES)
+    assert backend.find_file_recursive('helpers.py') == os.path.join(root, 'tests', 'helpers.py')
+    assert backend.find_file_recursive('src/util/helpers.py') == os.path.join(root, 'src', 'util', 'helpers.py')
+    assert backend.find_file_recursive('nothing_here.py') is None
+
+
+def test_entries_carry_stat_data(workspace):
+    workspace(FILES)
+    entry = backend.workspace_index['entries'].get(os.path.join('src', 'app.py'))
+    assert entry.name == 'app.py'
+    assert not entry.is_dir
+    assert entry.size == len("print('app')\n")
+
+
+def test_build_output_folders_are_indexed_unless_ignored(workspace):
+    root = workspace({'build/target.js': "", 'dist/app.js': "", '.gitignore': "dist/\n"})
+    assert backend.find_file_recursive('target.js') == os.path.join(root, 'build', 'target.js')
+    assert backend.find_file_recursive('app.js') is None
+
+
+def test_paths_inside_skipped_or_ignored_folders_are_still_found_directly(workspace):
+    root = workspace(dict(FILES, **{'dist/app.js': "", '.gitignore': "dist/\n"}))
+    assert backend.find_file_recursive('node_modules/lib/index.js') == os.path.join(root, 'node_modules', 'lib', 'index.js')
+    assert backend.find_file_recursive('dist/app.js') == os.path.join(root, 'dist', 'app.js')
@@ -0,0 +1,75 @@
+import os
+
+import backend
+
+
+FILES = {
+    'README.md': "x" * 10,
+    'src/app.py': "import os\n\n\ndef main():\n    pass\n\n\nclass App:\n    def run(self):\n        pass\n",
+    'src/pkg/deep/leaf.txt': "",
+    'docs/': None,
+}
+
+
+def test_estimate_tokens_rounds_up():
+    assert backend.estimate_tokens("") == 0
+    assert backend.estimate_tokens("abcd") == 1
+    assert backend.estimate_tokens("abcde") == 2
+
+
+def test_outline_lists_folders_first_with_totals_and_symbols(workspace):
+    workspace(FILES)
+    backend.get_symbol_index()
+    lines = backend.get_workspace_outline(detailed=True).split('\n')
+    assert [line.split(' (')[0] for line in lines] == [
+        'docs/', 'src/', '  pkg/', '    deep/', '  app.py', 'README.md']
+    assert lines[1].startswith('src/ (2 files, ')
+    assert lines[4].endswith(': main(), class App')
+
+
+def test_prompt_outline_lists_names_only_and_ignores_edits(workspace):
+    root = workspace(FILES)
+    backend.get_symbol_index()
+    outline = backend.get_workspace_outline()
+    assert outline.split('\n') == ['docs/', 'src/', '  pkg/', '    deep/', '  app.py', 'README.md']
+    
+    with open(os.path.join(root, 'README.md'), 'a') as f:
+        f.write("more text")
+    backend.index_refresh_path(os.path.join(root, 'README.md'))
+    assert backend.get_workspace_outline() == outline
+    assert 'README.md (19.00 B)' in backend.get_workspace_outline(detailed=True)
+
+
+def test_deep_levels_are_dropped_to_fit_the_budget(workspace):
+    workspace(FILES)
+    full = backend.get_workspace_outline(max_tokens=1000)
+    shallow = backend.get_workspace_outline(max_tokens=backend.estimate_tokens(full) - 5)
+    assert '    deep/' not in shallow
+    assert backend.estimate_tokens(shallow) <= backend.estimate_tokens(full) - 5
+    assert backend.get_workspace_outline(max_depth=1).split('\n') == [
+        line for line in full.split('\n') if not line.startswith(' ')]
+
+
+def test_top_level_is_truncated_when_nothing_fits(workspace):
+    workspace({f'file{i:02}.txt': "" for i in range(30)})
+    text = backend.get_workspace_outline(max_tokens=10)
+    assert text.endswith("... (outline truncated)")
+    assert text.startswith('file00.txt')
+    assert backend.get_workspace_outline(max_tokens=0) == ""
+
+
+def test_long_folders_are_summarised(workspace, monkeypatch):
+    monkeypatch.setattr(backend, 'OUTLINE_MAX_CHILDREN', 3)
+    workspace({f'f{i}.txt': "" for i in range(5)})
+    assert backend.get_workspace_outline().split('\n')[-1] == "... 2 more"
+
+
+def test_outline_is_reused_until_the_index_changes(workspace):
+    root = workspace(FILES)
+    first = backend.get_workspace_outline()
+    assert backend.get_workspace_outline() is first
+    
+    with open(os.path.join(root, 'docs', 'guide.md'), 'w'):
+        pass
+    backend.index_refresh_path(os.path.join(root, 'docs', 'guide.md'))
+    assert '  guide.md' in backend.get_workspace_outline()
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def switch(workspace, tmp_path, monkeypatch):
+    """
+    Set up two workspaces, 'a' active, and return a function that switches
+    the backend to a workspace root. Watchers and background builds are not started.
+    """
+    for name in ('start_workspace_watcher', 'start_index_persistence', 'start_trigram_index_build',
+                 'start_symbol_index_build', 'start_semantic_index_build'):
+        monkeypatch.setattr(backend, name, lambda *args: None)
+    monkeypatch.setattr(backend, 'stop_workspace_watcher', lambda: None)
+    
+    root_a = workspace({'a.py': "a = 1\n"})
+    root_b = str(tmp_path / 'b')
+    os.makedirs(os.path.join(root_b, 'pkg'))
+    with open(os.path.join(root_b, 'pkg', 'b.py'), 'w') as f:
+        f.write("b = 2\n")
+    
+    def to(root):
+        monkeypatch.setattr(backend, 'WORKSPACE_PATH', root)
+        return backend.get_workspace_index()
+    
+    to.a, to.b = root_a, root_b
+    return to
+
+
+def test_switching_back_reuses_the_parked_index(switch):
+    index_a = backend.workspace_index
+    index_b = switch(switch.b)
+    assert index_b['root'] == switch.b
+    assert list(backend.workspace_registry) == [switch.a]
+    
+    assert switch(switch.a) is index_a
+    assert list(backend.workspace_registry) == [switch.b]
+    assert switch(switch.b) is index_b
+
+
+def test_folders_changed_while_parked_are_relisted_on_resume(switch):
+    switch(switch.b)
+    with open(os.path.join(switch.a, 'new.py'), 'w'):
+        pass
+    os.utime(switch.a, (1, 1))
+    index_a = switch(switch.a)
+    assert 'new.py' in index_a['entries'].file_paths()
+
+
+def test_parked_indexes_keep_their_companions(switch):
+    backend.trigram_index = backend.new_trigram_index(switch.a)
+    switch(switch.b)
+    assert backend.trigram_index is None
+    assert backend.workspace_registry[switch.a]['trigram']['root'] == switch.a
+    assert backend.workspace_registry[switch.a]['memory'] > 0
+    
+    switch(switch.a)
+    assert backend.trigram_index['root'] == switch.a
+
+
+def test_cold_workspaces_are_evicted_oldest_first(switch, tmp_path, monkeypatch):
+    root_c = str(tmp_path / 'c')
+    os.makedirs(root_c)
+    switch(switch.b)
+    switch(root_c)
+    assert list(backend.workspace_registry) == [switch.a, switch.b]
+    
+    monkeypatch.setattr(backend, 'WORKSPACE_MEMORY_BUDGET',
+                        backend.workspace_registry[switch.b]['memory'] + backend.workspace_index['entries'].nbytes())
+    backend.evict_cold_workspaces()
+    assert list(backend.workspace_registry) == [switch.b]
+    
+    monkeypatch.setattr(backend, 'WORKSPACE_MEMORY_BUDGET', 0)
+    backend.evict_cold_workspaces()
+    assert backend.workspace_registry == {}
+    assert backend.workspace_index['root'] == root_c